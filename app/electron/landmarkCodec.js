@@ -0,0 +1,88 @@
+const zlib = require('zlib');
+
+// Decoder for the compact landmark payloads produced by python/landmark_codec.py.
+// Returns the same { group: [[x, y, z(, visibility)], ...] } object as the
+// default JSON encoding, so the renderer doesn't need to know about it.
+
+const halfToFloat = (h) => {
+  const sign = h & 0x8000 ? -1 : 1;
+  const exponent = (h >> 10) & 0x1f;
+  const fraction = h & 0x3ff;
+  if (exponent === 0) return sign * Math.pow(2, -14) * (fraction / 1024);
+  if (exponent === 0x1f) return fraction ? NaN : sign * Infinity;
+  return sign * Math.pow(2, exponent - 15) * (1 + fraction / 1024);
+};
+
+const createDeltaState = () => ({ seq: null, values: null });
+
+const splitGroups = (groups, values) => {
+  const landmarks = {};
+  let offset = 0;
+  for (const [name, count, width] of groups) {
+    const points = new Array(count);
+    for (let i = 0; i < count; i++) {
+      points[i] = Array.from(values.subarray(offset, offset + width));
+      offset += width;
+    }
+    landmarks[name] = points;
+  }
+  return landmarks;
+};
+
+// `deltaState` (from createDeltaState) holds the last decoded uint16 frame of
+// a stream. Returns null if a delta frame refers to a frame we never saw;
+// the next keyframe resynchronizes.
+const decodeLandmarks = (payload, deltaState) => {
+  if (!payload || !payload.encoding) return payload || {};
+
+  let bytes = Buffer.from(payload.data, 'base64');
+  if (payload.compression === 'zlib') {
+    bytes = zlib.inflateSync(bytes);
+  }
+  // Copy into an aligned buffer for the typed array views
+  const raw = new Uint8Array(bytes).buffer;
+
+  if (payload.encoding === 'float16') {
+    const halves = new Uint16Array(raw);
+    const values = new Float32Array(halves.length);
+    for (let i = 0; i < halves.length; i++) {
+      values[i] = halfToFloat(halves[i]);
+    }
+    return splitGroups(payload.groups, values);
+  }
+
+  if (payload.encoding === 'uint16') {
+    let quantized = new Uint16Array(raw);
+    if (payload.ref !== null && payload.ref !== undefined) {
+      if (!deltaState || deltaState.seq !== payload.ref || !deltaState.values
+          || deltaState.values.length !== quantized.length) {
+        return null;
+      }
+      const previous = deltaState.values;
+      const current = new Uint16Array(quantized.length);
+      for (let i = 0; i < quantized.length; i++) {
+        current[i] = (previous[i] + quantized[i]) & 0xffff;
+      }
+      quantized = current;
+    }
+    if (deltaState && payload.seq !== null && payload.seq !== undefined) {
+      deltaState.seq = payload.seq;
+      deltaState.values = quantized;
+    }
+
+    const [low, high] = payload.range;
+    const step = (high - low) / 65535;
+    const values = new Float32Array(quantized.length);
+    for (let i = 0; i < quantized.length; i++) {
+      values[i] = low + quantized[i] * step;
+    }
+    return splitGroups(payload.groups, values);
+  }
+
+  return {};
+};
+
+module.exports = {
+  createDeltaState,
+  decodeLandmarks
+};
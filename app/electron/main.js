@@ -1,14 +1,160 @@
 const { app, BrowserWindow, ipcMain, Notification } = require('electron');
 const path = require('path');
 const { spawn } = require('child_process');
+const net = require('net');
 const sessionStorage = require('./storage/sessionStorage');
 const settingsStorage = require('./storage/settingsStorage');
+const { createDeltaState, decodeLandmarks } = require('./landmarkCodec');
 
 const isDev = process.env.NODE_ENV === 'development' || !app.isPackaged;
 
 let mainWindow = null;
 let pythonProcess = null;
 let pythonPort = 5001;
+let pythonStreamPort = pythonPort + 1;
+
+// Persistent stream channel to the Python bridge (see python/stream_server.py).
+// Every message is a 9-byte header (uint32 payload length, uint8 type,
+// uint32 sequence number, big-endian) followed by the payload.
+const STREAM_HEADER_SIZE = 9;
+const MSG_FRAME = 1;
+const MSG_CONFIG = 2;
+const MSG_RESULT = 129;
+const MSG_EVENT = 130;
+const STREAM_FRAME_TIMEOUT = 5000;
+
+// Ask for landmarks as quantized uint16, delta-encoded against the previous
+// frame (see python/landmark_codec.py); decoded here before reaching the renderer.
+const STREAM_CONFIG = { landmark_encoding: 'uint16', landmark_delta: true };
+const HTTP_LANDMARK_QUERY = '?landmark_encoding=uint16';
+
+let streamSocket = null;
+let streamBuffer = Buffer.alloc(0);
+let streamSeq = 0;
+const pendingFrames = new Map();  // seq -> { resolve, timer }
+let landmarkDelta = createDeltaState();
+
+function decodeResultLandmarks(result, deltaState) {
+  if (result && result.landmarks && result.landmarks.encoding) {
+    result.landmarks = decodeLandmarks(result.landmarks, deltaState) || {};
+  }
+  return result;
+}
+
+function resolvePendingFrame(seq, result) {
+  const pending = pendingFrames.get(seq);
+  if (!pending) return;
+  clearTimeout(pending.timer);
+  pendingFrames.delete(seq);
+  pending.resolve(result);
+}
+
+function handleStreamMessage(type, seq, payload) {
+  let message;
+  try {
+    message = JSON.parse(payload.toString());
+  } catch (e) {
+    console.error('Invalid message on stream channel');
+    return;
+  }
+
+  if (type === MSG_RESULT) {
+    // Results arrive in order; anything still waiting on an older frame is stale
+    for (const pendingSeq of Array.from(pendingFrames.keys())) {
+      if (pendingSeq < seq) {
+        resolvePendingFrame(pendingSeq, { success: false, stale: true, error: 'Superseded by a newer frame' });
+      }
+    }
+    resolvePendingFrame(seq, decodeResultLandmarks(message, landmarkDelta));
+  } else if (type === MSG_EVENT) {
+    if (mainWindow && !mainWindow.isDestroyed()) {
+      mainWindow.webContents.send('python:event', message);
+    }
+  }
+}
+
+function connectStream() {
+  if (streamSocket || !pythonProcess) return;
+
+  const socket = net.createConnection({ host: '127.0.0.1', port: pythonStreamPort });
+  socket.setNoDelay(true);
+
+  socket.on('connect', () => {
+    console.log(`Stream channel connected on port ${pythonStreamPort}`);
+    streamSocket = socket;
+    landmarkDelta = createDeltaState();
+    sendStreamConfig(STREAM_CONFIG);
+  });
+
+  socket.on('data', (chunk) => {
+    streamBuffer = streamBuffer.length ? Buffer.concat([streamBuffer, chunk]) : chunk;
+    while (streamBuffer.length >= STREAM_HEADER_SIZE) {
+      const length = streamBuffer.readUInt32BE(0);
+      if (streamBuffer.length < STREAM_HEADER_SIZE + length) break;
+      const type = streamBuffer.readUInt8(4);
+      const seq = streamBuffer.readUInt32BE(5);
+      const payload = streamBuffer.subarray(STREAM_HEADER_SIZE, STREAM_HEADER_SIZE + length);
+      streamBuffer = streamBuffer.subarray(STREAM_HEADER_SIZE + length);
+      handleStreamMessage(type, seq, payload);
+    }
+  });
+
+  socket.on('error', (error) => {
+    console.error('Stream channel error:', error.message);
+  });
+
+  socket.on('close', () => {
+    if (streamSocket === socket) {
+      streamSocket = null;
+    }
+    streamBuffer = Buffer.alloc(0);
+    for (const seq of Array.from(pendingFrames.keys())) {
+      resolvePendingFrame(seq, { success: false, error: 'Stream channel closed' });
+    }
+    // Reconnect while the Python process is still running
+    if (pythonProcess) {
+      setTimeout(connectStream, 1000);
+    }
+  });
+}
+
+function disconnectStream() {
+  if (streamSocket) {
+    streamSocket.destroy();
+    streamSocket = null;
+  }
+}
+
+function sendStreamConfig(config) {
+  const payload = Buffer.from(JSON.stringify(config));
+  const header = Buffer.alloc(STREAM_HEADER_SIZE);
+  header.writeUInt32BE(payload.length, 0);
+  header.writeUInt8(MSG_CONFIG, 4);
+  header.writeUInt32BE(0, 5);
+  streamSocket.write(header);
+  streamSocket.write(payload);
+}
+
+function sendFrameOverStream(frameBytes) {
+  streamSeq = (streamSeq + 1) >>> 0;
+  const seq = streamSeq;
+
+  const header = Buffer.alloc(STREAM_HEADER_SIZE);
+  header.writeUInt32BE(frameBytes.length, 0);
+  header.writeUInt8(MSG_FRAME, 4);
+  header.writeUInt32BE(seq, 5);
+
+  return new Promise((resolve) => {
+    const timer = setTimeout(() => {
+      pendingFrames.delete(seq);
+      resolve({ success: false, error: 'Request timeout' });
+    }, STREAM_FRAME_TIMEOUT);
+    pendingFrames.set(seq, { resolve, timer });
+
+    streamSocket.write(header);
+    streamSocket.write(frameBytes);
+  });
+}
 
 function createWindow() {
   const win = new BrowserWindow({
@@ -113,6 +259,7 @@ ipcMain.handle('python:start', async () => {
 
     // Check if process is still running
     if (pythonProcess && pythonProcess.pid) {
+      connectStream();
       return { success: true, port: pythonPort };
     } else {
       return { success: false, error: 'Python process failed to start' };
@@ -127,6 +274,7 @@ ipcMain.handle('python:stop', async () => {
   if (pythonProcess) {
     pythonProcess.kill();
     pythonProcess = null;
+    disconnectStream();
     return { success: true };
   }
   return { success: true, message: 'No Python process running' };
@@ -140,13 +288,28 @@ ipcMain.handle('python:send-frame', async (event, frameData) => {
 
   try {
     const https = require('http');
+
+    // Binary frames (JPEG bytes from canvas.toBlob) go to the raw-body route;
+    // data URL strings still use the JSON route.
+    const isBinary = typeof frameData !== 'string';
+
+    // Prefer the persistent stream channel when it is connected
+    if (isBinary && streamSocket) {
+      return sendFrameOverStream(Buffer.from(frameData.buffer, frameData.byteOffset, frameData.byteLength));
+    }
+
+    const body = isBinary
+      ? Buffer.from(frameData.buffer, frameData.byteOffset, frameData.byteLength)
+      : JSON.stringify({ frame: frameData });
+
     const options = {
       hostname: '127.0.0.1',  // Use IPv4 directly instead of 'localhost'
       port: pythonPort,
-      path: '/process_frame',
+      path: isBinary ? '/process_frame/binary' + HTTP_LANDMARK_QUERY : '/process_frame',
       method: 'POST',
       headers: {
-        'Content-Type': 'application/json',
+        'Content-Type': isBinary ? 'image/jpeg' : 'application/json',
+        'Content-Length': Buffer.byteLength(body),
       },
       timeout: 5000
     };
@@ -159,7 +322,7 @@ ipcMain.handle('python:send-frame', async (event, frameData) => {
         });
         res.on('end', () => {
           try {
-            const result = JSON.parse(data);
+            const result = decodeResultLandmarks(JSON.parse(data), null);
             resolve(result);
           } catch (e) {
             console.error('Invalid JSON response from Python:', data);
@@ -179,7 +342,7 @@ ipcMain.handle('python:send-frame', async (event, frameData) => {
         resolve({ success: false, error: 'Request timeout' });
       });
 
-      req.write(JSON.stringify({ frame: frameData }));
+      req.write(body);
       req.end();
     });
   } catch (error) {
@@ -249,7 +412,9 @@ ipcMain.handle('notification:show', async (event, title, body) => {
 app.on('before-quit', () => {
   if (pythonProcess) {
     pythonProcess.kill();
+    pythonProcess = null;
   }
+  disconnectStream();
 });
 
 // This method will be called when Electron has finished initialization
@@ -19,6 +19,11 @@ contextBridge.exposeInMainWorld('electronAPI', {
   startPython: () => ipcRenderer.invoke('python:start'),
   stopPython: () => ipcRenderer.invoke('python:stop'),
   sendFrame: (frameData) => ipcRenderer.invoke('python:send-frame', frameData),
+  onPythonEvent: (callback) => {
+    const listener = (event, data) => callback(data);
+    ipcRenderer.on('python:event', listener);
+    return () => ipcRenderer.removeListener('python:event', listener);
+  },
 
   // Arduino
   triggerArduino: (action) => ipcRenderer.invoke('arduino:trigger', action),
@@ -1,13 +1,19 @@
+import logging
+import threading
 import serial
 import serial.tools.list_ports
 from config import ARDUINO_PORT, ARDUINO_BAUDRATE
 
+log = logging.getLogger(__name__)
+
 
 class ArduinoController:
     def __init__(self):
         self.port = ARDUINO_PORT
         self.baudrate = ARDUINO_BAUDRATE
         self.connection = None
+        # Frames from several threads may trigger the servo at once
+        self.lock = threading.Lock()
         self.auto_detect_port()
 
     def auto_detect_port(self):
@@ -20,22 +26,22 @@ class ArduinoController:
             # Common Arduino identifiers
             if 'arduino' in port.description.lower() or 'ch340' in port.description.lower() or 'cp210' in port.description.lower():
                 self.port = port.device
-                print(f"Auto-detected Arduino port: {self.port}")
+                log.info("Auto-detected Arduino port: %s", self.port)
                 return
 
     def connect(self):
         """Connect to Arduino"""
         if not self.port:
-            print("No Arduino port configured")
+            log.warning("No Arduino port configured")
             return False
 
         try:
             self.connection = serial.Serial(
                 self.port, self.baudrate, timeout=1)
-            print(f"Connected to Arduino on {self.port}")
+            log.info("Connected to Arduino on %s", self.port)
             return True
         except Exception as e:
-            print(f"Error connecting to Arduino: {e}")
+            log.error("Error connecting to Arduino: %s", e)
             return False
 
     def disconnect(self):
@@ -46,19 +52,20 @@ class ArduinoController:
 
     def send_command(self, command):
         """Send command to Arduino"""
-        if not self.connection or not self.connection.is_open:
-            if not self.connect():
-                return False
+        with self.lock:
+            if not self.connection or not self.connection.is_open:
+                if not self.connect():
+                    return False
 
-        try:
-            # Send command as string
-            cmd = f"{command}\n"
-            self.connection.write(cmd.encode())
-            print(f"Sent command to Arduino: {command}")
-            return True
-        except Exception as e:
-            print(f"Error sending command to Arduino: {e}")
-            return False
+            try:
+                # Send command as string
+                cmd = f"{command}\n"
+                self.connection.write(cmd.encode())
+                log.info("Sent command to Arduino: %s", command)
+                return True
+            except Exception as e:
+                log.error("Error sending command to Arduino: %s", e)
+                return False
 
     def trigger(self, action):
         """Send trigger command to Arduino (triggers single servo sweep)"""
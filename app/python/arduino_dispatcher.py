@@ -0,0 +1,256 @@
+import logging
+import queue
+import threading
+import time
+
+from collections import deque
+
+from config import (
+    ARDUINO_QUEUE_SIZE, ARDUINO_TRIGGER_COOLDOWN, ARDUINO_SWEEP_SECONDS,
+    ARDUINO_RECONNECT_INITIAL, ARDUINO_RECONNECT_MAX, ARDUINO_BOOT_TIMEOUT, ARDUINO_ACK_TIMEOUT
+)
+
+log = logging.getLogger(__name__)
+
+# Start of the line servo_controller.ino prints after handling each command
+ACK_PREFIXES = {
+    'TRIGGER': ('Single sweep triggered',),
+    'START': ('Auto mode started',),
+    'STOP': ('Auto mode stopped', 'Sweep interrupted'),
+}
+UNKNOWN_PREFIX = 'Unknown command'
+READY_LINE = 'Arduino Servo Controller Ready'
+# Acknowledgement latencies kept for the stats
+LATENCY_WINDOW = 100
+
+
+class ArduinoDispatcher:
+    """Sends ArduinoController commands from a background thread.
+
+    `submit()` (and trigger/start_auto_mode/stop_auto_mode) only put the
+    command on a bounded queue, so frame processing never waits on the
+    serial port. A TRIGGER is coalesced away while another one is queued
+    or its sweep is still running (the sketch reads and discards anything
+    but STOP mid-sweep), and rejected within `cooldown` seconds of the
+    last one sent.
+
+    The port is opened on demand. After a failed connect, commands are
+    rejected without being queued until the next attempt is due, with the
+    wait doubling from `reconnect_initial` up to `reconnect_max` seconds.
+    A reader thread matches the board's acknowledgement lines to the
+    commands sent, for latency stats.
+    """
+
+    def __init__(self, controller, queue_size=ARDUINO_QUEUE_SIZE, cooldown=ARDUINO_TRIGGER_COOLDOWN,
+                 sweep_seconds=ARDUINO_SWEEP_SECONDS, reconnect_initial=ARDUINO_RECONNECT_INITIAL,
+                 reconnect_max=ARDUINO_RECONNECT_MAX, boot_timeout=ARDUINO_BOOT_TIMEOUT,
+                 ack_timeout=ARDUINO_ACK_TIMEOUT):
+        self.controller = controller
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.cooldown = cooldown
+        self.sweep_seconds = sweep_seconds
+        self.reconnect_initial = reconnect_initial
+        self.reconnect_max = reconnect_max
+        self.boot_timeout = boot_timeout
+        self.ack_timeout = ack_timeout
+        self.lock = threading.Lock()
+        self.trigger_queued = False
+        self.last_trigger = None  # monotonic time the last TRIGGER was written
+        self.backoff = reconnect_initial
+        self.next_connect = 0.0
+        self.board_ready = threading.Event()
+        self.pending_acks = deque()  # (command, submit time), in send order
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.cooldown_rejected = 0
+        self.dropped = 0  # queue full, or the board unreachable
+        self.failed = 0
+        self.acked = 0
+        self.unacknowledged = 0
+        self.connects = 0
+        self.connect_failures = 0
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='arduino-dispatcher', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=2.0):
+        """Stop the dispatcher after the commands already queued, and close the port"""
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self._disconnect(retry=False)
+
+    @property
+    def connected(self):
+        connection = self.controller.connection
+        return connection is not None and connection.is_open
+
+    def submit(self, command):
+        """Queue `command` for the board; False if it was coalesced, rejected by the cooldown or dropped"""
+        now = time.monotonic()
+        with self.lock:
+            self.submitted += 1
+            if not self.connected and now < self.next_connect:
+                self.dropped += 1
+                return False
+            if command == 'TRIGGER':
+                since_last = now - self.last_trigger if self.last_trigger is not None else None
+                if self.trigger_queued or (since_last is not None and since_last < self.sweep_seconds):
+                    self.coalesced += 1
+                    return False
+                if since_last is not None and since_last < self.cooldown:
+                    self.cooldown_rejected += 1
+                    return False
+            try:
+                self.queue.put_nowait((command, now))
+            except queue.Full:
+                self.dropped += 1
+                return False
+            if command == 'TRIGGER':
+                self.trigger_queued = True
+        return True
+
+    def trigger(self, action=None):
+        """Queue a single servo sweep"""
+        return self.submit('TRIGGER')
+
+    def start_auto_mode(self):
+        return self.submit('START')
+
+    def stop_auto_mode(self):
+        return self.submit('STOP')
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            command, submitted = item
+            ok = self._ensure_connected() and self._write(command, submitted)
+            with self.lock:
+                if command == 'TRIGGER':
+                    self.trigger_queued = False
+                    if ok:
+                        self.last_trigger = time.monotonic()
+                if ok:
+                    self.sent += 1
+                else:
+                    self.failed += 1
+
+    def _ensure_connected(self):
+        if self.connected:
+            return True
+        now = time.monotonic()
+        if now < self.next_connect:
+            return False
+
+        self.board_ready.clear()
+        if not self.controller.connect():
+            with self.lock:
+                self.connect_failures += 1
+                self.next_connect = now + self.backoff
+                log.warning("Arduino unreachable, next connection attempt in %.1f s", self.backoff)
+                self.backoff = min(self.backoff * 2, self.reconnect_max)
+            return False
+
+        with self.lock:
+            self.connects += 1
+            self.backoff = self.reconnect_initial
+        connection = self.controller.connection
+        threading.Thread(target=self._read, args=(connection,), name='arduino-reader', daemon=True).start()
+        # Opening the port resets most boards, which miss anything sent before setup() ran
+        if not self.board_ready.wait(self.boot_timeout):
+            log.info("No ready line from the Arduino after %.1f s, sending anyway", self.boot_timeout)
+        return True
+
+    def _write(self, command, submitted):
+        with self.lock:
+            self.pending_acks.append((command, submitted))
+        if self.controller.send_command(command):
+            return True
+        with self.lock:
+            if self.pending_acks and self.pending_acks[-1] == (command, submitted):
+                self.pending_acks.pop()
+        self._disconnect()
+        return False
+
+    def _disconnect(self, retry=True):
+        with self.controller.lock:
+            try:
+                self.controller.disconnect()
+            except Exception as e:
+                log.debug("Error closing the Arduino port: %s", e)
+            self.controller.connection = None
+        with self.lock:
+            self.pending_acks.clear()
+            if retry:
+                self.next_connect = time.monotonic() + self.backoff
+
+    def _read(self, connection):
+        """Read the board's lines until `connection` is closed or fails"""
+        while connection.is_open:
+            try:
+                line = connection.readline()
+            except Exception as e:
+                if connection is self.controller.connection:
+                    log.warning("Lost the Arduino connection: %s", e)
+                    self._disconnect()
+                return
+            if line:
+                self._handle_line(line.decode('ascii', errors='replace').strip())
+            self._expire_acks()
+
+    def _handle_line(self, line):
+        if line.startswith(READY_LINE):
+            log.info("Arduino ready")
+            self.board_ready.set()
+            return
+        with self.lock:
+            if self.pending_acks:
+                command, submitted = self.pending_acks[0]
+                if line.startswith(ACK_PREFIXES.get(command, ())) or line.startswith(UNKNOWN_PREFIX):
+                    self.pending_acks.popleft()
+                    latency = time.monotonic() - submitted
+                    self.latencies.append(latency)
+                    self.acked += 1
+                    log.debug("Arduino acknowledged %s after %.1f ms: %s", command, latency * 1000, line)
+                    return
+        log.debug("Arduino: %s", line)
+
+    def _expire_acks(self):
+        deadline = time.monotonic() - self.ack_timeout
+        with self.lock:
+            while self.pending_acks and self.pending_acks[0][1] < deadline:
+                command, _ = self.pending_acks.popleft()
+                self.unacknowledged += 1
+                log.warning("Arduino did not acknowledge %s within %.0f s", command, self.ack_timeout)
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            return {
+                'connected': self.connected,
+                'port': self.controller.port,
+                'queue_depth': self.queue.qsize(),
+                'submitted': self.submitted,
+                'sent': self.sent,
+                'coalesced': self.coalesced,
+                'cooldown': self.cooldown_rejected,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'acked': self.acked,
+                'unacknowledged': self.unacknowledged,
+                'connects': self.connects,
+                'connect_failures': self.connect_failures,
+                'reconnect_in_seconds': round(max(self.next_connect - time.monotonic(), 0.0), 1),
+                'mean_ack_ms': round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+                'p95_ack_ms': round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else None,
+                'last_ack_ms': round(self.latencies[-1] * 1000, 1) if latencies else None,
+            }
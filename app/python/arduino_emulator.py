@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Emulates the servo_controller.ino board on a Linux pseudo-terminal.
+
+The emulator speaks the sketch's serial protocol, so ArduinoController (and
+the bridge's dispatcher) can open it like the real board:
+
+- opening the port "resets" the board: after `boot_delay` it prints the
+  ready banner and the command list, and input sent before that is lost
+- START, STOP, TRIGGER (and lines starting with SLEEPING/DOOMSCROLLING) are
+  acknowledged with the sketch's lines; anything else gets "Unknown command"
+- a sweep steps the servo through 0..END_POSITION degrees, SWEEP_DELAY ms a
+  step, then pauses RESET_DELAY ms at each end. During a sweep only STOP is
+  acted on; other lines are read and discarded, as the sketch does
+- output and input are paced at the baud rate
+
+`link` gives the pty a stable path (a symlink), so a client can reconnect
+to a restarted emulator by the same port name.
+
+Usage: python arduino_emulator.py [--link /tmp/arduino] [--boot-delay 1.5]
+       then e.g. BRIDGE_ARDUINO_PORT=/tmp/arduino python bridge_service.py
+"""
+
+import argparse
+import os
+import select
+import threading
+import time
+import tty
+
+from config import ARDUINO_BAUDRATE
+
+# Constants from servo_controller.ino
+START_POSITION = 0
+END_POSITION = 105
+SWEEP_DELAY_MS = 5
+RESET_DELAY_MS = 500
+READY_BANNER = ('Arduino Servo Controller Ready', 'Commands: START, STOP, TRIGGER')
+
+
+class ArduinoEmulator:
+    """servo_controller.ino behind a pty; `port` is the path to open"""
+
+    def __init__(self, link=None, boot_delay=1.5, baudrate=ARDUINO_BAUDRATE,
+                 sweep_delay=SWEEP_DELAY_MS / 1000, reset_delay=RESET_DELAY_MS / 1000):
+        self.link = link
+        self.boot_delay = boot_delay
+        # Seconds per byte on the wire (start + 8 data + stop bits); 0 = unpaced
+        self.byte_time = 10.0 / baudrate if baudrate else 0.0
+        self.sweep_delay = sweep_delay
+        self.reset_delay = reset_delay
+        self.master = None
+        self.port = None
+        self.thread = None
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.buffer = b''
+        self.host_connected = False
+        self.auto_mode = False
+        self.trigger_sweep = False
+        self.position = START_POSITION
+        self.connections = 0
+        self.commands = 0
+        self.sweeps = 0
+        self.interrupted = 0
+        self.discarded = 0  # lines read mid-sweep and ignored
+        self.unknown = 0
+
+    @property
+    def sweep_seconds(self):
+        """Duration of one sweep, as the sketch runs it"""
+        return (END_POSITION - START_POSITION + 1) * self.sweep_delay + 2 * self.reset_delay
+
+    def start(self):
+        self.master, slave = os.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        # Only the client keeps the slave open, so a hang-up on the master means it closed the port
+        os.close(slave)
+        if self.link:
+            tmp_link = self.link + '.tmp'
+            if os.path.lexists(tmp_link):
+                os.remove(tmp_link)
+            os.symlink(self.port, tmp_link)
+            os.replace(tmp_link, self.link)
+            self.port = self.link
+        self.stopping.clear()
+        self.buffer = b''
+        self.host_connected = False
+        self.thread = threading.Thread(target=self._run, name='arduino-emulator', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Unplug the board: clients reading from the port get an error"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(2.0)
+        if self.master is not None:
+            os.close(self.master)
+            self.master = None
+        self.host_connected = False
+
+    def stats(self):
+        with self.lock:
+            return {
+                'port': self.port,
+                'host_connected': self.host_connected,
+                'connections': self.connections,
+                'commands': self.commands,
+                'sweeps': self.sweeps,
+                'interrupted': self.interrupted,
+                'discarded': self.discarded,
+                'unknown': self.unknown,
+                'auto_mode': self.auto_mode,
+            }
+
+    # Board side
+
+    def _run(self):
+        poller = select.poll()
+        poller.register(self.master, select.POLLIN | select.POLLHUP)
+        while not self.stopping.is_set():
+            if any(event & select.POLLHUP for _, event in poller.poll(0)):
+                self.host_connected = False
+                time.sleep(0.02)
+                continue
+            if not self.host_connected:
+                self.host_connected = True
+                self._boot()
+                continue
+
+            line = self._read_line(0.02)
+            if line is not None:
+                self._handle_command(line)
+            if self.trigger_sweep or self.auto_mode:
+                self._perform_sweep()
+                self.trigger_sweep = False
+
+    def _boot(self):
+        """What the board does after the host opens the port (DTR reset) until setup() finished"""
+        with self.lock:
+            self.connections += 1
+        self.auto_mode = False
+        self.trigger_sweep = False
+        self.position = START_POSITION
+        if self.stopping.wait(self.boot_delay):
+            return
+        # Bytes that arrived while the bootloader ran never reach the sketch
+        self._drain()
+        self.buffer = b''
+        for line in READY_BANNER:
+            self._println(line)
+
+    def _handle_command(self, command):
+        command = command.upper()
+        with self.lock:
+            self.commands += 1
+        if command == 'START':
+            self.auto_mode = True
+            self._println('Auto mode started - continuous sweeping')
+        elif command == 'STOP':
+            self.auto_mode = False
+            self.position = START_POSITION
+            self._println('Auto mode stopped - servo reset')
+        elif command == 'TRIGGER':
+            self.trigger_sweep = True
+            self._println('Single sweep triggered')
+        elif command.startswith('SLEEPING') or command.startswith('DOOMSCROLLING'):
+            self.trigger_sweep = True
+            self._println('Action detected: ' + command)
+        else:
+            with self.lock:
+                self.unknown += 1
+            self._println('Unknown command: ' + command)
+
+    def _perform_sweep(self):
+        start = time.perf_counter()
+        for step, pos in enumerate(range(START_POSITION, END_POSITION + 1)):
+            self.position = pos
+            self._sleep_until(start + (step + 1) * self.sweep_delay)
+            if self.stopping.is_set():
+                return
+            line = self._read_line(0)
+            if line is not None:
+                if line.upper() == 'STOP':
+                    with self.lock:
+                        self.commands += 1
+                        self.interrupted += 1
+                    self.auto_mode = False
+                    self.position = START_POSITION
+                    self._println('Sweep interrupted - stopped')
+                    return
+                with self.lock:
+                    self.discarded += 1
+        if self.stopping.wait(self.reset_delay):
+            return
+        self.position = START_POSITION
+        if self.stopping.wait(self.reset_delay):
+            return
+        with self.lock:
+            self.sweeps += 1
+
+    @staticmethod
+    def _sleep_until(deadline):
+        remaining = deadline - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    # Serial I/O
+
+    def _read_line(self, timeout):
+        """Next trimmed line from the host, or None if none arrived within `timeout`"""
+        if b'\n' not in self.buffer:
+            try:
+                ready, _, _ = select.select([self.master], [], [], timeout)
+                if ready:
+                    self.buffer += os.read(self.master, 256)
+            except OSError:
+                # The host closed the port
+                return None
+        if b'\n' not in self.buffer:
+            return None
+        line, self.buffer = self.buffer.split(b'\n', 1)
+        # Serial.readStringUntil only returns once the whole line came in at the baud rate
+        time.sleep((len(line) + 1) * self.byte_time)
+        return line.decode('ascii', errors='replace').strip()
+
+    def _drain(self):
+        try:
+            while select.select([self.master], [], [], 0)[0]:
+                if not os.read(self.master, 256):
+                    break
+        except OSError:
+            pass
+
+    def _println(self, text):
+        data = (text + '\r\n').encode()
+        time.sleep(len(data) * self.byte_time)
+        try:
+            os.write(self.master, data)
+        except OSError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--link', default='/tmp/arduino', help='Symlink to create for the pty')
+    parser.add_argument('--boot-delay', type=float, default=1.5, help='Seconds from port open to the ready banner')
+    parser.add_argument('--baudrate', type=int, default=ARDUINO_BAUDRATE, help='Pacing of serial I/O (0 = unpaced)')
+    args = parser.parse_args()
+
+    emulator = ArduinoEmulator(args.link, args.boot_delay, args.baudrate).start()
+    print(f"Emulating servo_controller.ino on {emulator.port} (sweep {emulator.sweep_seconds:.2f} s); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(5)
+            print(emulator.stats())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+        if args.link and os.path.islink(args.link):
+            os.remove(args.link)
+
+
+if __name__ == '__main__':
+    main()
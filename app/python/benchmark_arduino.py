@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Serial-path benchmark against the board emulator (arduino_emulator.py).
+
+Runs without hardware. The emulator is paced at ARDUINO_BAUDRATE and uses
+the sketch's sweep timing. Scenarios:
+
+- roundtrip: --count STOP commands (acknowledged without a sweep), one at
+  a time. Measured written directly with ArduinoController (write to
+  acknowledgement line) and through ArduinoDispatcher (submit to
+  acknowledgement).
+- burst: TRIGGERs at --burst-rate per second for --burst-seconds, the
+  way a run of doomscrolling frames produces them. Once written directly
+  to the port, as the bridge used to, and once through the dispatcher.
+  Reports how many the board acted on, discarded mid-sweep or never
+  acknowledged, and the dispatcher's queue depth and coalescing.
+- reconnect: the emulator is killed while STOPs keep being submitted and
+  restarted after --downtime seconds. Reports how long the dispatcher took
+  to notice, its connection attempts, and the time from restart to the
+  first acknowledged command.
+
+Usage: python benchmark_arduino.py [--scenarios roundtrip burst reconnect]
+                                   [--count 50] [--output arduino.json]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from arduino_controller import ArduinoController
+from arduino_dispatcher import ArduinoDispatcher, READY_LINE, ACK_PREFIXES
+from arduino_emulator import ArduinoEmulator
+from benchmark_pipeline import summarize
+
+
+def open_controller(port, timeout=5.0):
+    """ArduinoController connected to `port`, after the board's ready line"""
+    controller = ArduinoController()
+    controller.port = port
+    if not controller.connect():
+        raise RuntimeError(f"Could not open {port}")
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if controller.connection.readline().decode(errors='replace').startswith(READY_LINE):
+            controller.connection.readline()  # command list
+            return controller
+    raise RuntimeError(f"No ready line from {port}")
+
+
+def wait_for(condition, timeout, interval=0.005):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(interval)
+    return False
+
+
+def roundtrip(emulator, count):
+    controller = open_controller(emulator.port)
+    direct = []
+    for _ in range(count):
+        start = time.perf_counter()
+        controller.send_command('STOP')
+        line = controller.connection.readline().decode(errors='replace')
+        if line.startswith(ACK_PREFIXES['STOP']):
+            direct.append(time.perf_counter() - start)
+    controller.disconnect()
+
+    dispatcher = ArduinoDispatcher(ArduinoController())
+    dispatcher.controller.port = emulator.port
+    dispatcher.start()
+    for i in range(count):
+        dispatcher.stop_auto_mode()
+        wait_for(lambda: dispatcher.acked > i, 5.0)
+    latencies = list(dispatcher.latencies)
+    dispatcher.stop()
+    return {
+        'direct': summarize(direct) if direct else None,
+        # The first command also waits for the port to open and the board to boot
+        'dispatcher_first_ms': round(latencies[0] * 1000, 1) if latencies else None,
+        'dispatcher': summarize(latencies[1:]) if len(latencies) > 1 else None,
+    }
+
+
+def burst(emulator, rate, seconds):
+    interval = 1.0 / rate
+    settle = emulator.sweep_seconds + 1.0
+
+    # Every trigger written straight to the port
+    controller = open_controller(emulator.port)
+    before = emulator.stats()
+    acks = 0
+    start = time.perf_counter()
+    for i in range(int(rate * seconds)):
+        wait = start + i * interval - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        controller.send_command('TRIGGER')
+    controller.connection.timeout = 0.1
+    deadline = time.monotonic() + settle + seconds
+    while time.monotonic() < deadline:
+        line = controller.connection.readline().decode(errors='replace')
+        acks += line.startswith(ACK_PREFIXES['TRIGGER'])
+    controller.disconnect()
+    after = emulator.stats()
+    direct = {
+        'written': int(rate * seconds),
+        'acknowledged': acks,
+        'sweeps': after['sweeps'] - before['sweeps'],
+        'discarded_mid_sweep': after['discarded'] - before['discarded'],
+    }
+
+    # The same triggers through the dispatcher
+    dispatcher = ArduinoDispatcher(ArduinoController())
+    dispatcher.controller.port = emulator.port
+    dispatcher.start()
+    dispatcher.stop_auto_mode()  # opens the port and waits for the board first
+    wait_for(lambda: dispatcher.acked, 5.0)
+    before = emulator.stats()
+    submit_times = []
+    max_depth = 0
+    start = time.perf_counter()
+    for i in range(int(rate * seconds)):
+        wait = start + i * interval - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        t = time.perf_counter()
+        dispatcher.trigger()
+        submit_times.append(time.perf_counter() - t)
+        max_depth = max(max_depth, dispatcher.queue.qsize())
+    time.sleep(settle)
+    stats = dispatcher.stats()
+    dispatcher.stop()
+    after = emulator.stats()
+    return {
+        'rate': rate,
+        'seconds': seconds,
+        'direct': direct,
+        'dispatcher': {
+            'submitted': len(submit_times),
+            'sent': stats['sent'] - 1,
+            'coalesced': stats['coalesced'],
+            'cooldown': stats['cooldown'],
+            'dropped': stats['dropped'],
+            'acknowledged': stats['acked'] - 1,
+            'unacknowledged': stats['unacknowledged'],
+            'sweeps': after['sweeps'] - before['sweeps'],
+            'discarded_mid_sweep': after['discarded'] - before['discarded'],
+            'max_queue_depth': max_depth,
+            'submit': summarize(submit_times),
+        },
+    }
+
+
+def reconnect(emulator, downtime, reconnect_max):
+    dispatcher = ArduinoDispatcher(ArduinoController(), reconnect_max=reconnect_max)
+    dispatcher.controller.port = emulator.port
+    dispatcher.start()
+    dispatcher.stop_auto_mode()
+    if not wait_for(lambda: dispatcher.acked, 5.0):
+        raise RuntimeError("The dispatcher never reached the emulator")
+
+    def submit_until(condition, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not condition():
+            dispatcher.stop_auto_mode()
+            time.sleep(0.05)
+        return condition()
+
+    killed = time.monotonic()
+    emulator.stop()
+    submit_until(lambda: not dispatcher.connected, 10.0)
+    noticed = time.monotonic() - killed
+    failures_before = dispatcher.connect_failures
+    submit_until(lambda: False, max(downtime - noticed, 0.0))
+
+    acked = dispatcher.acked
+    emulator.start()
+    restarted = time.monotonic()
+    recovered = submit_until(lambda: dispatcher.acked > acked, 30.0 + reconnect_max)
+    recovery = time.monotonic() - restarted
+    stats = dispatcher.stats()
+    dispatcher.stop()
+    return {
+        'downtime_seconds': downtime,
+        'loss_noticed_seconds': round(noticed, 3),
+        'failed_connects_while_down': stats['connect_failures'] - failures_before,
+        'dropped_while_down': stats['dropped'],
+        'recovered': recovered,
+        # Includes the board's boot delay after the port is opened again
+        'recovery_seconds': round(recovery, 3) if recovered else None,
+        'boot_delay_seconds': emulator.boot_delay,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', default=['roundtrip', 'burst', 'reconnect'],
+                        choices=['roundtrip', 'burst', 'reconnect'])
+    parser.add_argument('--count', type=int, default=50, help='Commands timed in the roundtrip scenario')
+    parser.add_argument('--burst-rate', type=float, default=15, help='TRIGGERs per second in the burst scenario')
+    parser.add_argument('--burst-seconds', type=float, default=5, help='Length of the burst')
+    parser.add_argument('--downtime', type=float, default=3, help='Seconds the emulator is down (reconnect)')
+    parser.add_argument('--reconnect-max', type=float, default=2, help='Dispatcher backoff cap for the reconnect run')
+    parser.add_argument('--boot-delay', type=float, default=1.5, help='Emulated board boot time after opening the port')
+    parser.add_argument('--output', help='Write the results as JSON to this path')
+    args = parser.parse_args()
+
+    link = os.path.join(tempfile.mkdtemp(prefix='arduino-emulator-'), 'tty')
+    emulator = ArduinoEmulator(link, boot_delay=args.boot_delay).start()
+    print(f"Emulator on {emulator.port} (sweep {emulator.sweep_seconds:.2f} s, boot {args.boot_delay} s)")
+
+    results = {}
+    try:
+        if 'roundtrip' in args.scenarios:
+            results['roundtrip'] = roundtrip(emulator, args.count)
+            direct, dispatched = results['roundtrip']['direct'], results['roundtrip']['dispatcher']
+            print("\nroundtrip (STOP -> acknowledgement)")
+            for label, summary in (('direct', direct), ('dispatcher', dispatched)):
+                if summary:
+                    print(f"  {label:<11} p50 {summary['p50_ms']:.1f} ms  p95 {summary['p95_ms']:.1f} ms  "
+                          f"max {summary['max_ms']:.1f} ms")
+            print(f"  first dispatched command (port open + boot): {results['roundtrip']['dispatcher_first_ms']} ms")
+
+        if 'burst' in args.scenarios:
+            results['burst'] = burst(emulator, args.burst_rate, args.burst_seconds)
+            print(f"\nburst ({args.burst_rate:g} TRIGGER/s for {args.burst_seconds:g} s)")
+            for label in ('direct', 'dispatcher'):
+                print(f"  {label:<11} " + ', '.join(f"{key}={value}" for key, value in results['burst'][label].items()
+                                                    if not isinstance(value, dict)))
+            submit = results['burst']['dispatcher']['submit']
+            print(f"  submit() p50 {submit['p50_ms'] * 1000:.1f} us, max {submit['max_ms'] * 1000:.1f} us")
+
+        if 'reconnect' in args.scenarios:
+            results['reconnect'] = reconnect(emulator, args.downtime, args.reconnect_max)
+            print("\nreconnect")
+            for key, value in results['reconnect'].items():
+                print(f"  {key}: {value}")
+    finally:
+        emulator.stop()
+        if os.path.islink(link):
+            os.remove(link)
+        os.rmdir(os.path.dirname(link))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
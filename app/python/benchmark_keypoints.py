@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for keypoint extraction and landmark serialization.
+
+Compares the original per-attribute list comprehensions (extract + serialize
+walking the landmarks twice) with the single-pass float32 extraction in
+keypoints.py. Uses synthetic MediaPipe results, so no camera or model is needed.
+
+Also reports the /process_frame landmark payload size and encode time for
+each landmark_codec.py encoding (JSON, float16, uint16, uint16 delta).
+
+Usage: python benchmark_keypoints.py [--frames 2000]
+"""
+
+import argparse
+import itertools
+import json
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from keypoints import LANDMARK_GROUPS, extract_keypoints, serialize_landmarks
+from landmark_codec import DeltaState, encode_landmarks, parse_landmark_format
+
+
+def make_landmark_list(count, rng):
+    """Build a landmark list shaped like MediaPipe's NormalizedLandmarkList"""
+    try:
+        from mediapipe.framework.formats import landmark_pb2
+        landmark_list = landmark_pb2.NormalizedLandmarkList()
+        for _ in range(count):
+            x, y, z, v = rng.random(4)
+            landmark_list.landmark.add(x=x, y=y, z=z, visibility=v)
+        return landmark_list
+    except ImportError:
+        return SimpleNamespace(landmark=[
+            SimpleNamespace(x=float(x), y=float(y), z=float(z), visibility=float(v))
+            for x, y, z, v in rng.random((count, 4))
+        ])
+
+
+def make_results(rng):
+    """Synthetic Holistic results with every landmark group detected"""
+    return SimpleNamespace(**{attr: make_landmark_list(count, rng) for _, attr, count, _ in LANDMARK_GROUPS})
+
+
+def legacy_extract_keypoints(results):
+    pose = np.array([[res.x, res.y, res.z, res.visibility]
+                    for res in results.pose_landmarks.landmark]).flatten() if results.pose_landmarks else np.zeros(33*4)
+    face = np.array([[res.x, res.y, res.z]
+                    for res in results.face_landmarks.landmark]).flatten() if results.face_landmarks else np.zeros(468*3)
+    lh = np.array([[res.x, res.y, res.z]
+                  for res in results.left_hand_landmarks.landmark]).flatten() if results.left_hand_landmarks else np.zeros(21*3)
+    rh = np.array([[res.x, res.y, res.z]
+                  for res in results.right_hand_landmarks.landmark]).flatten() if results.right_hand_landmarks else np.zeros(21*3)
+    return np.concatenate([pose, face, lh, rh])
+
+
+def legacy_serialize_landmarks(results):
+    landmarks = {}
+    if results.pose_landmarks:
+        landmarks['pose'] = [[lm.x, lm.y, lm.z, lm.visibility] for lm in results.pose_landmarks.landmark]
+    if results.face_landmarks:
+        landmarks['face'] = [[lm.x, lm.y, lm.z] for lm in results.face_landmarks.landmark]
+    if results.left_hand_landmarks:
+        landmarks['left_hand'] = [[lm.x, lm.y, lm.z] for lm in results.left_hand_landmarks.landmark]
+    if results.right_hand_landmarks:
+        landmarks['right_hand'] = [[lm.x, lm.y, lm.z] for lm in results.right_hand_landmarks.landmark]
+    return landmarks
+
+
+def time_per_frame(fn, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=2000, help='Frames to time per variant')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = make_results(rng)
+    out = np.zeros(sum(count * width for _, _, count, width in LANDMARK_GROUPS), dtype=np.float32)
+
+    # Same feature layout and values as the notebook's extract_keypoints
+    legacy = legacy_extract_keypoints(results)
+    current = extract_keypoints(results, out)
+    assert legacy.shape == current.shape
+    assert np.array_equal(legacy.astype(np.float32), current)
+    assert legacy_serialize_landmarks(results) == serialize_landmarks(results, current)
+
+    def legacy_frame():
+        legacy_extract_keypoints(results)
+        legacy_serialize_landmarks(results)
+
+    def current_frame():
+        keypoints = extract_keypoints(results, out)
+        serialize_landmarks(results, keypoints)
+
+    print("="*60)
+    print(f"Keypoint extraction + serialization ({args.frames} frames)")
+    print("="*60)
+    rows = [
+        ('extract (legacy)', lambda: legacy_extract_keypoints(results)),
+        ('extract (single pass)', lambda: extract_keypoints(results, out)),
+        ('serialize (legacy)', lambda: legacy_serialize_landmarks(results)),
+        ('serialize (from buffer)', lambda: serialize_landmarks(results, out)),
+        ('per frame (legacy)', legacy_frame),
+        ('per frame (single pass)', current_frame),
+    ]
+    timings = {}
+    for name, fn in rows:
+        timings[name] = time_per_frame(fn, args.frames)
+        print(f"  {name:<26} {timings[name]:8.1f} us")
+
+    speedup = timings['per frame (legacy)'] / timings['per frame (single pass)']
+    print(f"\nPer-frame speedup: {speedup:.2f}x")
+
+    # Consecutive frames differ slightly, like a person sitting in front of the camera
+    frames = [out, out + rng.normal(0, 0.002, out.shape).astype(np.float32)]
+
+    print()
+    print("="*60)
+    print("Landmark payload (all groups, encoded + json.dumps)")
+    print("="*60)
+    for name, options in [
+        ('json', {}),
+        ('float16', {'encoding': 'float16'}),
+        ('uint16', {'encoding': 'uint16'}),
+        ('uint16 delta', {'encoding': 'uint16', 'delta': True}),
+    ]:
+        fmt = parse_landmark_format(**options)
+        delta_state = DeltaState()
+        sizes = []
+        counter = itertools.count()
+
+        def encode_frame():
+            keypoints = frames[next(counter) % 2]
+            sizes.append(len(json.dumps(encode_landmarks(results, keypoints, fmt, delta_state))))
+
+        elapsed = time_per_frame(encode_frame, args.frames)
+        print(f"  {name:<26} {elapsed:8.1f} us  {np.mean(sizes) / 1024:7.1f} KB/frame")
+
+
+if __name__ == '__main__':
+    main()
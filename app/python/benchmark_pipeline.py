@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the full frame pipeline: JPEG decode -> color conversion
+-> MediaPipe Holistic -> keypoint extraction -> LSTM -> landmark serialization.
+
+Frames come from a directory of recorded JPEG/PNG files (--frames-dir), a
+video (--video), or are generated (default): moving shapes on a 640x480
+canvas, JPEG-encoded so decoding is realistic. Every frame goes through
+ModelProcessor.process_bytes (motion gate, decode, process_image), and the
+per-stage timings are the ones the bridge records for /metrics. When MediaPipe is not installed (or with
+--synthetic-landmarks), Holistic is replaced by a stub that returns
+synthetic landmarks, so the model and serialization stages still run.
+
+With --streams N, N threads each send their own stream's frames at the
+same time (frames/sec is then the total); --detection-processes runs
+MediaPipe in that many worker processes (see detection_pool.py), which is
+what lets several streams use more than one core.
+
+Reports p50/p95/p99/mean/max per stage and end to end, frames/sec and peak
+RSS as JSON. With --baseline, compares against a stored report and exits
+with status 1 if any stage's p95, the end-to-end p50/p95 or the frame rate
+regressed by more than --tolerance.
+
+Usage: python benchmark_pipeline.py [--frames-dir DIR | --video FILE] [--frames 300]
+                                    [--output result.json] [--baseline baseline.json]
+                                    [--save-baseline baseline.json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from config import (
+    INFERENCE_BACKEND, INFERENCE_MODE, SEQUENCE_LENGTH, MOTION_GATE_ENABLED, ROI_ENABLED, DETECTION_PROCESSES
+)
+from metrics import metrics, resident_memory_bytes
+
+# Stages reported, in pipeline order ('frame' is end to end)
+REPORT_STAGES = ('motion_gate', 'imdecode', 'roi_crop', 'color_convert', 'mediapipe', 'extract_keypoints', 'predict', 'serialize', 'frame')
+
+
+def recorded_frames(frames_dir, limit):
+    """JPEG/PNG bytes from a directory, in file name order (looped up to `limit`)"""
+    paths = sorted(p for ext in ('*.jpg', '*.jpeg', '*.png') for p in glob.glob(os.path.join(frames_dir, ext)))
+    if not paths:
+        raise SystemExit(f"No .jpg/.jpeg/.png frames found in {frames_dir}")
+    frames = []
+    for path in paths[:limit]:
+        with open(path, 'rb') as f:
+            frames.append(f.read())
+    return frames
+
+
+def video_frames(path, limit, quality):
+    """Frames of a video, re-encoded as JPEG like the camera preview sends them"""
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise SystemExit(f"Could not open video {path}")
+    frames = []
+    while len(frames) < limit:
+        ok, image = capture.read()
+        if not ok:
+            break
+        frames.append(cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes())
+    capture.release()
+    if not frames:
+        raise SystemExit(f"No frames could be read from {path}")
+    return frames
+
+
+def synthetic_frames(count, width, height, quality, seed=0):
+    """JPEG frames of a slowly moving scene (a few distinct frames, cycled)"""
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (31, 31), 0)
+    frames = []
+    for i in range(min(count, 60)):
+        image = background.copy()
+        x = int(width / 2 + width / 4 * np.sin(i / 10))
+        cv2.circle(image, (x, height // 2), height // 6, (200, 170, 150), -1)
+        cv2.rectangle(image, (x - 40, height // 2 + 60), (x + 40, height - 20), (60, 60, 160), -1)
+        frames.append(cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes())
+    return frames
+
+
+class SyntheticHolistic:
+    """Stand-in for mp_holistic.Holistic that returns synthetic landmark results"""
+
+    def __init__(self, count=8, seed=0):
+        from benchmark_keypoints import make_results
+        rng = np.random.default_rng(seed)
+        self.results = [make_results(rng) for _ in range(count)]
+        self.calls = 0
+
+    def process(self, image):
+        self.calls += 1
+        return self.results[self.calls % len(self.results)]
+
+
+def peak_memory_bytes():
+    """Peak RSS of this process so far (None if unavailable)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def summarize(seconds):
+    values = np.asarray(seconds) * 1000
+    return {
+        'count': int(values.size),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'mean_ms': round(float(values.mean()), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+def run(processor, frames, count, warmup, streams=1):
+    """Process `count` frames (cycling through `frames`, split over `streams`
+    concurrent streams) after `warmup` untimed ones per stream
+    """
+    states = [processor.new_state() for _ in range(streams)]
+
+    for state in states:
+        for i in range(warmup):
+            processor.process_bytes(frames[i % len(frames)], state=state)
+
+    def send(state, frame_count):
+        for i in range(frame_count):
+            with metrics.stage('frame'):
+                processor.process_bytes(frames[i % len(frames)], state=state)
+
+    threads = [threading.Thread(target=send, args=(state, count // streams + (n < count % streams)))
+               for n, state in enumerate(states)]
+    metrics.start_recording()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    samples = metrics.stop_recording()
+
+    motion_hit_rate = round(float(np.mean([state.motion.hit_rate for state in states])), 4)
+    roi_crop_rate = round(float(np.mean([state.roi.crop_rate for state in states])), 4)
+    return elapsed, samples, motion_hit_rate, roi_crop_rate
+
+
+def compare(report, baseline, tolerance, min_delta_ms):
+    """List of human-readable regressions of `report` against `baseline`.
+
+    Latencies must also have grown by at least `min_delta_ms`, so noise in
+    sub-millisecond stages doesn't count as a regression.
+    """
+    regressions = []
+
+    def check(label, current, previous, higher_is_worse=True):
+        if current is None or not previous:
+            return
+        change = (current - previous) / previous
+        if higher_is_worse:
+            regressed = change > tolerance and current - previous >= min_delta_ms
+        else:
+            regressed = change < -tolerance
+        if regressed:
+            regressions.append(f"{label}: {previous:.3f} -> {current:.3f} ({change:+.1%})")
+
+    for stage, stats in report['stages'].items():
+        previous = baseline.get('stages', {}).get(stage)
+        if previous:
+            check(f"{stage} p95 ms", stats['p95_ms'], previous['p95_ms'])
+            if stage == 'frame':
+                check("frame p50 ms", stats['p50_ms'], previous['p50_ms'])
+    check("frames/sec", report['fps'], baseline.get('fps'), higher_is_worse=False)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--frames-dir', help='Directory of recorded JPEG/PNG frames')
+    source.add_argument('--video', help='Video file to replay')
+    parser.add_argument('--frames', type=int, default=300, help='Frames to time (recordings are looped)')
+    parser.add_argument('--warmup', type=int, default=SEQUENCE_LENGTH,
+                        help='Untimed frames first (default fills the LSTM window)')
+    parser.add_argument('--width', type=int, default=640, help='Synthetic frame width')
+    parser.add_argument('--height', type=int, default=480, help='Synthetic frame height')
+    parser.add_argument('--quality', type=int, default=80, help='JPEG quality for synthetic/video frames')
+    parser.add_argument('--streams', type=int, default=1, help='Concurrent streams the frames are split over')
+    parser.add_argument('--detection-processes', type=int, default=DETECTION_PROCESSES,
+                        help='Run MediaPipe in this many worker processes (0 = in this process)')
+    parser.add_argument('--synthetic-landmarks', action='store_true',
+                        help='Replace MediaPipe with synthetic landmarks without loading it')
+    parser.add_argument('--output', help='Write the JSON report to this path (default: stdout only)')
+    parser.add_argument('--baseline', help='Compare against this report and exit 1 on regressions')
+    parser.add_argument('--save-baseline', help='Also write the report to this path as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression (0.2 = 20%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.25,
+                        help='Ignore latency increases smaller than this')
+    args = parser.parse_args()
+
+    if args.frames_dir:
+        frames, source_name = recorded_frames(args.frames_dir, args.frames), args.frames_dir
+    elif args.video:
+        frames, source_name = video_frames(args.video, args.frames, args.quality), args.video
+    else:
+        frames = synthetic_frames(args.frames, args.width, args.height, args.quality)
+        source_name = f'synthetic {args.width}x{args.height}'
+
+    if args.synthetic_landmarks:
+        # Don't load MediaPipe at all (ModelProcessor then skips Holistic)
+        sys.modules['mediapipe'] = None
+
+    from bridge_logging import setup_logging
+    from model_processor import ModelProcessor
+    setup_logging()
+    metrics.enabled = True
+
+    processor = ModelProcessor(detection_processes=args.detection_processes)
+    if processor.backend is None:
+        raise SystemExit("Model failed to load")
+    synthetic_landmarks = args.synthetic_landmarks or not processor.can_detect
+    if synthetic_landmarks:
+        if args.detection_processes > 0:
+            processor.start_detection_pool(SyntheticHolistic)
+        else:
+            processor.holistic = SyntheticHolistic()
+    processor.warm_up()
+
+    rss_before = resident_memory_bytes()
+    elapsed, samples, motion_hit_rate, roi_crop_rate = run(processor, frames, args.frames, args.warmup, args.streams)
+
+    report = {
+        'source': source_name,
+        'distinct_frames': len(frames),
+        'frames': args.frames,
+        'synthetic_landmarks': synthetic_landmarks,
+        'backend': INFERENCE_BACKEND,
+        'feature_profile': processor.profile.name,
+        'inference_mode': INFERENCE_MODE if processor.streaming is not None else 'windowed',
+        'fps': round(args.frames / elapsed, 2),
+        'streams': args.streams,
+        'detection_processes': args.detection_processes if processor.detection_pool is not None else 0,
+        'motion_gate': MOTION_GATE_ENABLED,
+        'motion_skip_rate': motion_hit_rate,
+        'roi': ROI_ENABLED,
+        'roi_crop_rate': roi_crop_rate,
+        'stages': {stage: summarize(samples[stage]) for stage in REPORT_STAGES if samples.get(stage)},
+        'rss_bytes': resident_memory_bytes(),
+        'rss_before_bytes': rss_before,
+        'peak_rss_bytes': peak_memory_bytes(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+    }
+
+    print(f"\n{'stage':<20} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+    for stage, stats in report['stages'].items():
+        print(f"{stage:<20} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f} {stats['mean_ms']:>9.3f}")
+    if processor.detection_pool is not None:
+        report['detection_pool'] = processor.detection_pool.stats()
+        processor.detection_pool.close()
+    peak = report['peak_rss_bytes']
+    print(f"\n{report['fps']:.1f} frames/sec, peak RSS {peak / 2**20:.0f} MB" if peak else f"\n{report['fps']:.1f} frames/sec")
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        print(f"Report written to {args.output}")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            f.write(text + '\n')
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\n" + "!" * 60)
+            print(f"PERFORMANCE REGRESSION vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            print("!" * 60)
+            sys.exit(1)
+        print(f"\nNo regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
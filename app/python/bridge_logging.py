@@ -0,0 +1,179 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+from config import (
+    LOG_LEVEL, LOG_FORMAT, LOG_ASYNC, LOG_QUEUE_SIZE,
+    LOG_RATE_LIMIT, LOG_RATE_BURST, FRAME_DIAGNOSTICS
+)
+
+# Per-frame diagnostics (detected landmark groups, shapes, probabilities).
+# Off (WARNING) unless FRAME_DIAGNOSTICS is set or it is switched on at
+# runtime through POST /logging; callers log to it at DEBUG.
+frame_log = logging.getLogger('bridge.frames')
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_state = {'handler': None, 'listener': None, 'rate_filter': None}
+
+
+class StructuredFormatter(logging.Formatter):
+    """`time level logger: message key=value ...`, or one JSON object per line.
+
+    Structured fields are passed as `extra={...}` on the logging call.
+    """
+
+    def __init__(self, json_output=False):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+        self.json_output = json_output
+
+    def format(self, record):
+        fields = {k: v for k, v in vars(record).items() if k not in _RESERVED}
+        if self.json_output:
+            entry = {
+                'ts': round(record.created, 3),
+                'level': record.levelname,
+                'logger': record.name,
+                'msg': record.getMessage(),
+            }
+            entry.update(fields)
+            if record.exc_info:
+                entry['exc'] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        line = super().format(record)
+        if fields:
+            line += ' ' + ' '.join(f'{k}={v}' for k, v in fields.items())
+        return line
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per message template: at most `rate` records per second
+    (bursts of up to `burst`) for each (logger, message) pair.
+
+    Keyed on the unformatted message, so callers should pass arguments
+    %-style (`log.info("x=%s", x)`) and a suppressed record is never
+    formatted. The next record let through carries `suppressed=N`.
+    Applies to every level, so a per-frame error can't flood the console
+    either; CRITICAL records and loggers named in `exempt` are always let
+    through.
+    """
+
+    MAX_KEYS = 1024
+
+    def __init__(self, rate, burst, exempt=()):
+        super().__init__()
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.exempt = frozenset(exempt)
+        self.lock = threading.Lock()
+        self.buckets = {}  # (name, msg) -> [tokens, last_refill, suppressed]
+        self.suppressed = 0
+
+    def filter(self, record):
+        if self.rate <= 0 or record.levelno >= logging.CRITICAL or record.name in self.exempt:
+            return True
+
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) >= self.MAX_KEYS:
+                    self.buckets.clear()
+                bucket = self.buckets[key] = [self.burst, now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] < 1:
+                bucket[2] += 1
+                self.suppressed += 1
+                return False
+
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level=LOG_LEVEL, fmt=LOG_FORMAT, async_queue=LOG_ASYNC):
+    """Configure the root logger for the bridge (idempotent).
+
+    Records are rate limited, then either written directly to stdout or,
+    with `async_queue`, handed to a background thread through a bounded
+    queue so request threads never wait on console I/O.
+    """
+    if _state['handler'] is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(StructuredFormatter(json_output=(fmt == 'json')))
+
+    # Frame diagnostics are meant to show every frame once switched on
+    rate_filter = RateLimitFilter(LOG_RATE_LIMIT, LOG_RATE_BURST, exempt=(frame_log.name,))
+    if async_queue:
+        handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        listener = logging.handlers.QueueListener(handler.queue, stream_handler)
+        listener.start()
+        atexit.register(listener.stop)
+        _state['listener'] = listener
+    else:
+        handler = stream_handler
+    handler.addFilter(rate_filter)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+    set_frame_diagnostics(FRAME_DIAGNOSTICS)
+
+    _state['handler'] = handler
+    _state['rate_filter'] = rate_filter
+
+
+def set_frame_diagnostics(enabled):
+    frame_log.setLevel(logging.DEBUG if enabled else logging.WARNING)
+
+
+def set_level(level):
+    """Set the root log level by name, raising ValueError if it is unknown"""
+    level = str(level).upper()
+    if level not in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'):
+        raise ValueError(f"Unknown log level: {level}")
+    logging.getLogger().setLevel(level)
+
+
+def logging_status():
+    handler = _state['handler']
+    rate_filter = _state['rate_filter']
+    return {
+        'level': logging.getLevelName(logging.getLogger().level),
+        'frame_diagnostics': frame_log.isEnabledFor(logging.DEBUG),
+        'format': LOG_FORMAT,
+        'async': _state['listener'] is not None,
+        'queue_depth': handler.queue.qsize() if isinstance(handler, DroppingQueueHandler) else 0,
+        'dropped': handler.dropped if isinstance(handler, DroppingQueueHandler) else 0,
+        'rate_limit_per_second': LOG_RATE_LIMIT,
+        'suppressed': rate_filter.suppressed if rate_filter else 0,
+    }
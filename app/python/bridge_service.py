@@ -1,151 +1,513 @@
 import os
 import sys
-import base64
+import threading
 import numpy as np
+import cv2
 import logging
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from model_processor import ModelProcessor
 from arduino_controller import ArduinoController
-from config import DEFAULT_PROBABILITY_THRESHOLD, ARDUINO_TRIGGER_THRESHOLD, SERVER_PORT, SEQUENCE_LENGTH, KEYPOINT_DIM, ACTIONS
+from arduino_dispatcher import ArduinoDispatcher
+from frame_codec import data_url_bytes, decode_frame_bytes
+from stream_server import StreamServer
+from frame_pipeline import FramePipeline
+from session_store import SessionStore, DEFAULT_SESSION_ID
+from readiness import Readiness
+from processor_pool import ProcessorPool
+from landmark_codec import DEFAULT_FORMAT, parse_landmark_format
+from metrics import metrics, resident_memory_bytes
+from motion_gate import totals as motion_totals
+from event_hub import EventHub
+from bridge_logging import frame_log, setup_logging, set_frame_diagnostics, set_level, logging_status
+from config import (
+    DEFAULT_PROBABILITY_THRESHOLD, SERVER_HOST, SERVER_PORT, STREAM_PORT,
+    SEQUENCE_LENGTH, ACTIONS,
+    PIPELINE_ENABLED, PIPELINE_QUEUE_SIZE, PIPELINE_DROP_POLICY, PIPELINE_RESULT_WAIT, PIPELINE_WORKERS,
+    SESSION_TTL_SECONDS, SESSION_MAX_MEMORY_MB, STUB_MODEL, MOTION_GATE_ENABLED,
+    PROCESSOR_WORKERS, SERVER_MODE, SERVER_THREADS
+)
 
 app = Flask(__name__)
 CORS(app)
 
+setup_logging()
+log = logging.getLogger('bridge')
+
 # Disable Flask/Werkzeug logging
-log = logging.getLogger('werkzeug')
-log.setLevel(logging.ERROR)
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
 
-# Initialize components
+# Initialize components (processor is only set once the model is loaded and warmed up)
+readiness = Readiness()
 processor = None
+processors = None  # ProcessorPool; `processor` is its primary worker
 arduino = None
+stream_server = None
+event_hub = EventHub()
+pipeline = None
+sessions = None
 current_threshold = DEFAULT_PROBABILITY_THRESHOLD
 
 
 def init_components():
-    global processor, arduino
+    """Load the model, MediaPipe and Arduino on a background thread so the server can bind right away"""
+    thread = threading.Thread(target=_load_components, name='component-loader', daemon=True)
+    thread.start()
+    return thread
+
+
+def _load_components():
+    global processor, processors, arduino, pipeline, sessions
     try:
-        processor = ModelProcessor()
-        arduino = ArduinoController()
-        print("Components initialized successfully")
+        # Commands go through a background dispatcher so frames never wait on the serial port
+        arduino = ArduinoDispatcher(ArduinoController())
+        arduino.start()
+
+        readiness.advance('loading')
+        # Imports TensorFlow/MediaPipe, so it is deferred until now
+        if STUB_MODEL:
+            from stub_model import StubProcessor as ModelProcessor
+        else:
+            from model_processor import ModelProcessor
+        model = ModelProcessor()
+        # More workers with their own MediaPipe graph, sharing the model (not
+        # needed when detection already runs in separate processes)
+        pool = ProcessorPool(model, 1 if model.detection_pool is not None else PROCESSOR_WORKERS)
+
+        readiness.advance('warming')
+        warmup_ms = pool.warm_up()
+
+        sessions = SessionStore(model.new_state, SESSION_TTL_SECONDS,
+                                SESSION_MAX_MEMORY_MB * 1024 * 1024, on_evict=_forget_session)
+        if PIPELINE_ENABLED:
+            pipeline = FramePipeline(_process_job, PIPELINE_QUEUE_SIZE, PIPELINE_DROP_POLICY, PIPELINE_WORKERS)
+            pipeline.start()
+        processors = pool
+        processor = model
+        readiness.advance('ready', warmup_ms=warmup_ms)
+        log.info("Components initialized successfully")
     except Exception as e:
-        print(f"Error initializing components: {e}")
+        readiness.fail(e)
+        log.error("Error initializing components: %s", e)
+
+
+def _not_ready():
+    """Error payload and status for requests that need the model before it is ready"""
+    if readiness.failed:
+        return {'success': False, 'error': f"Model processor failed to initialize: {readiness.error}"}, 500
+    return {'success': False, 'error': 'Model is still loading', 'stage': readiness.stage}, 503
 
 
 @app.route('/health', methods=['GET'])
 def health():
     return jsonify({
         'status': 'ok',
-        'model_loaded': processor is not None and processor.model is not None,
-        'arduino_connected': arduino is not None and arduino.connection is not None if arduino else False
+        'ready': readiness.ready,
+        'startup': readiness.snapshot(),
+        'model_loaded': processor is not None and processor.backend is not None,
+        'backend': processor.backend.name if processor and processor.backend else None,
+        'feature_profile': processor.profile.name if processor else None,
+        'arduino_connected': arduino.connected if arduino else False,
+        'arduino': arduino.stats() if arduino else None,
+        'stream_port': STREAM_PORT if stream_server else None,
+        'pipeline': pipeline.stats() if pipeline else None,
+        'sessions': sessions.stats() if sessions else None,
+        'motion_gate': dict(motion_totals.stats(), enabled=MOTION_GATE_ENABLED),
+        'events': event_hub.stats(),
+        'batcher': processor.batcher.stats() if processor and processor.batcher else None,
+        'processors': processors.stats() if processors else None,
+        'detection': processor.detection_pool.stats() if processor and processor.detection_pool else None
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Stage latency histograms and bridge gauges in Prometheus text format"""
+    gauges = [
+        ('bridge_ready', 'Whether the model is loaded and warmed up', int(readiness.ready)),
+        ('process_resident_memory_bytes', 'Resident memory of the bridge process', resident_memory_bytes()),
+    ]
+    counters = []
+    if pipeline:
+        stats = pipeline.stats()
+        gauges.append(('bridge_pipeline_queue_depth', 'Frames waiting in the pipeline queue', stats['queue_depth']))
+        counters += [
+            ('bridge_pipeline_submitted_total', 'Frames submitted to the pipeline', stats['submitted']),
+            ('bridge_pipeline_dropped_total', 'Frames dropped before processing', stats['dropped']),
+            ('bridge_pipeline_errors_total', 'Frames that failed in a pipeline worker', stats['errors']),
+        ]
+    if sessions:
+        gauges.append(('bridge_sessions', 'Sessions holding a sequence window', sessions.stats()['sessions']))
+    motion = motion_totals.stats()
+    counters += [
+        ('bridge_motion_gate_frames_total', 'Frames checked by the motion gate', motion['frames']),
+        ('bridge_motion_gate_skipped_total', 'Frames that reused the previous keypoints', motion['skipped']),
+        ('bridge_motion_gate_forced_total', 'Unchanged frames processed because of MOTION_MAX_SKIP', motion['forced']),
+    ]
+    if arduino:
+        stats = arduino.stats()
+        gauges.append(('bridge_arduino_connected', 'Whether the Arduino serial port is open', int(stats['connected'])))
+        if stats['mean_ack_ms'] is not None:
+            gauges.append(('bridge_arduino_ack_seconds', 'Mean time from command to Arduino acknowledgement (recent)',
+                           stats['mean_ack_ms'] / 1000))
+        counters += [
+            ('bridge_arduino_commands_sent_total', 'Commands written to the Arduino', stats['sent']),
+            ('bridge_arduino_commands_coalesced_total', 'TRIGGERs dropped while a sweep was queued or running',
+             stats['coalesced']),
+            ('bridge_arduino_commands_dropped_total', 'Commands dropped (queue full or board unreachable)',
+             stats['dropped']),
+            ('bridge_arduino_commands_acked_total', 'Commands the Arduino acknowledged', stats['acked']),
+        ]
+    detection = processor.detection_pool if processor else None
+    if detection:
+        stats = detection.stats()
+        gauges += [
+            ('bridge_detection_processes_alive', 'Detection processes running', stats['alive']),
+            ('bridge_detection_in_flight', 'Frames being detected in detection processes', stats['in_flight']),
+        ]
+        counters += [
+            ('bridge_detection_frames_total', 'Frames detected in detection processes', sum(stats['frames'])),
+            ('bridge_detection_timeouts_total', 'Frames that timed out waiting for a detection process',
+             stats['timeouts']),
+            ('bridge_detection_restarts_total', 'Detection processes restarted after exiting', stats['restarts']),
+        ]
+    body = metrics.render(gauges, counters)
+    return body, 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+def _session_id(value):
+    """Normalize a client-supplied session/stream ID"""
+    return str(value) if value else DEFAULT_SESSION_ID
+
+
+def _forget_session(session_id):
+    """Drop pipeline state and the worker assignment of a session evicted from the session store"""
+    if pipeline:
+        pipeline.forget(session_id)
+    if processors:
+        processors.forget(session_id)
+
+
+def _landmark_format(options):
+    """LandmarkFormat from the landmark_* request options (raises ValueError if invalid)"""
+    return parse_landmark_format(options.get('landmark_groups'), options.get('landmark_encoding'),
+                                 options.get('landmark_delta'))
+
+
+def _frame_result(body, threshold, session_id=DEFAULT_SESSION_ID, landmark_format=DEFAULT_FORMAT):
+    """Run a binary frame body through the model using the session's rolling state.
+
+    Returns the /process_frame response payload and HTTP status code.
+    """
+    state = sessions.get(session_id)
+    worker = processors.for_session(session_id)
+    result, status = _session_frame_result(worker, body, threshold, state, landmark_format)
+    if result.get('success'):
+        _decide(result, state, session_id)
+    result['session_id'] = session_id
+    return result, status
+
+
+def _decide(result, state, session_id):
+    """Feed a frame result to the session's decision engine; triggers the Arduino once per episode"""
+    with state.lock:
+        event = state.decision.update(result.get('probabilities'))
+        result['episode'] = state.decision.snapshot()
+    result['arduino_triggered'] = False
+    if event is None:
+        return
+
+    event['session_id'] = session_id
+    if event['event'] == 'episode_start':
+        triggered = False
+        if arduino:
+            with metrics.stage('arduino'):
+                triggered = arduino.trigger(event['action'])
+        event['arduino_triggered'] = triggered
+        result['arduino_triggered'] = triggered
+        log.info("Episode started, triggering servo sweep",
+                 extra={'session': session_id, 'action': event['action'], 'score': event['score'],
+                        'triggered': triggered})
+        if triggered:
+            _push_event({'event': 'arduino_triggered', 'action': event['action'], 'confidence': event['score'],
+                         'session_id': session_id})
+    else:
+        log.info("Episode ended",
+                 extra={'session': session_id, 'action': event['action'], 'duration': event['duration_seconds']})
+    result['event'] = event['event']
+    _push_event(event)
+
+
+def _session_frame_result(worker, body, threshold, state, landmark_format):
+    # If MediaPipe is disabled, convert the raw webcam image into a
+    # deterministic feature vector so the LSTM model can still be exercised
+    # during testing. We downsample the image to a fixed grayscale size,
+    # flatten, then truncate/pad to the model's feature width.
+    if not getattr(worker, 'can_detect', False):
+        try:
+            frame, rgb = decode_frame_bytes(body) if body is not None else (None, False)
+            if frame is None:
+                return {'success': False, 'error': 'Could not decode image'}, 400
+
+            # Convert to grayscale and resize to approx sqrt(feature width)
+            dim = worker.feature_dim
+            side = int(np.ceil(np.sqrt(dim)))
+            gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY if rgb else cv2.COLOR_BGR2GRAY)
+            small = cv2.resize(gray, (side, side), interpolation=cv2.INTER_AREA)
+            vec = small.flatten().astype(np.float32) / 255.0
+
+            # Truncate or pad to the feature width
+            if vec.size >= dim:
+                vec = vec[:dim]
+            else:
+                pad = np.zeros(dim - vec.size, dtype=np.float32)
+                vec = np.concatenate([vec, pad])
+
+            # Append to processor sequence and predict if enough frames
+            with state.lock:
+                res = worker.update_sequence(vec, state)
+                buffered = len(state.sequence)
+            if res is not None:
+                max_prob = float(np.max(res))
+                predicted_action = ACTIONS[int(np.argmax(res))]
+
+                frame_log.debug("Prediction: %s (%.2f) - Sequence length: %d", predicted_action, max_prob, buffered)
+
+                if max_prob > threshold:
+                    return {
+                        'success': True,
+                        'detected': True,
+                        'action': predicted_action,
+                        'confidence': max_prob,
+                        'probabilities': {ACTIONS[i]: float(res[i]) for i in range(len(ACTIONS))}
+                    }, 200
+                else:
+                    # Probabilities are still reported for the decision engine
+                    return {
+                        'success': True,
+                        'detected': False,
+                        'probabilities': {ACTIONS[i]: float(res[i]) for i in range(len(ACTIONS))}
+                    }, 200
+
+            # Show progress every 30 frames
+            if buffered % 30 == 0:
+                log.info("Building sequence: %d/%d frames", buffered, SEQUENCE_LENGTH)
+
+            return {'success': True, 'detected': False}, 200
+        except Exception as e:
+            return {'success': False, 'error': str(e)}, 500
+
+    # Default path: use existing processor flow (which may call MediaPipe)
+    if body is None:
+        return {'success': False, 'error': 'Could not decode image'}, 400
+    result = worker.process_bytes(body, threshold, state=state, landmark_format=landmark_format)
+
+    if result:
+        # The Arduino is triggered by the session's decision engine (see _decide)
+        return {
+            'success': True,
+            'detected': result.get('action') is not None,
+            'action': result.get('action'),
+            'confidence': result.get('confidence'),
+            'probabilities': result.get('probabilities', {}),
+            'landmarks': result.get('landmarks', {}),
+            'motion_skipped': result.get('motion_skipped', False)
+        }, 200
+    else:
+        return {
+            'success': True,
+            'detected': False,
+            'landmarks': {}
+        }, 200
+
+
+def _push_event(event):
+    """Send an event to every stream channel client and /events subscriber"""
+    if stream_server:
+        stream_server.broadcast(event)
+    event_hub.publish(event)
+
+
+def _job_bytes(kind, payload):
+    """Binary frame body of a queued frame payload (data URLs are base64-decoded), or None"""
+    try:
+        if kind == 'data_url':
+            return data_url_bytes(payload)
+        return payload
+    except Exception:
+        return None
+
+
+def _run_frame(job):
+    """Decode and run one frame job; returns the response payload and HTTP status code"""
+    kind, payload, threshold, session_id, landmark_format = job
+    with metrics.stage('frame'):
+        result = _frame_result(_job_bytes(kind, payload), threshold, session_id, landmark_format)
+    metrics.frame_done()
+    return result
+
+
+def _process_job(job):
+    """Pipeline worker: decode and run one queued frame, return the result payload"""
+    return _run_frame(job)[0]
+
+
+def _submit_frame(kind, payload, threshold, session_id, landmark_format):
+    """Queue a frame on the pipeline and return the session's latest available result payload"""
+    frame_id = pipeline.submit((kind, payload, threshold, session_id, landmark_format), key=session_id)
+    result_id, result = pipeline.latest(session_id, frame_id, PIPELINE_RESULT_WAIT)
+    if result is None:
+        # Nothing processed yet for this session
+        result = {'success': True, 'detected': False, 'landmarks': {}, 'session_id': session_id}
+    return dict(result, frame_id=result_id)
+
+
+def _stream_frame(payload, config, reply):
+    """Frame handler for the stream channel; replies with the same schema as /process_frame"""
+    if not processor:
+        reply(_not_ready()[0])
+        return
+
+    threshold = float(config.get('threshold', current_threshold))
+    session_id = _session_id(config.get('session_id'))
+    try:
+        landmark_format = _landmark_format(config)
+    except ValueError as e:
+        reply({'success': False, 'error': str(e)})
+        return
+    job = ('bytes', payload, threshold, session_id, landmark_format)
+    if pipeline:
+        pipeline.submit(job, reply, key=session_id)
+    else:
+        reply(_process_job(job))
+
+
+def start_stream_server():
+    global stream_server
+    try:
+        stream_server = StreamServer(SERVER_HOST, STREAM_PORT, _stream_frame)
+        stream_server.start()
+        log.info("Stream channel listening on %s:%d", SERVER_HOST, STREAM_PORT)
+    except Exception as e:
+        stream_server = None
+        log.error("Error starting stream channel: %s", e)
+
+
 @app.route('/process_frame', methods=['POST'])
 def process_frame():
     try:
-        data = request.json
-        frame_data = data.get('frame')
-        threshold = data.get('threshold', current_threshold)
+        with metrics.stage('parse'):
+            data = request.json
+            frame_data = data.get('frame')
+            threshold = data.get('threshold', current_threshold)
+            session_id = _session_id(data.get('session_id'))
 
-        if not frame_data:
-            return jsonify({'success': False, 'error': 'No frame data provided'}), 400
+            if not frame_data:
+                return jsonify({'success': False, 'error': 'No frame data provided'}), 400
+
+            try:
+                landmark_format = _landmark_format(data)
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
 
         if not processor:
-            return jsonify({'success': False, 'error': 'Model processor not initialized'}), 500
+            payload, status = _not_ready()
+            return jsonify(payload), status
+
+        if pipeline:
+            return jsonify(_submit_frame('data_url', frame_data, threshold, session_id, landmark_format))
+
+        # frame_data is expected to be a data URL or base64 string
+        payload, status = _run_frame(('data_url', frame_data, threshold, session_id, landmark_format))
+        return jsonify(payload), status
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/process_frame/binary', methods=['POST'])
+def process_frame_binary():
+    """Process a frame sent as the raw request body.
+
+    The body is either encoded image bytes (e.g. Content-Type: image/jpeg or
+    application/octet-stream) or a raw RGB frame prefixed with the 8-byte
+    header described in frame_codec.py. The threshold can be passed as a
+    `threshold` query parameter and the session as a `session_id` query
+    parameter or X-Session-Id header; `landmark_groups`, `landmark_encoding`
+    and `landmark_delta` query parameters select the landmark payload.
+    Responds with the same schema as /process_frame.
+    """
+    try:
+        with metrics.stage('parse'):
+            body = request.get_data(cache=False)
+            threshold = request.args.get('threshold', current_threshold, type=float)
+            session_id = _session_id(request.args.get('session_id') or request.headers.get('X-Session-Id'))
+
+            if not body:
+                return jsonify({'success': False, 'error': 'No frame data provided'}), 400
 
-        # If MediaPipe is disabled, convert the raw webcam image into a
-        # deterministic feature vector so the LSTM model can still be exercised
-        # during testing. We downsample the image to a fixed grayscale size,
-        # flatten, then truncate/pad to KEYPOINT_DIM.
-        if processor and getattr(processor, 'holistic', None) is None:
             try:
-                # frame_data is expected to be a data URL or base64 string
-                if ',' in frame_data:
-                    frame_b64 = frame_data.split(',')[1]
-                else:
-                    frame_b64 = frame_data
-
-                img_bytes = base64.b64decode(frame_b64)
-                nparr = np.frombuffer(img_bytes, np.uint8)
-                import cv2
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                if frame is None:
-                    return jsonify({'success': False, 'error': 'Could not decode image'}), 400
-
-                # Convert to grayscale and resize to approx sqrt(KEYPOINT_DIM)
-                side = int(np.ceil(np.sqrt(KEYPOINT_DIM)))
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                small = cv2.resize(gray, (side, side), interpolation=cv2.INTER_AREA)
-                vec = small.flatten().astype(np.float32) / 255.0
-
-                # Truncate or pad to KEYPOINT_DIM
-                if vec.size >= KEYPOINT_DIM:
-                    vec = vec[:KEYPOINT_DIM]
-                else:
-                    pad = np.zeros(KEYPOINT_DIM - vec.size, dtype=np.float32)
-                    vec = np.concatenate([vec, pad])
-
-                # Append to processor sequence
-                processor.sequence.append(vec)
-                processor.sequence = processor.sequence[-SEQUENCE_LENGTH:]
-
-                # If enough frames, predict
-                if len(processor.sequence) == SEQUENCE_LENGTH:
-                    res = processor.model.predict(np.expand_dims(processor.sequence, axis=0), verbose=0)[0]
-                    max_prob = float(np.max(res))
-                    predicted_action = ACTIONS[int(np.argmax(res))]
-
-                    print(f"Prediction: {predicted_action} ({max_prob:.2f}) - Sequence length: {len(processor.sequence)}")
-
-                    if max_prob > threshold:
-                        return jsonify({
-                            'success': True,
-                            'detected': True,
-                            'action': predicted_action,
-                            'confidence': max_prob,
-                            'probabilities': {ACTIONS[i]: float(res[i]) for i in range(len(ACTIONS))}
-                        })
-                    else:
-                        return jsonify({'success': True, 'detected': False})
-
-                # Show progress every 30 frames
-                if len(processor.sequence) % 30 == 0:
-                    print(f"Building sequence: {len(processor.sequence)}/{SEQUENCE_LENGTH} frames")
-
-                return jsonify({'success': True, 'detected': False})
-            except Exception as e:
-                return jsonify({'success': False, 'error': str(e)}), 500
-
-        # Default path: use existing processor flow (which may call MediaPipe)
-        result = processor.process_frame(frame_data, threshold)
-
-        if result:
-            # Trigger Arduino servo if doomscrolling detected with high confidence
-            arduino_triggered = False
-            if arduino and result.get('action') and result['action'].lower() == 'doomscrolling':
-                confidence = result.get('confidence', 0.0)
-                if confidence >= ARDUINO_TRIGGER_THRESHOLD:
-                    arduino_triggered = arduino.trigger('doomscrolling')
-                    print(f"Doomscrolling detected with {confidence:.2f} confidence! Triggering servo sweep.")
-                else:
-                    print(f"Doomscrolling detected but confidence {confidence:.2f} below Arduino threshold {ARDUINO_TRIGGER_THRESHOLD}")
-
-            return jsonify({
-                'success': True,
-                'detected': result.get('action') is not None,
-                'action': result.get('action'),
-                'confidence': result.get('confidence'),
-                'probabilities': result.get('probabilities', {}),
-                'landmarks': result.get('landmarks', {}),
-                'arduino_triggered': arduino_triggered
-            })
-        else:
-            return jsonify({
-                'success': True,
-                'detected': False,
-                'landmarks': {}
-            })
+                landmark_format = _landmark_format(request.args)
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+
+        if not processor:
+            payload, status = _not_ready()
+            return jsonify(payload), status
+
+        if pipeline:
+            return jsonify(_submit_frame('bytes', body, threshold, session_id, landmark_format))
+
+        payload, status = _run_frame(('bytes', body, threshold, session_id, landmark_format))
+        return jsonify(payload), status
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/events', methods=['GET'])
+def events():
+    """Server-Sent Events stream of episode and Arduino events (optionally for one ?session_id=)"""
+    session_id = request.args.get('session_id')
+    subscriber = event_hub.subscribe()
+    if subscriber is None:
+        # Each open stream holds a server thread; don't let them starve frame requests
+        return jsonify({'success': False, 'error': f"Too many /events subscribers "
+                                                   f"(EVENT_MAX_SUBSCRIBERS={event_hub.max_subscribers})"}), 503
+    response = Response(event_hub.stream(subscriber, session_id), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Frees the slot even if the client goes away before the stream starts
+    response.call_on_close(lambda: event_hub.unsubscribe(subscriber))
+    return response
+
+
+@app.route('/sessions', methods=['GET'])
+def list_sessions():
+    """List the sessions that currently hold a rolling sequence window"""
+    if not sessions:
+        payload, status = _not_ready()
+        return jsonify(payload), status
+
+    return jsonify(dict(sessions.stats(), success=True, session_list=sessions.list()))
+
+
+@app.route('/sessions/reset', methods=['POST'])
+def reset_sessions():
+    """Clear the sequence window of one session, or of all sessions.
+
+    Request JSON: {"session_id": "desk-1"} (omit session_id to reset all)
+    """
+    try:
+        if not sessions:
+            payload, status = _not_ready()
+            return jsonify(payload), status
+
+        data = request.get_json(silent=True) or {}
+        reset = sessions.reset(data.get('session_id'))
+        # Close episodes the reset cut short, so /events subscribers see them end
+        for session_id, event in reset.items():
+            if event is not None:
+                event['session_id'] = session_id
+                log.info("Episode ended by a session reset", extra={'session': session_id, 'action': event['action']})
+                _push_event(event)
+        return jsonify({'success': True, 'reset': len(reset)})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -233,6 +595,26 @@ def feed_flag():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/logging', methods=['GET', 'POST'])
+def logging_settings():
+    """Show or change logging at runtime.
+
+    Request JSON: {"level": "DEBUG", "frame_diagnostics": true} (both optional)
+    """
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            if 'level' in data:
+                set_level(data['level'])
+            if 'frame_diagnostics' in data:
+                set_frame_diagnostics(bool(data['frame_diagnostics']))
+        return jsonify(dict(logging_status(), success=True))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/set_threshold', methods=['POST'])
 def set_threshold():
     global current_threshold
@@ -245,8 +627,29 @@ def set_threshold():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-if __name__ == '__main__':
-    print("Initializing WetReminder Python Bridge Service...")
+def start():
+    """Start loading components and the stream channel (also used by wsgi.py)"""
+    log.info("Initializing WetReminder Python Bridge Service...")
+    # The model loads in the background; /health reports progress until it is ready
     init_components()
-    print(f"Starting server on http://localhost:{SERVER_PORT}")
-    app.run(host='localhost', port=SERVER_PORT, debug=False)
+    start_stream_server()
+
+
+def serve():
+    """Serve HTTP in the configured SERVER_MODE until interrupted"""
+    if SERVER_MODE == 'production':
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            log.warning("waitress is not installed (pip install waitress), using the development server")
+        else:
+            log.info("Starting production server on http://%s:%d (%d threads)", SERVER_HOST, SERVER_PORT, SERVER_THREADS)
+            waitress_serve(app, host=SERVER_HOST, port=SERVER_PORT, threads=SERVER_THREADS)
+            return
+    log.info("Starting server on http://localhost:%d", SERVER_PORT)
+    app.run(host='localhost', port=SERVER_PORT, debug=False, threaded=True)
+
+
+if __name__ == '__main__':
+    start()
+    serve()
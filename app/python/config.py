@@ -7,6 +7,15 @@ MODEL_PATH = os.path.join(os.path.dirname(__file__), 'action.h5')
 # Keep this aligned with the model that lives at `action.h5`.
 ACTIONS = ['doomscrolling', 'nothing']
 
+# Inference backend for windowed predictions: 'keras' (action.h5), 'tflite' or 'onnx'.
+# Create the TFLite/ONNX files with `python convert_model.py`.
+INFERENCE_BACKEND = 'keras'
+TFLITE_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'action.tflite')
+ONNX_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'action.onnx')
+# LSTM/Dense weights for streaming mode with the TFLite/ONNX backends (written
+# by convert_model.py), so they don't need TensorFlow to load action.h5
+STREAMING_WEIGHTS_PATH = os.path.join(os.path.dirname(__file__), 'action.npz')
+
 # MediaPipe configuration
 MEDIAPIPE_MIN_DETECTION_CONFIDENCE = 0.5
 MEDIAPIPE_MIN_TRACKING_CONFIDENCE = 0.5
@@ -17,16 +26,221 @@ MEDIAPIPE_MIN_TRACKING_CONFIDENCE = 0.5
 SEQUENCE_LENGTH = 150
 KEYPOINT_DIM = 1662
 
+# Feature profile (see feature_profiles.py): which keypoints the LSTM takes.
+# - 'full': all 1662 values, Holistic (action.h5)
+# - 'pose_hands': pose + hands, 258 values; runs MediaPipe Pose + Hands only
+# - 'pose_hands_face': pose + hands + 11 face mesh anchors, 291 values
+# Reduced profiles load action.<profile>.h5 (.tflite/.onnx), trained with
+# `python train_model.py --profiles <profile>`.
+FEATURE_PROFILE = 'full'
+# Whether camera frames reach the bridge mirrored (selfie view); only used to
+# map MediaPipe Hands handedness to left/right hand in the 'pose_hands' profile
+HANDS_INPUT_MIRRORED = False
+
+# Performance profile: 'baseline' (the default) runs MediaPipe on every full
+# frame and the LSTM over the whole window, like the training notebook. 'fast'
+# (BRIDGE_PROFILE=fast) turns on the optimisations that approximate that or
+# change what clients see: streaming inference, the motion gate, ROI cropping
+# and the cap on /events subscribers. Each setting can still be changed below.
+PERFORMANCE_PROFILE = os.environ.get('BRIDGE_PROFILE', 'baseline')
+_FAST = PERFORMANCE_PROFILE == 'fast'
+
+# Inference mode ('streaming' in the 'fast' profile):
+# - 'windowed' re-runs the LSTM over the whole SEQUENCE_LENGTH window every frame
+# - 'streaming' carries the LSTM state forward and advances it one frame at a time
+#   (with the TFLite/ONNX backends it needs STREAMING_WEIGHTS_PATH, and falls
+#   back to 'windowed' without it)
+INFERENCE_MODE = 'streaming' if _FAST else 'windowed'
+# In streaming mode, replay the current window from a zero state after this
+# many frames so the output never drifts far from the windowed model.
+STREAMING_RESYNC_INTERVAL = 30
+# Max abs difference from the inference backend allowed when validating the
+# streaming network at load time (falls back to 'windowed' if exceeded).
+STREAMING_TOLERANCE = 1e-3
+
+# Micro-batching of windowed predictions across streams: pending predictions
+# are collected for up to BATCH_MAX_WAIT_MS (or until BATCH_MAX_SIZE are
+# waiting) and run as one forward pass. Only used in 'windowed' mode.
+BATCHING_ENABLED = True
+BATCH_MAX_SIZE = 8
+BATCH_MAX_WAIT_MS = 5
+
+# Motion gate (see motion_gate.py): a frame whose downsampled grayscale image
+# barely differs from the last frame MediaPipe ran on skips decoding and
+# detection, and the previous keypoints are pushed to the window again. A
+# frame counts as changed when more than MOTION_CHANGED_FRACTION of its
+# thumbnail pixels moved by more than MOTION_PIXEL_DELTA gray levels. At most
+# MOTION_MAX_SKIP frames in a row are skipped (0 disables skipping). On in the
+# 'fast' profile.
+MOTION_GATE_ENABLED = _FAST
+MOTION_PIXEL_DELTA = 12
+MOTION_CHANGED_FRACTION = 0.01
+MOTION_MAX_SKIP = 4
+
+# Region of interest (see roi_tracker.py): MediaPipe runs on a crop around the
+# person found in the previous frame, padded by ROI_PADDING of the person's
+# size on every side and at least ROI_MIN_SIZE of the frame wide and high.
+# Landmarks are mapped back to full-frame coordinates, so the model sees the
+# same features as without cropping. The full frame is used again every
+# ROI_REDETECT_INTERVAL frames and whenever no pose was found. Every image
+# given to MediaPipe is downscaled to at most ROI_MAX_SIDE pixels per side.
+# On in the 'fast' profile.
+ROI_ENABLED = _FAST
+ROI_PADDING = 0.25
+ROI_MIN_SIZE = 0.3
+ROI_REDETECT_INTERVAL = 30
+ROI_MAX_SIDE = 640
+
+# Dummy inferences run on the model (and MediaPipe) after loading, before the
+# bridge reports ready, so the first real frame doesn't pay for graph tracing.
+WARMUP_ITERATIONS = 2
+
+# Delta-encoded landmark payloads (see landmark_codec.py) send a full
+# keyframe at least this often, so a client that missed a frame recovers.
+LANDMARK_KEYFRAME_INTERVAL = 30
+
+# Per-stage latency histograms served at /metrics (see metrics.py); when off,
+# instrumented stages cost one no-op call each.
+METRICS_ENABLED = True
+
+# Logging (see bridge_logging.py): root level, 'text' (key=value) or 'json'
+# lines, and whether records are written by a background thread through a
+# bounded queue (records are dropped rather than blocking when it is full).
+LOG_LEVEL = 'INFO'
+LOG_FORMAT = 'text'
+LOG_ASYNC = True
+LOG_QUEUE_SIZE = 1000
+# Per message template: at most LOG_RATE_LIMIT records per second, in bursts
+# of up to LOG_RATE_BURST (0 disables rate limiting)
+LOG_RATE_LIMIT = 2
+LOG_RATE_BURST = 10
+# Per-frame diagnostics (landmarks detected, shapes, probabilities); can be
+# switched on at runtime with POST /logging {"frame_diagnostics": true}
+FRAME_DIAGNOSTICS = False
+
+# Stub model for load testing (see stub_model.py and load_test.py): frames go
+# through the bridge as usual, but TensorFlow and MediaPipe are never loaded
+# and every full window predicts STUB_MODEL_PROBABILITIES (ACTIONS order).
+# Can also be enabled with the environment variable BRIDGE_STUB_MODEL=1.
+STUB_MODEL = os.environ.get('BRIDGE_STUB_MODEL') == '1'
+STUB_MODEL_PROBABILITIES = (0.2, 0.8)
+
 # Probability threshold (can be overridden by settings)
 DEFAULT_PROBABILITY_THRESHOLD = 0.5
 
 # Arduino trigger threshold (higher to reduce false positives)
 ARDUINO_TRIGGER_THRESHOLD = 0.9
 
+# Decision engine (see decision_engine.py): each session's DECISION_ACTION
+# probabilities are smoothed into episodes. An episode starts when the smoothed
+# score reaches DECISION_ENTER_THRESHOLD and ends once it drops to
+# DECISION_EXIT_THRESHOLD; the Arduino is triggered once, when it starts.
+# - 'ema': the score is an exponential moving average (weight DECISION_EMA_ALPHA
+#   for the newest frame)
+# - 'n_of_m': an episode starts when DECISION_N of the last DECISION_M
+#   probabilities are at or above the enter threshold, and ends when DECISION_N
+#   of them are at or below the exit threshold
+DECISION_ACTION = 'doomscrolling'
+DECISION_SMOOTHING = 'ema'
+DECISION_EMA_ALPHA = 0.3
+DECISION_N = 8
+DECISION_M = 10
+DECISION_ENTER_THRESHOLD = ARDUINO_TRIGGER_THRESHOLD
+DECISION_EXIT_THRESHOLD = 0.5
+
+# Episode and Arduino events are also served as Server-Sent Events at
+# GET /events; each subscriber buffers up to EVENT_QUEUE_SIZE events, and
+# idle connections get a keep-alive comment every EVENT_KEEPALIVE_SECONDS.
+EVENT_QUEUE_SIZE = 100
+EVENT_KEEPALIVE_SECONDS = 15
+# Every open /events connection holds a server thread (SERVER_THREADS with
+# waitress) for as long as it stays open. With a limit (2 in the 'fast'
+# profile, 0 = unlimited) further subscribers get 503 instead of starving
+# /process_frame of threads.
+EVENT_MAX_SUBSCRIBERS = 2 if _FAST else 0
+
 # Arduino configuration
-ARDUINO_PORT = '/dev/cu.usbmodem101'  # Arduino port
+# Arduino port; the environment variable BRIDGE_ARDUINO_PORT overrides it
+# (e.g. with the board emulator, see arduino_emulator.py)
+ARDUINO_PORT = os.environ.get('BRIDGE_ARDUINO_PORT', '/dev/cu.usbmodem101')
 ARDUINO_BAUDRATE = 9600
+# Commands are written by a background thread (see arduino_dispatcher.py) from
+# a queue of at most ARDUINO_QUEUE_SIZE, so frames never wait on the port. A
+# TRIGGER is dropped while another one is queued or its sweep is running
+# (ARDUINO_SWEEP_SECONDS: 105 steps of 5 ms plus two 500 ms pauses in
+# servo_controller.ino), and within ARDUINO_TRIGGER_COOLDOWN seconds of the last.
+ARDUINO_QUEUE_SIZE = 8
+ARDUINO_SWEEP_SECONDS = 1.6
+ARDUINO_TRIGGER_COOLDOWN = 3.0
+# After a failed connection, wait this long before trying again, doubling up
+# to ARDUINO_RECONNECT_MAX seconds (commands are dropped in the meantime)
+ARDUINO_RECONNECT_INITIAL = 1.0
+ARDUINO_RECONNECT_MAX = 60.0
+# Opening the port resets most boards: wait up to this long for the sketch's
+# ready line before sending. Commands not acknowledged within
+# ARDUINO_ACK_TIMEOUT seconds are counted as unacknowledged.
+ARDUINO_BOOT_TIMEOUT = 3.0
+ARDUINO_ACK_TIMEOUT = 5.0
+
+# Frame pipeline (opt-in): requests queue frames and return the latest
+# available result while worker threads run decode + inference. With
+# PIPELINE_RESULT_WAIT = 0 an HTTP /process_frame response carries the result
+# of an earlier frame (tagged with its frame_id), and a session's first frame
+# gets an empty result. Off by default, so every request gets its own result.
+PIPELINE_ENABLED = False
+# Worker threads; frames from one session are always processed in order
+PIPELINE_WORKERS = 4
+# Total queued frames across all sessions
+PIPELINE_QUEUE_SIZE = 8
+# 'latest' keeps only the newest queued frame per session and drops older ones;
+# 'oldest' processes frames in order and drops the oldest when the queue is full.
+PIPELINE_DROP_POLICY = 'latest'
+# Seconds an HTTP request may wait for its own frame's result before
+# returning the latest available one (0 = never wait).
+PIPELINE_RESULT_WAIT = 0.0
+
+# Per-session rolling state: every session/stream ID gets its own sequence
+# window. Sessions idle for SESSION_TTL_SECONDS are dropped, and the least
+# recently used ones are evicted once they use more than SESSION_MAX_MEMORY_MB.
+SESSION_TTL_SECONDS = 300
+SESSION_MAX_MEMORY_MB = 128
+
+# Processor workers (see processor_pool.py): each has its own MediaPipe graph
+# (100-200 MB each) and they share the model. A session's frames always go to
+# the same worker; frames of different sessions run in parallel across workers.
+PROCESSOR_WORKERS = 2
+
+# Detection processes (see detection_pool.py): MediaPipe holds the GIL for
+# most of a frame, so the bridge process only detects on about one core. With
+# DETECTION_PROCESSES > 0, detection runs in that many worker processes, each
+# with its own MediaPipe graph (PROCESSOR_WORKERS is then ignored). Frames and
+# keypoints are exchanged through shared memory; a session's frames always go
+# to the same process. BRIDGE_DETECTION_PROCESSES overrides it; 0 detects in
+# the bridge process.
+DETECTION_PROCESSES = int(os.environ.get('BRIDGE_DETECTION_PROCESSES', '0'))
+# Frames each process can have in flight (shared memory slots)
+DETECTION_SLOTS_PER_PROCESS = 2
+# Frames (or crops) larger than this on their longer side are downscaled
+# before they are copied to a slot
+DETECTION_MAX_SIDE = 1280
+# Seconds to wait for a process's keypoints, and for all processes to load
+# MediaPipe at startup
+DETECTION_TIMEOUT = 5.0
+DETECTION_STARTUP_TIMEOUT = 60.0
+
+# Frames of a session are added to its window in the order they arrived, even
+# when their detections finish out of order (concurrent requests, detection
+# processes). A frame waits at most this many seconds for earlier ones; frames
+# that are still out after that are dropped when they finish.
+FRAME_REORDER_TIMEOUT = 1.0
 
 # Server configuration
 SERVER_HOST = 'localhost'
 SERVER_PORT = 5001
+# 'development' runs Flask's threaded development server; 'production' serves
+# the app with waitress (pip install waitress), a multi-threaded WSGI server
+# with SERVER_THREADS request threads. BRIDGE_SERVER overrides the mode.
+SERVER_MODE = os.environ.get('BRIDGE_SERVER', 'development')
+SERVER_THREADS = 8
+# Persistent length-prefixed TCP channel for streaming frames (see stream_server.py)
+STREAM_PORT = SERVER_PORT + 1
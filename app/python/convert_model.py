@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Export action.h5 to TFLite and ONNX for the lightweight inference backends.
+
+Writes action.tflite / action.onnx (float32) next to the Keras model, plus
+optional quantized variants (action.fp16.*, action.int8.*), and action.npz:
+the LSTM/Dense weights streaming mode is built from when a TFLite/ONNX
+backend is used (so TensorFlow isn't needed at runtime). Then runs every
+export against the Keras model on the same keypoint sequences and reports
+the accuracy drift (max/mean abs probability difference, argmax agreement)
+and single-window latency.
+
+Calibration/evaluation sequences come from --calibration: a .npy file of
+shape (N, 150, 1662), a directory of such files, or an MP_Data-style tree
+(MP_Data/<action>/<sequence>/<frame>.npy) as written by the training
+notebook. Without it, random sequences are used and the report says so.
+
+int8 notes: ONNX int8 uses static (QDQ) quantization calibrated on the
+sequences when --calibration is given, and dynamic weight-only quantization
+otherwise. TFLite's full-integer calibrator cannot run the LSTM loop, so
+TFLite int8 is always dynamic-range (int8 weights, float activations).
+
+Models of reduced feature profiles (--model action.pose_hands.h5) are
+exported the same way; calibration keypoints are reduced to the profile's
+features.
+
+Select an export with INFERENCE_BACKEND / TFLITE_MODEL_PATH / ONNX_MODEL_PATH
+in config.py.
+
+Usage: python convert_model.py [--formats tflite onnx] [--quantize none float16 int8]
+                               [--calibration MP_Data] [--report drift.json]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from config import MODEL_PATH, SEQUENCE_LENGTH, KEYPOINT_DIM
+from inference_backends import load_backend
+from streaming_inference import save_weights
+from feature_profiles import PROFILES, select_features
+
+SUFFIXES = {'none': '', 'float16': '.fp16', 'int8': '.int8'}
+
+
+def load_sequences(path, limit):
+    """Load up to `limit` (SEQUENCE_LENGTH, KEYPOINT_DIM) sequences from a .npy file or directory"""
+    sequences = []
+
+    def add(array):
+        array = np.asarray(array, dtype=np.float32)
+        if array.shape == (SEQUENCE_LENGTH, KEYPOINT_DIM):
+            array = array[np.newaxis]
+        if array.ndim == 3 and array.shape[1:] == (SEQUENCE_LENGTH, KEYPOINT_DIM):
+            sequences.extend(array)
+
+    if os.path.isfile(path):
+        add(np.load(path))
+    else:
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            frames = {os.path.splitext(f)[0]: f for f in files if f.endswith('.npy')}
+            if frames and all(name.isdigit() for name in frames):
+                # MP_Data layout: one file per frame, named 0.npy .. 149.npy
+                if len(frames) >= SEQUENCE_LENGTH:
+                    add([np.load(os.path.join(root, frames[str(i)])) for i in range(SEQUENCE_LENGTH)])
+            else:
+                for name in sorted(frames.values()):
+                    add(np.load(os.path.join(root, name)))
+            if len(sequences) >= limit:
+                break
+
+    return np.stack(sequences[:limit]) if sequences else None
+
+
+def export_tflite(model, path, quantize):
+    import tensorflow as tf
+    from tensorflow.python.framework.convert_to_constants import convert_variables_to_constants_v2
+
+    # Freeze the weights into a fixed batch-1 graph so the LSTM lowers to
+    # builtin TFLite ops (a dynamic batch needs the Flex delegate).
+    function = tf.function(lambda x: model(x, training=False))
+    concrete = function.get_concrete_function(tf.TensorSpec([1, SEQUENCE_LENGTH, model.input_shape[-1]], tf.float32))
+    frozen = convert_variables_to_constants_v2(concrete)
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([frozen])
+    if quantize != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+
+
+def export_onnx(model, path, quantize, calibration):
+    import tensorflow as tf
+    import tf2onnx
+
+    function = tf.function(lambda x: model(x, training=False))
+    spec = [tf.TensorSpec([None, SEQUENCE_LENGTH, model.input_shape[-1]], tf.float32, name='input')]
+
+    if quantize == 'none':
+        tf2onnx.convert.from_function(function, input_signature=spec, opset=13, output_path=path)
+        return
+
+    float_path = path + '.float32.tmp'
+    tf2onnx.convert.from_function(function, input_signature=spec, opset=13, output_path=float_path)
+    try:
+        if quantize == 'float16':
+            import onnx
+            from onnxruntime.transformers.float16 import convert_float_to_float16
+            onnx.save(convert_float_to_float16(onnx.load(float_path), keep_io_types=True), path)
+        elif calibration is not None:
+            from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+            class SequenceReader(CalibrationDataReader):
+                def __init__(self):
+                    self.windows = iter(calibration)
+
+                def get_next(self):
+                    window = next(self.windows, None)
+                    return None if window is None else {'input': window[np.newaxis]}
+
+            quantize_static(float_path, path, SequenceReader(), quant_format=QuantFormat.QDQ,
+                            weight_type=QuantType.QInt8, activation_type=QuantType.QInt8)
+        else:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(float_path, path, weight_type=QuantType.QInt8)
+    finally:
+        os.remove(float_path)
+
+
+def time_single(backend, window, repeats):
+    """Mean latency in ms of one single-window prediction"""
+    batch = window[np.newaxis]
+    backend.predict_on_batch(batch)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        backend.predict_on_batch(batch)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def drift_report(backend, reference, sequences, repeats):
+    output = backend.predict_on_batch(sequences)
+    diff = np.abs(output - reference)
+    return {
+        'max_abs_diff': float(diff.max()),
+        'mean_abs_diff': float(diff.mean()),
+        'argmax_agreement': float(np.mean(output.argmax(axis=1) == reference.argmax(axis=1))),
+        'latency_ms': round(time_single(backend, sequences[0], repeats), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=MODEL_PATH, help='Keras model to convert')
+    parser.add_argument('--output-dir', default=None, help='Where to write the exports (default: next to --model)')
+    parser.add_argument('--formats', nargs='+', choices=['tflite', 'onnx'], default=['tflite', 'onnx'])
+    parser.add_argument('--quantize', nargs='+', choices=list(SUFFIXES), default=['none'],
+                        help='Variants to export (float32 is "none")')
+    parser.add_argument('--calibration', default=None,
+                        help='Recorded keypoint sequences (.npy file, directory or MP_Data tree)')
+    parser.add_argument('--samples', type=int, default=64, help='Max calibration/evaluation sequences')
+    parser.add_argument('--repeats', type=int, default=20, help='Predictions to time per model')
+    parser.add_argument('--report', default=None, help='Also write the drift report as JSON to this path')
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or os.path.dirname(os.path.abspath(args.model))
+    stem = os.path.splitext(os.path.basename(args.model))[0]
+
+    keras_backend = load_backend('keras', args.model)
+    # Reduced feature-profile models (action.<profile>.h5) take fewer features per frame
+    feature_dim = keras_backend.input_shape[-1]
+    profile = next((p for p in PROFILES.values() if p.dim == feature_dim), None)
+    if profile is None:
+        raise SystemExit(f"{args.model} takes {feature_dim} features per frame, which matches no feature profile")
+
+    sequences = load_sequences(args.calibration, args.samples) if args.calibration else None
+    if sequences is not None:
+        print(f"Loaded {len(sequences)} keypoint sequences from {args.calibration}")
+        sequences = np.ascontiguousarray(select_features(sequences, profile))
+        calibration = sequences
+    else:
+        if args.calibration:
+            print(f"Warning: no ({SEQUENCE_LENGTH}, {KEYPOINT_DIM}) sequences found in {args.calibration}")
+        print("Using random sequences for evaluation (drift on real keypoints may differ)")
+        sequences = np.random.default_rng(0).random((args.samples, SEQUENCE_LENGTH, feature_dim), dtype=np.float32)
+        calibration = None
+
+    weights_path = os.path.join(output_dir, f"{stem}.npz")
+    try:
+        save_weights(keras_backend.model, weights_path)
+        print(f"Streaming weights -> {weights_path}")
+    except ValueError as e:
+        print(f"Streaming weights not written (streaming mode will use windowed inference): {e}")
+
+    reference = keras_backend.predict_on_batch(sequences)
+    report = {
+        'model': args.model,
+        'sequences': len(sequences),
+        'calibration': args.calibration if calibration is not None else None,
+        'reference': {'backend': 'keras', 'latency_ms': round(time_single(keras_backend, sequences[0], args.repeats), 3)},
+        'exports': [],
+    }
+
+    for fmt in args.formats:
+        for quantize in args.quantize:
+            path = os.path.join(output_dir, f"{stem}{SUFFIXES[quantize]}.{fmt}")
+            print(f"Exporting {fmt} ({quantize}) -> {path}")
+            try:
+                if fmt == 'tflite':
+                    export_tflite(keras_backend.model, path, quantize)
+                else:
+                    export_onnx(keras_backend.model, path, quantize, calibration)
+                entry = {'format': fmt, 'quantize': quantize, 'path': path, 'size_bytes': os.path.getsize(path)}
+                entry.update(drift_report(load_backend(fmt, path), reference, sequences, args.repeats))
+            except Exception as e:
+                print(f"Error exporting {fmt} ({quantize}): {e}")
+                entry = {'format': fmt, 'quantize': quantize, 'path': path, 'error': str(e)}
+            report['exports'].append(entry)
+
+    print(f"\nDrift vs Keras on {len(sequences)} sequences (Keras: {report['reference']['latency_ms']:.2f} ms/window)")
+    print(f"{'export':<28} {'size KB':>9} {'max diff':>10} {'mean diff':>10} {'argmax':>8} {'ms':>8}")
+    for entry in report['exports']:
+        name = os.path.basename(entry['path'])
+        if 'error' in entry:
+            print(f"{name:<28} failed: {entry['error']}")
+            continue
+        print(f"{name:<28} {entry['size_bytes'] / 1024:>9.1f} {entry['max_abs_diff']:>10.2e} "
+              f"{entry['mean_abs_diff']:>10.2e} {entry['argmax_agreement']:>8.1%} {entry['latency_ms']:>8.2f}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import time
+from collections import deque
+
+from config import (
+    DECISION_ACTION, DECISION_SMOOTHING, DECISION_EMA_ALPHA, DECISION_N, DECISION_M,
+    DECISION_ENTER_THRESHOLD, DECISION_EXIT_THRESHOLD
+)
+
+SMOOTHING_MODES = ('ema', 'n_of_m')
+
+
+class DecisionEngine:
+    """Turns one stream's per-frame probabilities into discrete episodes of `action`.
+
+    Smoothing ('ema' or 'n_of_m', see config.py) plus separate enter and
+    exit thresholds keep a single noisy frame from starting or ending an
+    episode. `update()` returns an 'episode_start' or 'episode_end' event
+    dict on the frame where the decision changes, and None otherwise.
+
+    Not thread-safe; callers hold the stream's SequenceState lock.
+    """
+
+    def __init__(self, action=DECISION_ACTION, smoothing=DECISION_SMOOTHING, alpha=DECISION_EMA_ALPHA,
+                 n=DECISION_N, m=DECISION_M, enter=DECISION_ENTER_THRESHOLD, exit=DECISION_EXIT_THRESHOLD):
+        if smoothing not in SMOOTHING_MODES:
+            raise ValueError(f"Unknown smoothing {smoothing!r} (expected one of {', '.join(SMOOTHING_MODES)})")
+        if exit > enter:
+            raise ValueError(f"Exit threshold {exit} is above enter threshold {enter}")
+        self.action = action
+        self.smoothing = smoothing
+        self.alpha = alpha
+        self.n = n
+        self.enter = enter
+        self.exit = exit
+        self.recent = deque(maxlen=m)
+        self.score = None
+        self.active = False
+        self.started = None  # time the current episode started
+        self.peak = 0.0
+        self.episodes = 0
+
+    def reset(self, now=None):
+        """Forget the probability history; returns an 'episode_end' event (reason 'reset') if one was open"""
+        event = None
+        if self.active:
+            now = time.time() if now is None else now
+            event = self._event('episode_end', now, duration_seconds=round(now - self.started, 3),
+                                peak_score=round(self.peak, 4), reason='reset')
+        self.recent.clear()
+        self.score = None
+        self.active = False
+        self.started = None
+        return event
+
+    def update(self, probabilities, now=None):
+        """Feed one frame's {action: probability} (None or {} while the window fills)"""
+        probability = probabilities.get(self.action) if probabilities else None
+        if probability is None:
+            return None
+        now = time.time() if now is None else now
+        self.recent.append(probability)
+
+        if self.smoothing == 'ema':
+            self.score = probability if self.score is None else self.score + self.alpha * (probability - self.score)
+            enter = self.score >= self.enter
+            leave = self.score <= self.exit
+        else:
+            above = sum(p >= self.enter for p in self.recent)
+            below = sum(p <= self.exit for p in self.recent)
+            self.score = above / self.recent.maxlen
+            enter = above >= self.n
+            leave = below >= self.n
+
+        if not self.active:
+            if enter:
+                self.active = True
+                self.started = now
+                self.peak = self.score
+                self.episodes += 1
+                return self._event('episode_start', now)
+            return None
+
+        self.peak = max(self.peak, self.score)
+        if leave:
+            event = self._event('episode_end', now, duration_seconds=round(now - self.started, 3),
+                                peak_score=round(self.peak, 4))
+            self.active = False
+            self.started = None
+            return event
+        return None
+
+    def _event(self, name, now, **fields):
+        return dict({'event': name, 'action': self.action, 'episode': self.episodes,
+                     'score': round(self.score, 4), 'time': now}, **fields)
+
+    def snapshot(self):
+        return {
+            'active': self.active,
+            'score': round(self.score, 4) if self.score is not None else None,
+            'episode': self.episodes if self.active else None,
+        }
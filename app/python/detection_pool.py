@@ -0,0 +1,329 @@
+import atexit
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import weakref
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from config import (
+    KEYPOINT_DIM, DETECTION_SLOTS_PER_PROCESS, DETECTION_MAX_SIDE, DETECTION_TIMEOUT, DETECTION_STARTUP_TIMEOUT
+)
+from keypoints import LANDMARK_GROUPS, DetectedGroups, extract_keypoints
+from roi_tracker import cap_size
+
+log = logging.getLogger(__name__)
+
+# Seconds between checks that the worker processes are still alive
+LIVENESS_INTERVAL = 1.0
+
+
+def _detect_worker(index, factory, frames_name, keypoints_name, slots, frame_bytes, tasks, results):
+    """Worker process: run `factory()`'s detector on the frames it is sent.
+
+    A task (slot, height, width, rgb) refers to a frame in the shared frame
+    slots; the keypoints are written to the same slot of the shared keypoint
+    array, and (index, slot, detected groups or error, seconds) is reported.
+    """
+    frames_memory = shared_memory.SharedMemory(frames_name)
+    keypoints_memory = shared_memory.SharedMemory(keypoints_name)
+    frames = np.ndarray((slots, frame_bytes), dtype=np.uint8, buffer=frames_memory.buf)
+    keypoints = np.ndarray((slots, KEYPOINT_DIM), dtype=np.float32, buffer=keypoints_memory.buf)
+    detector = None
+    try:
+        try:
+            detector = factory()
+        except Exception as e:
+            results.put((index, None, f"{type(e).__name__}: {e}", 0.0))
+            return
+        results.put((index, None, None, 0.0))
+
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, height, width, rgb = task
+            start = time.perf_counter()
+            try:
+                image = frames[slot, :height * width * 3].reshape(height, width, 3)
+                if not rgb:
+                    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                image.flags.writeable = False
+                detected = detector.process(image)
+                extract_keypoints(detected, keypoints[slot])
+                outcome = tuple(bool(getattr(detected, attr)) for _, attr, _, _ in LANDMARK_GROUPS)
+            except Exception as e:
+                outcome = f"{type(e).__name__}: {e}"
+            results.put((index, slot, outcome, time.perf_counter() - start))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if detector is not None and hasattr(detector, 'close'):
+            detector.close()
+        del frames, keypoints
+        frames_memory.close()
+        keypoints_memory.close()
+
+
+class _Pending:
+    __slots__ = ('worker', 'done', 'outcome', 'abandoned')
+
+    def __init__(self, worker):
+        self.worker = worker
+        self.done = threading.Event()
+        self.outcome = None
+        self.abandoned = False
+
+
+class DetectionPool:
+    """MediaPipe detection spread over worker processes, each with its own graph.
+
+    MediaPipe holds the GIL for most of a frame, so threads in the bridge
+    process can't detect on more than about one core. Every worker process
+    builds its detector with `factory` (a picklable callable, e.g. a
+    functools.partial of model_processor.create_detector). Frames are copied
+    once into a shared memory slot and the worker writes the keypoints back
+    to shared memory, so neither is pickled; only slot numbers go through
+    the queues. A stream is pinned to the process with the fewest streams
+    the first time it is seen (so MediaPipe's tracking sees all its frames)
+    and released when its state is garbage collected.
+
+    `detect()` is thread-safe. Results arrive in completion order; putting a
+    stream's frames back in order is up to the caller (see frame_order.py).
+    A process that dies is restarted and its frames in flight fail.
+    """
+
+    def __init__(self, processes, factory, slots_per_process=DETECTION_SLOTS_PER_PROCESS,
+                 max_side=DETECTION_MAX_SIDE, timeout=DETECTION_TIMEOUT):
+        self.size = processes
+        self.factory = factory
+        self.slots = processes * slots_per_process
+        self.max_side = max_side
+        self.timeout = timeout
+        self.frame_bytes = max_side * max_side * 3
+        # Spawn rather than fork: the bridge process already runs threads (and maybe TensorFlow)
+        self.context = multiprocessing.get_context('spawn')
+        self.frames_memory = None
+        self.keypoints_memory = None
+        self.frames = None
+        self.keypoints = None
+        self.processes = [None] * processes
+        self.tasks = [None] * processes
+        self.results = None
+        self.free = queue.Queue()
+        self.pending = {}  # slot -> _Pending
+        self.streams = weakref.WeakKeyDictionary()  # stream state -> worker index
+        self.lock = threading.Lock()
+        self.collector = None
+        self.closed = False
+        self.completed = [0] * processes
+        self.busy_seconds = [0.0] * processes
+        self.failures = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    def start(self, startup_timeout=DETECTION_STARTUP_TIMEOUT):
+        """Start the worker processes and wait until each has built its detector"""
+        self.frames_memory = shared_memory.SharedMemory(create=True, size=self.slots * self.frame_bytes)
+        self.keypoints_memory = shared_memory.SharedMemory(create=True, size=self.slots * KEYPOINT_DIM * 4)
+        self.frames = np.ndarray((self.slots, self.frame_bytes), dtype=np.uint8, buffer=self.frames_memory.buf)
+        self.keypoints = np.ndarray((self.slots, KEYPOINT_DIM), dtype=np.float32, buffer=self.keypoints_memory.buf)
+        for slot in range(self.slots):
+            self.free.put(slot)
+        self.results = self.context.Queue()
+        atexit.register(self.close)
+
+        for index in range(self.size):
+            self._spawn(index)
+        deadline = time.monotonic() + startup_timeout
+        for _ in range(self.size):
+            try:
+                index, _, error, _ = self.results.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                self.close()
+                raise TimeoutError(f"Detection processes did not start within {startup_timeout:.0f} s")
+            if error is not None:
+                self.close()
+                raise RuntimeError(f"Detection process {index} failed to start: {error}")
+
+        self.collector = threading.Thread(target=self._collect, name='detection-results', daemon=True)
+        self.collector.start()
+        log.info("Detection running in %d processes (%d shared memory slots of %.1f MB)",
+                 self.size, self.slots, self.frame_bytes / 1e6)
+        return self
+
+    def _spawn(self, index):
+        self.tasks[index] = self.context.Queue()
+        process = self.context.Process(
+            target=_detect_worker, name=f'detection-{index}', daemon=True,
+            args=(index, self.factory, self.frames_memory.name, self.keypoints_memory.name,
+                  self.slots, self.frame_bytes, self.tasks[index], self.results))
+        process.start()
+        self.processes[index] = process
+
+    def close(self):
+        """Stop the worker processes and release the shared memory"""
+        if self.closed:
+            return
+        self.closed = True
+        for index, process in enumerate(self.processes):
+            if process is not None and process.is_alive():
+                self.tasks[index].put(None)
+        for process in self.processes:
+            if process is not None:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+        if self.results is not None:
+            self.results.put(None)
+        if self.collector is not None:
+            self.collector.join(timeout=5)
+        with self.lock:
+            for pending in self.pending.values():
+                pending.outcome = 'Detection pool closed'
+                pending.done.set()
+            self.pending.clear()
+        self.frames = self.keypoints = None
+        for memory in (self.frames_memory, self.keypoints_memory):
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+
+    def _worker_for(self, stream):
+        with self.lock:
+            index = self.streams.get(stream)
+            if index is None:
+                counts = [0] * self.size
+                for assigned in self.streams.values():
+                    counts[assigned] += 1
+                index = min(range(self.size), key=counts.__getitem__)
+                self.streams[stream] = index
+            return index
+
+    def detect(self, image, rgb=False, stream=None):
+        """(keypoints, DetectedGroups) for a BGR (or RGB if `rgb`) image.
+
+        `stream` is any weak-referenceable object identifying the stream
+        (the bridge passes its SequenceState); frames of one stream always
+        go to the same process. Raises TimeoutError when no slot frees up or
+        the process doesn't answer within `timeout`, RuntimeError when
+        detection failed.
+        """
+        index = self._worker_for(stream) if stream is not None else 0
+        return self._submit(index, image, rgb)
+
+    def _submit(self, index, image, rgb):
+        try:
+            slot = self.free.get(timeout=self.timeout)
+        except queue.Empty:
+            with self.lock:
+                self.timeouts += 1
+            raise TimeoutError("No free detection slot")
+
+        # The only copy of the frame: crops (views into the frame) are cut straight into the slot
+        image = cap_size(image, self.max_side)
+        height, width = image.shape[:2]
+        self.frames[slot, :height * width * 3].reshape(height, width, 3)[...] = image
+
+        pending = _Pending(index)
+        with self.lock:
+            self.pending[slot] = pending
+            tasks = self.tasks[index]
+        tasks.put((slot, height, width, rgb))
+
+        if not pending.done.wait(self.timeout):
+            with self.lock:
+                if not pending.done.is_set():
+                    # The slot is freed when the result turns up (or the process is restarted)
+                    pending.abandoned = True
+                    self.timeouts += 1
+                    raise TimeoutError(f"Detection process {index} did not answer within {self.timeout:.1f} s")
+
+        outcome = pending.outcome
+        if isinstance(outcome, str):
+            self.free.put(slot)
+            raise RuntimeError(outcome)
+        keypoints = self.keypoints[slot].copy()
+        self.free.put(slot)
+        return keypoints, DetectedGroups(*outcome)
+
+    def _collect(self):
+        """Hand the workers' results to the threads waiting for them; restart dead workers"""
+        while True:
+            try:
+                message = self.results.get(timeout=LIVENESS_INTERVAL)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if message is None:
+                return
+            index, slot, outcome, seconds = message
+            if slot is None:
+                # Startup report of a restarted worker
+                if outcome is not None:
+                    log.error("Detection process %d failed to start: %s", index, outcome)
+                continue
+            with self.lock:
+                self.completed[index] += 1
+                self.busy_seconds[index] += seconds
+                if isinstance(outcome, str):
+                    self.failures += 1
+                pending = self.pending.pop(slot, None)
+                if pending is None:
+                    continue
+                if pending.abandoned:
+                    self.free.put(slot)
+                    continue
+                pending.outcome = outcome
+                pending.done.set()
+
+    def _check_workers(self):
+        for index, process in enumerate(self.processes):
+            if self.closed or process.is_alive():
+                continue
+            log.error("Detection process %d exited (code %s), restarting it", index, process.exitcode)
+            with self.lock:
+                self.restarts += 1
+                # Its frames in flight are lost
+                for slot, pending in list(self.pending.items()):
+                    if pending.worker != index:
+                        continue
+                    del self.pending[slot]
+                    if pending.abandoned:
+                        self.free.put(slot)
+                    else:
+                        pending.outcome = f"Detection process {index} exited"
+                        pending.done.set()
+                self._spawn(index)
+
+    def warm_up(self, iterations=1, shape=(480, 640, 3)):
+        """Run each process's detector on a blank frame; returns the time spent in ms"""
+        start = time.perf_counter()
+        blank = np.zeros(shape, dtype=np.uint8)
+        for index in range(self.size):
+            for _ in range(iterations):
+                self._submit(index, blank, True)
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    def stats(self):
+        with self.lock:
+            streams = [0] * self.size
+            for index in self.streams.values():
+                streams[index] += 1
+            return {
+                'processes': self.size,
+                'alive': sum(process is not None and process.is_alive() for process in self.processes),
+                'streams': streams,
+                'frames': list(self.completed),
+                'mean_detect_ms': [round(busy / count * 1000, 1) if count else None
+                                   for busy, count in zip(self.busy_seconds, self.completed)],
+                'in_flight': len(self.pending),
+                'slots': self.slots,
+                'failures': self.failures,
+                'timeouts': self.timeouts,
+                'restarts': self.restarts,
+            }
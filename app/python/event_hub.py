@@ -0,0 +1,79 @@
+import json
+import queue
+import threading
+
+from config import EVENT_QUEUE_SIZE, EVENT_KEEPALIVE_SECONDS, EVENT_MAX_SUBSCRIBERS
+
+
+class EventHub:
+    """Fans bridge events (episodes, Arduino triggers) out to Server-Sent Events subscribers.
+
+    Every subscriber gets its own bounded queue; a subscriber that stops
+    reading loses its oldest events rather than holding up publish(). A
+    subscriber's stream() keeps a server thread busy while it is open, so
+    at most `max_subscribers` (unless 0) are accepted at a time.
+    """
+
+    def __init__(self, queue_size=EVENT_QUEUE_SIZE, keepalive=EVENT_KEEPALIVE_SECONDS,
+                 max_subscribers=EVENT_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.max_subscribers = max_subscribers
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.published = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def subscribe(self):
+        """A new subscriber queue, or None when `max_subscribers` are already connected"""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self.lock:
+            if self.max_subscribers and len(self.subscribers) >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, event):
+        with self.lock:
+            subscribers = list(self.subscribers)
+            self.published += 1
+        for subscriber in subscribers:
+            while True:
+                try:
+                    subscriber.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                        with self.lock:
+                            self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def stream(self, subscriber, session_id=None):
+        """SSE body for `subscriber` (events of `session_id` only, if given); unsubscribes when closed"""
+        try:
+            yield ': connected\n\n'
+            while True:
+                try:
+                    event = subscriber.get(timeout=self.keepalive)
+                except queue.Empty:
+                    # Comment line, so proxies and the client keep the connection open
+                    yield ': keepalive\n\n'
+                    continue
+                if session_id is not None and event.get('session_id') != session_id:
+                    continue
+                yield f"event: {event.get('event', 'message')}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self.lock:
+            return {'subscribers': len(self.subscribers), 'max_subscribers': self.max_subscribers,
+                    'published': self.published, 'dropped': self.dropped, 'rejected': self.rejected}
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Extract MediaPipe keypoints from training videos into an MP_Data tree.
+
+Command-line version of the training notebook's save_video_as_keypoints.
+Reads <videos>/<action>/*.mp4|mov|m4v|avi|mkv, in file name order. The
+first --sequence-length frames of the i-th video of an action go to
+<output>/<action>/<i>/0.npy .. <n-1>.npy. Frames come from the same
+ModelProcessor.mediapipe_detection + extract_keypoints as the live bridge.
+Short videos are padded with zeros, as in the notebook.
+
+Videos are spread across a process pool, and each worker holds one
+MediaPipe Holistic instance for all the videos it gets. Frames are
+decoded, extracted and written one at a time, so memory stays flat
+however long the videos are.
+
+Resuming: each sequence is written to <i>.partial and renamed to <i> once
+complete. A rerun skips videos whose sequence folder is complete and
+redoes interrupted ones (use --overwrite to redo everything).
+
+Files always hold the full 1662-value layout. With --profile pose_hands
+only MediaPipe Pose + Hands run, which is much faster; the face values are
+then zeros, so such data can only train reduced profiles without the face.
+
+Usage: python extract_dataset.py --videos VIDEOS_DIR [--output MP_Data]
+                                [--workers 4] [--max-videos-per-class N]
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from config import ACTIONS, SEQUENCE_LENGTH, KEYPOINT_DIM
+from feature_profiles import PROFILES
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.avi', '.mkv')
+
+# Per-worker ModelProcessor (MediaPipe only), created by _init_worker
+_processor = None
+
+
+def list_video_files(folder):
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith(VIDEO_EXTENSIONS))
+
+
+def sequence_complete(seq_dir, sequence_length):
+    """Whether `seq_dir` holds every frame file 0.npy .. <sequence_length - 1>.npy"""
+    if not os.path.isdir(seq_dir):
+        return False
+    names = set(os.listdir(seq_dir))
+    return all(f'{i}.npy' in names for i in range(sequence_length))
+
+
+def _init_worker(profile):
+    global _processor
+    import cv2
+    # One process per core already; keep OpenCV from oversubscribing
+    cv2.setNumThreads(1)
+
+    from model_processor import ModelProcessor
+    # Exactly one graph per worker, even if BRIDGE_DETECTION_PROCESSES is set
+    _processor = ModelProcessor(with_model=False, profile=profile, detection_processes=0)
+    if _processor.holistic is None:
+        raise RuntimeError("MediaPipe Holistic is not available in this worker")
+
+
+def _extract_video(video_path, seq_dir, sequence_length):
+    """Write one video's keypoints to `seq_dir`; returns (pid, frames read, seconds)"""
+    import cv2
+
+    start = time.perf_counter()
+    partial_dir = seq_dir + '.partial'
+    shutil.rmtree(partial_dir, ignore_errors=True)
+    os.makedirs(partial_dir)
+
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        raise RuntimeError(f"Could not open {video_path}")
+
+    keypoints = np.zeros(KEYPOINT_DIM, dtype=np.float32)
+    frames = 0
+    try:
+        # Read up to sequence_length frames (longer videos are truncated)
+        while frames < sequence_length:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            _, results = _processor.mediapipe_detection(frame)
+            _processor.extract_keypoints(results, keypoints)
+            np.save(os.path.join(partial_dir, str(frames)), keypoints)
+            frames += 1
+    finally:
+        capture.release()
+
+    if frames == 0:
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        raise RuntimeError(f"No frames read from {video_path}")
+
+    # Pad short videos with zeros
+    keypoints[:] = 0.0
+    for frame_num in range(frames, sequence_length):
+        np.save(os.path.join(partial_dir, str(frame_num)), keypoints)
+
+    shutil.rmtree(seq_dir, ignore_errors=True)
+    os.rename(partial_dir, seq_dir)
+    return os.getpid(), frames, time.perf_counter() - start
+
+
+def plan_jobs(videos_dir, output_dir, actions, max_per_class, sequence_length, overwrite):
+    """(video path, sequence dir, label) for every video that still needs extracting, and the skip count"""
+    jobs = []
+    skipped = 0
+    for action in actions:
+        action_dir = os.path.join(videos_dir, action)
+        if not os.path.isdir(action_dir):
+            raise SystemExit(f"Missing folder: {action_dir}")
+        os.makedirs(os.path.join(output_dir, action), exist_ok=True)
+
+        video_files = list_video_files(action_dir)
+        if max_per_class is not None:
+            video_files = video_files[:max_per_class]
+
+        for sequence_idx, name in enumerate(video_files):
+            seq_dir = os.path.join(output_dir, action, str(sequence_idx))
+            if not overwrite and sequence_complete(seq_dir, sequence_length):
+                skipped += 1
+                continue
+            jobs.append((os.path.join(action_dir, name), seq_dir, f'{action}/{sequence_idx}'))
+    return jobs, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--videos', required=True, help='Folder with one subfolder of videos per action')
+    parser.add_argument('--output', default='MP_Data', help='MP_Data folder to write keypoints to')
+    parser.add_argument('--actions', nargs='+', default=ACTIONS, help='Action subfolders to process')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--sequence-length', type=int, default=SEQUENCE_LENGTH, help='Frames per sequence')
+    parser.add_argument('--max-videos-per-class', type=int, help='Only the first N videos of each action')
+    parser.add_argument('--overwrite', action='store_true', help='Re-extract sequences that are already complete')
+    parser.add_argument('--profile', default='full', choices=sorted(PROFILES),
+                        help="Feature profile whose MediaPipe graphs to run (groups it doesn't use are written as zeros)")
+    args = parser.parse_args()
+
+    jobs, skipped = plan_jobs(args.videos, args.output, args.actions, args.max_videos_per_class,
+                              args.sequence_length, args.overwrite)
+    print(f"{len(jobs)} videos to extract, {skipped} already complete")
+    if not jobs:
+        return
+
+    workers = max(1, min(args.workers, len(jobs)))
+    per_worker = {}  # pid -> [videos, frames, seconds]
+    failed = []
+    start = time.perf_counter()
+
+    # spawn: MediaPipe's graph threads don't survive fork()
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                             initargs=(args.profile,)) as pool:
+        futures = {pool.submit(_extract_video, video, seq_dir, args.sequence_length): label
+                   for video, seq_dir, label in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            label = futures[future]
+            try:
+                pid, frames, seconds = future.result()
+            except Exception as e:
+                failed.append(label)
+                print(f"[{done}/{len(jobs)}] {label}: FAILED ({e})")
+                continue
+
+            stats = per_worker.setdefault(pid, [0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += frames
+            stats[2] += seconds
+            padded = f", padded from {frames}" if frames < args.sequence_length else ""
+            print(f"[{done}/{len(jobs)}] {label}: {args.sequence_length} frames{padded} "
+                  f"in {seconds:.1f}s ({frames / seconds:.1f} fps, worker {pid})")
+
+    elapsed = time.perf_counter() - start
+    total_frames = sum(stats[1] for stats in per_worker.values())
+    print(f"\n{'worker':>8} {'videos':>7} {'frames':>7} {'fps':>7}")
+    for pid, (videos, frames, seconds) in sorted(per_worker.items()):
+        print(f"{pid:>8} {videos:>7} {frames:>7} {frames / seconds if seconds else 0.0:>7.1f}")
+    print(f"\n{total_frames} frames in {elapsed:.1f}s ({total_frames / elapsed:.1f} fps across {workers} workers)")
+    if failed:
+        raise SystemExit(f"{len(failed)} videos failed: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
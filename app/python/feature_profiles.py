@@ -0,0 +1,69 @@
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from config import KEYPOINT_DIM
+from keypoints import GROUP_LAYOUT
+
+# Face mesh landmarks kept by the 'pose_hands_face' profile: forehead, nose
+# tip, chin, outer/inner eye corners, mouth corners and upper/lower lip.
+FACE_ANCHORS = (10, 1, 152, 33, 133, 263, 362, 61, 291, 13, 14)
+
+# name: model input features, and the MediaPipe graph(s) that produce them
+#   groups    landmark groups (keypoints.LANDMARK_GROUPS names) in layout order
+#   face      face mesh landmarks used when 'face' is in groups (None = all 468)
+#   detector  'holistic' (pose + face mesh + hands) or 'pose_hands' (Pose and
+#             Hands graphs only, no face mesh)
+FeatureProfile = namedtuple('FeatureProfile', ['name', 'groups', 'face', 'detector', 'indices', 'dim'])
+
+
+def _profile(name, groups, face=None, detector='holistic'):
+    indices = []
+    for group, _, count, width, start, end in GROUP_LAYOUT:
+        if group not in groups:
+            continue
+        points = face if group == 'face' and face is not None else range(count)
+        for point in points:
+            indices.extend(range(start + point * width, start + (point + 1) * width))
+    indices = np.asarray(indices, dtype=np.intp)
+    return FeatureProfile(name, tuple(groups), face, detector, indices, len(indices))
+
+
+PROFILES = {
+    # The notebook's 1662-dim vector (action.h5)
+    'full': _profile('full', ('pose', 'face', 'left_hand', 'right_hand')),
+    # 258 dims; no face mesh at all
+    'pose_hands': _profile('pose_hands', ('pose', 'left_hand', 'right_hand'), detector='pose_hands'),
+    # 291 dims; the face mesh still runs, but only FACE_ANCHORS reach the model
+    'pose_hands_face': _profile('pose_hands_face', ('pose', 'face', 'left_hand', 'right_hand'), face=FACE_ANCHORS),
+}
+
+assert PROFILES['full'].dim == KEYPOINT_DIM
+
+
+def get_profile(name):
+    """FeatureProfile by name, raising ValueError if it is unknown"""
+    profile = PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Unknown feature profile {name!r} (expected one of {', '.join(PROFILES)})")
+    return profile
+
+
+def profile_model_path(path, profile):
+    """Model file for `profile`: `path` itself for 'full', else action.h5 -> action.<profile>.h5"""
+    name = profile if isinstance(profile, str) else profile.name
+    if name == 'full':
+        return path
+    root, ext = os.path.splitext(path)
+    return f'{root}.{name}{ext}'
+
+
+def select_features(keypoints, profile, out=None):
+    """Model input for `profile` from full-layout keypoints (the same array for 'full').
+
+    Works on a single (KEYPOINT_DIM,) vector or on (..., KEYPOINT_DIM) arrays.
+    """
+    if profile.dim == KEYPOINT_DIM:
+        return keypoints
+    return np.take(keypoints, profile.indices, axis=-1, out=out, mode='clip')
@@ -0,0 +1,82 @@
+import base64
+import struct
+
+import cv2
+import numpy as np
+
+from metrics import metrics
+
+# Raw frames sent to /process_frame/binary start with this 8-byte header:
+# magic b'RGB8', then uint16 width and uint16 height (little-endian),
+# followed by width * height * 3 bytes of packed RGB pixels.
+RAW_MAGIC = b'RGB8'
+RAW_HEADER = struct.Struct('<4sHH')
+
+# (width, height) of the grayscale thumbnails compared by the motion gate
+THUMBNAIL_SIZE = (64, 48)
+
+
+def data_url_bytes(frame_data):
+    """Encoded image bytes of a JPEG data URL (or bare base64 string)"""
+    # Remove data URL prefix if present
+    with metrics.stage('base64_decode'):
+        if ',' in frame_data:
+            frame_data = frame_data.split(',', 1)[1]
+        return base64.b64decode(frame_data)
+
+
+def decode_data_url(frame_data):
+    """Decode a JPEG data URL (or bare base64 string) into a BGR image, or None"""
+    img_data = data_url_bytes(frame_data)
+
+    with metrics.stage('imdecode'):
+        nparr = np.frombuffer(img_data, np.uint8)
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+def decode_frame_bytes(body):
+    """Decode a binary frame body without copying it first.
+
+    Accepts either encoded image bytes (JPEG/PNG, anything cv2.imdecode reads)
+    or a raw RGB frame with a RAW_HEADER. Returns (image, is_rgb): encoded
+    images decode to BGR, raw frames are returned as an RGB view of `body`.
+    Returns (None, False) if the body cannot be decoded.
+    """
+    buf = memoryview(body)
+
+    if len(buf) >= RAW_HEADER.size and bytes(buf[:4]) == RAW_MAGIC:
+        _, width, height = RAW_HEADER.unpack_from(buf)
+        expected = width * height * 3
+        if width == 0 or height == 0 or len(buf) - RAW_HEADER.size != expected:
+            return None, False
+        image = np.frombuffer(buf, np.uint8, count=expected, offset=RAW_HEADER.size)
+        return image.reshape(height, width, 3), True
+
+    with metrics.stage('imdecode'):
+        image = cv2.imdecode(np.frombuffer(buf, np.uint8), cv2.IMREAD_COLOR)
+    return image, False
+
+
+def frame_thumbnail(body, size=THUMBNAIL_SIZE):
+    """Small uint8 grayscale version of a binary frame body, for change detection.
+
+    JPEGs are decoded at 1/8 scale (the decoder skips most of the work), raw
+    frames are subsampled without copying. Returns None if the body cannot
+    be decoded.
+    """
+    buf = memoryview(body)
+
+    if len(buf) >= RAW_HEADER.size and bytes(buf[:4]) == RAW_MAGIC:
+        _, width, height = RAW_HEADER.unpack_from(buf)
+        expected = width * height * 3
+        if width == 0 or height == 0 or len(buf) - RAW_HEADER.size != expected:
+            return None
+        image = np.frombuffer(buf, np.uint8, count=expected, offset=RAW_HEADER.size).reshape(height, width, 3)
+        step = max(1, min(width // size[0], height // size[1]) // 2)
+        gray = cv2.cvtColor(np.ascontiguousarray(image[::step, ::step]), cv2.COLOR_RGB2GRAY)
+    else:
+        gray = cv2.imdecode(np.frombuffer(buf, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if gray is None:
+            return None
+
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
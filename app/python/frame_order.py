@@ -0,0 +1,53 @@
+import threading
+
+from config import FRAME_REORDER_TIMEOUT
+
+
+class FrameOrder:
+    """Puts one stream's frames back in arrival order after detection.
+
+    Each frame takes a `ticket()` when it arrives. Detection can finish out
+    of order (concurrent requests, detection processes), so before a frame
+    updates the stream's window it `wait()`s until every earlier ticket is
+    `done()`. If an earlier frame is still out after `timeout` seconds, the
+    waiting frame goes first, and the earlier one is reported as late when it
+    finishes.
+
+    Shares the stream's SequenceState lock; every method is called with it held.
+    """
+
+    def __init__(self, lock, timeout=FRAME_REORDER_TIMEOUT):
+        self.turn = threading.Condition(lock)
+        self.timeout = timeout
+        self.issued = 0
+        self.applied = 0  # every ticket below this is done (or was given up on)
+        self.finished = set()  # done tickets still waiting for an earlier one
+        self.timeouts = 0
+        self.late = 0
+
+    def ticket(self):
+        ticket = self.issued
+        self.issued += 1
+        return ticket
+
+    def wait(self, ticket):
+        """Block until it is `ticket`'s turn; False if a later frame already went ahead of it"""
+        if not self.turn.wait_for(lambda: self.applied >= ticket, self.timeout):
+            # Give up on the frames still ahead of this one
+            self.timeouts += 1
+            self.applied = ticket
+            self.finished = {t for t in self.finished if t > ticket}
+        if self.applied > ticket:
+            self.late += 1
+            return False
+        return True
+
+    def done(self, ticket):
+        """Mark `ticket` finished (applied, failed or late), releasing the frames after it"""
+        if ticket < self.applied:
+            return
+        self.finished.add(ticket)
+        while self.applied in self.finished:
+            self.finished.remove(self.applied)
+            self.applied += 1
+        self.turn.notify_all()
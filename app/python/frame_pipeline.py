@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+
+class FramePipeline:
+    """Bounded ingest queue in front of dedicated inference worker threads.
+
+    Request handlers `submit()` frames and return straight away with the
+    latest available result instead of blocking on decode/MediaPipe/LSTM.
+    When inference falls behind, stale frames are dropped so each stream's
+    newest frame is always the next one processed for that stream:
+
+    - 'latest': a new frame replaces any frame from the same stream (`key`)
+      that is still queued; streams are served in arrival order
+    - 'oldest': frames are processed in order; the oldest is dropped when the queue is full
+
+    With several workers, frames from different streams run concurrently
+    but a stream never has more than one frame in flight, so its frames
+    are still processed in order.
+    """
+
+    def __init__(self, handler, maxsize=2, policy='latest', workers=1):
+        if policy not in ('latest', 'oldest'):
+            raise ValueError(f"Unknown pipeline drop policy: {policy}")
+        self.handler = handler
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.running = False
+        self.workers = max(1, workers)
+        self.threads = []
+        self.active = set()  # keys with a frame currently being processed
+
+        self.next_frame_id = 0
+        self.results = {}  # key -> (frame_id, result) of the last processed frame
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        with self.cond:
+            if self.running:
+                return
+            self.running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'frame-pipeline-{i}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=5)
+        self.threads = []
+
+    def submit(self, job, callback=None, key=None):
+        """Queue `job` for the worker and return its frame id.
+
+        `key` identifies the stream the frame belongs to. `callback(result)`
+        is called from the worker thread once the frame has been processed;
+        it is never called for dropped frames.
+        """
+        with self.cond:
+            self.next_frame_id += 1
+            frame_id = self.next_frame_id
+            if self.policy == 'latest':
+                stale = [item for item in self.queue if item[1] == key]
+                for item in stale:
+                    self.queue.remove(item)
+                self.dropped += len(stale)
+            if len(self.queue) >= self.maxsize:
+                self.queue.popleft()
+                self.dropped += 1
+            self.queue.append((frame_id, key, job, callback))
+            self.submitted += 1
+            self.cond.notify_all()
+        return frame_id
+
+    def latest(self, key=None, min_frame_id=0, timeout=0.0):
+        """Return (frame_id, result) for the stream's most recently processed frame.
+
+        If `timeout` > 0, wait up to that long for a frame with id >=
+        `min_frame_id` to finish first. Returns (0, None) if nothing has
+        been processed for `key` yet.
+        """
+        with self.cond:
+            if timeout > 0:
+                self.cond.wait_for(lambda: self.results.get(key, (0, None))[0] >= min_frame_id, timeout)
+            return self.results.get(key, (0, None))
+
+    def forget(self, key):
+        """Drop the stored result and any queued frames (counted as dropped) for `key`"""
+        with self.cond:
+            self.results.pop(key, None)
+            stale = [item for item in self.queue if item[1] == key]
+            for item in stale:
+                self.queue.remove(item)
+            self.dropped += len(stale)
+            self.cond.notify_all()
+
+    def depth(self):
+        with self.cond:
+            return len(self.queue)
+
+    def stats(self):
+        with self.cond:
+            return {
+                'policy': self.policy,
+                'workers': self.workers,
+                'queue_size': self.maxsize,
+                'queue_depth': len(self.queue),
+                'submitted': self.submitted,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'busy_seconds': round(self.busy_seconds, 3),
+            }
+
+    def _ready_item(self):
+        """Oldest queued item whose stream has no frame in flight, or None"""
+        for item in self.queue:
+            if item[1] not in self.active:
+                return item
+        return None
+
+    def _next(self):
+        """Wait for work; return (frame_id, key, job, callback) or None when stopping"""
+        with self.cond:
+            self.cond.wait_for(lambda: self._ready_item() is not None or not self.running)
+            if not self.running:
+                return None
+            item = self._ready_item()
+            self.queue.remove(item)
+            self.active.add(item[1])
+            return item
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            frame_id, key, job, callback = item
+
+            start = time.perf_counter()
+            try:
+                result = self.handler(job)
+            except Exception as e:
+                log.error("Error in frame pipeline: %s", e)
+                result = {'success': False, 'error': str(e)}
+                with self.cond:
+                    self.errors += 1
+            elapsed = time.perf_counter() - start
+
+            with self.cond:
+                self.active.discard(key)
+                self.results[key] = (frame_id, result)
+                self.processed += 1
+                self.busy_seconds += elapsed
+                self.cond.notify_all()
+
+            if callback:
+                try:
+                    callback(result)
+                except Exception as e:
+                    log.error("Error delivering pipeline result: %s", e)
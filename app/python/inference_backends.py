@@ -0,0 +1,85 @@
+import threading
+
+import numpy as np
+
+BACKENDS = ('keras', 'tflite', 'onnx')
+
+
+class KerasBackend:
+    """Runs the original Keras model (pulls in all of TensorFlow)"""
+
+    name = 'keras'
+
+    def __init__(self, path):
+        from tensorflow import keras
+        self.model = keras.models.load_model(path)
+        self.input_shape = tuple(self.model.input_shape)
+        self.output_shape = tuple(self.model.output_shape)
+
+    def predict_on_batch(self, batch):
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+class TFLiteBackend:
+    """Runs a .tflite export with the TFLite interpreter.
+
+    Uses the standalone `tflite_runtime` package when it is installed and
+    falls back to `tf.lite` otherwise. The LSTM export has a fixed batch
+    size of 1, so batches are run one window at a time. The interpreter
+    isn't thread-safe, so calls from several workers take turns.
+    """
+
+    name = 'tflite'
+
+    def __init__(self, path):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.interpreter = Interpreter(model_path=path)
+        self.interpreter.allocate_tensors()
+        self.lock = threading.Lock()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.input_shape = (None,) + tuple(int(d) for d in self.input['shape'][1:])
+        self.output_shape = (None,) + tuple(int(d) for d in self.output['shape'][1:])
+
+    def predict_on_batch(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        output = np.empty((len(batch),) + self.output_shape[1:], dtype=np.float32)
+        with self.lock:
+            for i in range(len(batch)):
+                self.interpreter.set_tensor(self.input['index'], batch[i:i + 1])
+                self.interpreter.invoke()
+                output[i] = self.interpreter.get_tensor(self.output['index'])[0]
+        return output
+
+
+class OnnxBackend:
+    """Runs an .onnx export with ONNX Runtime (dynamic batch size)"""
+
+    name = 'onnx'
+
+    def __init__(self, path):
+        import onnxruntime as ort
+        self.session = ort.InferenceSession(path, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        # Symbolic dimensions (the batch size) are reported as strings
+        self.input_shape = tuple(d if isinstance(d, int) else None for d in self.session.get_inputs()[0].shape)
+        self.output_shape = tuple(d if isinstance(d, int) else None for d in self.session.get_outputs()[0].shape)
+
+    def predict_on_batch(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+def load_backend(name, path):
+    """Load the model at `path` with the named backend ('keras', 'tflite' or 'onnx')"""
+    if name == 'keras':
+        return KerasBackend(path)
+    if name == 'tflite':
+        return TFLiteBackend(path)
+    if name == 'onnx':
+        return OnnxBackend(path)
+    raise ValueError(f"Unknown inference backend: {name} (expected one of {', '.join(BACKENDS)})")
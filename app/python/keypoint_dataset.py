@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Packed keypoint dataset: one memory-mapped float32 file per class.
+
+Layout of a dataset directory:
+
+    index.json        sequence length, keypoint dim, and per class its label,
+                      data file, sequence count and the source of each sequence
+    <action>.f32      raw float32 array of shape (count, SEQUENCE_LENGTH, KEYPOINT_DIM)
+
+The data files are plain row-major float32, so adding sequences appends to
+the file and rewrites index.json. KeypointDataset maps the files read-only
+and hands out sequences as views, so a dataset never has to fit in memory.
+`pack` converts the training notebook's MP_Data tree (one .npy per frame),
+adding only sequences that are not in the dataset yet.
+
+Usage: python keypoint_dataset.py pack [--mp-data MP_Data] [--output dataset]
+       python keypoint_dataset.py info [--dataset dataset]
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from config import ACTIONS, SEQUENCE_LENGTH, KEYPOINT_DIM
+
+INDEX_FILE = 'index.json'
+FORMAT_VERSION = 1
+
+
+class DatasetWriter:
+    """Appends (sequence_length, keypoint_dim) sequences to a dataset directory.
+
+    Opening an existing dataset continues it; bytes a crashed writer left
+    beyond the last indexed sequence are truncated. The index is only
+    rewritten by close(), so a sequence counts once it has been written
+    and the writer closed.
+    """
+
+    def __init__(self, path, actions=ACTIONS, sequence_length=SEQUENCE_LENGTH, keypoint_dim=KEYPOINT_DIM):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self.index = json.load(f)
+            if (self.index['sequence_length'], self.index['keypoint_dim']) != (sequence_length, keypoint_dim):
+                raise ValueError(f"{path} holds ({self.index['sequence_length']}, {self.index['keypoint_dim']}) "
+                                 f"sequences, not ({sequence_length}, {keypoint_dim})")
+        else:
+            self.index = {
+                'version': FORMAT_VERSION,
+                'dtype': 'float32',
+                'sequence_length': sequence_length,
+                'keypoint_dim': keypoint_dim,
+                'classes': {},
+            }
+        for action in actions:
+            if action not in self.index['classes']:
+                self.index['classes'][action] = {
+                    'label': len(self.index['classes']),
+                    'file': f'{action}.f32',
+                    'count': 0,
+                    'sources': [],
+                }
+        self.row_bytes = sequence_length * keypoint_dim * 4
+        self.files = {}
+
+    def _file(self, action):
+        handle = self.files.get(action)
+        if handle is None:
+            entry = self.index['classes'][action]
+            file_path = os.path.join(self.path, entry['file'])
+            handle = open(file_path, 'r+b' if os.path.exists(file_path) else 'w+b')
+            # Drop anything a previous writer wrote but never indexed
+            handle.truncate(entry['count'] * self.row_bytes)
+            handle.seek(0, os.SEEK_END)
+            self.files[action] = handle
+        return handle
+
+    def sources(self, action):
+        return set(self.index['classes'][action]['sources'])
+
+    def add(self, action, sequence, source=None):
+        """Append one sequence of `action`; `source` identifies where it came from"""
+        entry = self.index['classes'].get(action)
+        if entry is None:
+            raise ValueError(f"Unknown action {action!r}")
+        sequence = np.ascontiguousarray(sequence, dtype=np.float32)
+        if sequence.shape != (self.index['sequence_length'], self.index['keypoint_dim']):
+            raise ValueError(f"Expected a {(self.index['sequence_length'], self.index['keypoint_dim'])} "
+                             f"sequence, got {sequence.shape}")
+        self._file(action).write(sequence.data)
+        entry['count'] += 1
+        entry['sources'].append(source)
+
+    def close(self):
+        for handle in self.files.values():
+            handle.flush()
+            os.fsync(handle.fileno())
+            handle.close()
+        self.files = {}
+        tmp_path = os.path.join(self.path, INDEX_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=1)
+        os.replace(tmp_path, os.path.join(self.path, INDEX_FILE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class KeypointDataset:
+    """Read-only view of a packed dataset.
+
+    `dataset[i]` is the i-th sequence as a view into its class file, and
+    `labels[i]` its class label. Sequences are numbered class by class in
+    label order.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.sequence_length = self.index['sequence_length']
+        self.keypoint_dim = self.index['keypoint_dim']
+
+        classes = sorted(self.index['classes'].items(), key=lambda item: item[1]['label'])
+        self.actions = [action for action, _ in classes]
+        self.arrays = []
+        offsets = [0]
+        labels = []
+        for action, entry in classes:
+            count = entry['count']
+            if count:
+                array = np.memmap(os.path.join(path, entry['file']), dtype=np.float32, mode='r',
+                                  shape=(count, self.sequence_length, self.keypoint_dim))
+            else:
+                array = np.empty((0, self.sequence_length, self.keypoint_dim), dtype=np.float32)
+            self.arrays.append(array)
+            offsets.append(offsets[-1] + count)
+            labels.append(np.full(count, entry['label'], dtype=np.int64))
+        # Start index of each class in the global numbering
+        self.offsets = np.asarray(offsets)
+        self.labels = np.concatenate(labels) if labels else np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def locate(self, i):
+        """(class position, row in that class's file) of global sequence `i`"""
+        position = int(np.searchsorted(self.offsets, i, side='right')) - 1
+        return position, i - int(self.offsets[position])
+
+    def __getitem__(self, i):
+        position, row = self.locate(i)
+        return self.arrays[position][row]
+
+    def gather(self, indices, out=None, features=None):
+        """Copy the sequences at `indices` into `out` (allocated if None), reading each class file in order.
+
+        `features` optionally selects keypoint columns (e.g. a feature
+        profile's `indices`).
+        """
+        indices = np.asarray(indices)
+        width = self.keypoint_dim if features is None else len(features)
+        if out is None:
+            out = np.empty((len(indices), self.sequence_length, width), dtype=np.float32)
+        positions = np.searchsorted(self.offsets, indices, side='right') - 1
+        for position in np.unique(positions):
+            slots = np.nonzero(positions == position)[0]
+            rows = indices[slots] - self.offsets[position]
+            order = np.argsort(rows)
+            block = self.arrays[position][rows[order]]
+            out[slots[order]] = block if features is None else np.take(block, features, axis=-1)
+        return out
+
+    def split(self, test_size=0.05, seed=0):
+        """Shuffled (train, test) index arrays, stratified by class"""
+        rng = np.random.default_rng(seed)
+        train, test = [], []
+        for position in range(len(self.arrays)):
+            indices = np.arange(self.offsets[position], self.offsets[position + 1])
+            rng.shuffle(indices)
+            n_test = int(round(len(indices) * test_size))
+            test.append(indices[:n_test])
+            train.append(indices[n_test:])
+        return rng.permutation(np.concatenate(train)), rng.permutation(np.concatenate(test))
+
+    def one_hot(self, indices):
+        return np.eye(len(self.actions), dtype=np.float32)[self.labels[np.asarray(indices)]]
+
+    def batches(self, indices=None, batch_size=32, shuffle=True, seed=None, features=None):
+        """Yield (x, y) batches over `indices` (default: all) once, y one-hot"""
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices)
+        if shuffle:
+            indices = np.random.default_rng(seed).permutation(indices)
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start:start + batch_size]
+            yield self.gather(batch, features=features), self.one_hot(batch)
+
+
+def keras_sequence(dataset, indices=None, batch_size=32, shuffle=True, seed=None, features=None):
+    """A keras.utils.Sequence over `dataset` for model.fit(), reshuffled every epoch"""
+    from tensorflow import keras
+
+    class KeypointSequence(keras.utils.Sequence):
+        def __init__(self):
+            super().__init__()
+            self.indices = np.arange(len(dataset)) if indices is None else np.asarray(indices)
+            self.rng = np.random.default_rng(seed)
+            self.order = self.rng.permutation(self.indices) if shuffle else self.indices
+
+        def __len__(self):
+            return (len(self.indices) + batch_size - 1) // batch_size
+
+        def __getitem__(self, i):
+            batch = self.order[i * batch_size:(i + 1) * batch_size]
+            return dataset.gather(batch, features=features), dataset.one_hot(batch)
+
+        def on_epoch_end(self):
+            if shuffle:
+                self.order = self.rng.permutation(self.indices)
+
+    return KeypointSequence()
+
+
+def pack_mp_data(mp_data, output, actions=ACTIONS, sequence_length=SEQUENCE_LENGTH):
+    """Append every complete MP_Data/<action>/<sequence>/ folder not yet in `output`.
+
+    Folders without exactly `sequence_length` frames are skipped, like the
+    training notebook does. Returns {action: sequences added}.
+    """
+    added = {}
+    buffer = np.empty((sequence_length, KEYPOINT_DIM), dtype=np.float32)
+    with DatasetWriter(output, actions, sequence_length) as writer:
+        for action in actions:
+            action_path = os.path.join(mp_data, action)
+            added[action] = 0
+            if not os.path.isdir(action_path):
+                continue
+            done = writer.sources(action)
+            for folder in sorted((f for f in os.listdir(action_path) if f.isdigit()), key=int):
+                if folder in done:
+                    continue
+                folder_path = os.path.join(action_path, folder)
+                frames = [f for f in os.listdir(folder_path) if f.endswith('.npy')]
+                if len(frames) != sequence_length:
+                    continue
+                for frame_num in range(sequence_length):
+                    buffer[frame_num] = np.load(os.path.join(folder_path, f'{frame_num}.npy'))
+                writer.add(action, buffer, source=folder)
+                added[action] += 1
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    pack = commands.add_parser('pack', help='Pack (or add new sequences from) an MP_Data tree')
+    pack.add_argument('--mp-data', default='MP_Data', help='MP_Data folder with <action>/<sequence>/<frame>.npy')
+    pack.add_argument('--output', default='dataset', help='Dataset directory to create or extend')
+    pack.add_argument('--actions', nargs='+', default=ACTIONS, help='Actions, in label order')
+    info = commands.add_parser('info', help='Describe a packed dataset')
+    info.add_argument('--dataset', default='dataset', help='Dataset directory')
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        added = pack_mp_data(args.mp_data, args.output, args.actions)
+        for action, count in added.items():
+            print(f"{action}: {count} sequences added")
+        args.dataset = args.output
+
+    dataset = KeypointDataset(args.dataset)
+    print(f"{args.dataset}: {len(dataset)} sequences of ({dataset.sequence_length}, {dataset.keypoint_dim})")
+    for position, action in enumerate(dataset.actions):
+        count = int(dataset.offsets[position + 1] - dataset.offsets[position])
+        size = count * dataset.sequence_length * dataset.keypoint_dim * 4
+        print(f"  {action} (label {position}): {count} sequences, {size / 2**20:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
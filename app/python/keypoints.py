@@ -0,0 +1,76 @@
+from collections import namedtuple
+from itertools import chain
+from operator import attrgetter
+
+import numpy as np
+
+from config import KEYPOINT_DIM
+
+# Landmark groups in the order the training notebook concatenated them:
+# (payload name, MediaPipe results attribute, landmark count, values per landmark)
+LANDMARK_GROUPS = (
+    ('pose', 'pose_landmarks', 33, 4),
+    ('face', 'face_landmarks', 468, 3),
+    ('left_hand', 'left_hand_landmarks', 21, 3),
+    ('right_hand', 'right_hand_landmarks', 21, 3),
+)
+
+_GETTERS = {
+    3: attrgetter('x', 'y', 'z'),
+    4: attrgetter('x', 'y', 'z', 'visibility'),
+}
+
+
+def _group_layout():
+    layout = []
+    start = 0
+    for name, attr, count, width in LANDMARK_GROUPS:
+        layout.append((name, attr, count, width, start, start + count * width))
+        start += count * width
+    return layout
+
+
+# (name, attr, count, width, start, end) offsets into the flat keypoint vector
+GROUP_LAYOUT = _group_layout()
+
+assert GROUP_LAYOUT[-1][-1] == KEYPOINT_DIM, "LANDMARK_GROUPS must add up to KEYPOINT_DIM"
+
+# Stand-in for MediaPipe results when the keypoints were extracted elsewhere
+# (e.g. in a detection process): each *_landmarks field only says whether the
+# group was detected, which is all serialization and cropping look at
+DetectedGroups = namedtuple('DetectedGroups', [attr for _, attr, _, _ in LANDMARK_GROUPS])
+
+
+def extract_keypoints(results, out=None):
+    """Fill a float32 keypoint vector from MediaPipe results in a single pass.
+
+    Layout matches the notebook's `np.concatenate([pose, face, lh, rh])`;
+    groups that were not detected are zeroed. Pass `out` to reuse a
+    preallocated (KEYPOINT_DIM,) buffer.
+    """
+    if out is None:
+        out = np.empty(KEYPOINT_DIM, dtype=np.float32)
+
+    for name, attr, count, width, start, end in GROUP_LAYOUT:
+        landmarks = getattr(results, attr)
+        if landmarks:
+            values = chain.from_iterable(map(_GETTERS[width], landmarks.landmark))
+            out[start:end] = np.fromiter(values, dtype=np.float32, count=end - start)
+        else:
+            out[start:end] = 0.0
+
+    return out
+
+
+def detected_groups(results):
+    """Names of the landmark groups MediaPipe found in `results`"""
+    return [name for name, attr, _, _, _, _ in GROUP_LAYOUT if getattr(results, attr)]
+
+
+def serialize_landmarks(results, keypoints):
+    """Build the JSON landmark payload by slicing an already extracted keypoint vector"""
+    landmarks = {}
+    for name, attr, count, width, start, end in GROUP_LAYOUT:
+        if getattr(results, attr):
+            landmarks[name] = keypoints[start:end].reshape(count, width).tolist()
+    return landmarks
@@ -0,0 +1,147 @@
+import base64
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+from config import LANDMARK_KEYFRAME_INTERVAL
+from keypoints import GROUP_LAYOUT
+
+GROUP_NAMES = tuple(name for name, _, _, _, _, _ in GROUP_LAYOUT)
+GROUP_ALIASES = {
+    'all': GROUP_NAMES,
+    'none': (),
+    'hands': ('left_hand', 'right_hand'),
+}
+ENCODINGS = ('json', 'float16', 'uint16')
+
+# uint16 coordinates cover this range (values outside it are clipped): about
+# 6e-5 per step, well under a pixel for normalized x/y at camera resolutions.
+QUANT_MIN = -2.0
+QUANT_MAX = 2.0
+_QUANT_SCALE = 65535 / (QUANT_MAX - QUANT_MIN)
+
+# groups: landmark group names to include; encoding: one of ENCODINGS;
+# delta: (uint16 only) send the difference to the previous frame of the session
+LandmarkFormat = namedtuple('LandmarkFormat', ('groups', 'encoding', 'delta'))
+
+DEFAULT_FORMAT = LandmarkFormat(GROUP_NAMES, 'json', False)
+
+
+def parse_landmark_format(groups=None, encoding=None, delta=None):
+    """Build a LandmarkFormat from request options, raising ValueError on unknown values.
+
+    `groups` is a list or comma-separated string of group names or aliases
+    ('all', 'none', 'hands'); omitted options keep the backward-compatible
+    default (every group as nested JSON lists).
+    """
+    if groups is None:
+        selected = GROUP_NAMES
+    else:
+        if isinstance(groups, str):
+            groups = [g for g in groups.split(',') if g.strip()]
+        wanted = set()
+        for group in groups:
+            group = str(group).strip()
+            if group in GROUP_ALIASES:
+                wanted.update(GROUP_ALIASES[group])
+            elif group in GROUP_NAMES:
+                wanted.add(group)
+            else:
+                raise ValueError(f"Unknown landmark group: {group}")
+        selected = tuple(name for name in GROUP_NAMES if name in wanted)
+
+    encoding = encoding or 'json'
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown landmark encoding: {encoding} (expected one of {', '.join(ENCODINGS)})")
+
+    if isinstance(delta, str):
+        delta = delta.lower() in ('1', 'true', 'yes')
+    delta = bool(delta) and encoding == 'uint16'
+
+    fmt = LandmarkFormat(selected, encoding, delta)
+    return DEFAULT_FORMAT if fmt == DEFAULT_FORMAT else fmt
+
+
+class DeltaState:
+    """Last uint16 landmark frame sent for a session, for delta encoding"""
+
+    __slots__ = ('seq', 'groups', 'values', 'since_keyframe')
+
+    def __init__(self):
+        self.seq = 0
+        self.groups = None
+        self.values = None
+        self.since_keyframe = 0
+
+
+def quantize(values):
+    """Map float coordinates to uint16 over [QUANT_MIN, QUANT_MAX]"""
+    scaled = (np.clip(values, QUANT_MIN, QUANT_MAX) - QUANT_MIN) * _QUANT_SCALE
+    return np.rint(scaled).astype('<u2')
+
+
+def encode_landmarks(results, keypoints, fmt=DEFAULT_FORMAT, delta_state=None):
+    """Build the landmark payload for the detected groups selected by `fmt`.
+
+    'json' returns {group: [[x, y, z(, visibility)], ...]} as before. The
+    compact encodings return a single blob of the selected groups' values
+    in layout order:
+
+        {"encoding": "float16" | "uint16", "groups": [[name, count, width], ...],
+         "data": base64, "seq": n, "ref": n | null, "compression": null | "zlib",
+         "range": [QUANT_MIN, QUANT_MAX]  (uint16 only)}
+
+    With `fmt.delta`, `data` is the zlib-compressed uint16 difference (mod
+    2**16) to the frame with seq `ref`; a keyframe (`ref` null) is sent
+    when the groups change and every LANDMARK_KEYFRAME_INTERVAL frames.
+    `delta_state` carries the previous frame and must be per session.
+    """
+    if not fmt.groups:
+        return {}
+
+    groups = [layout for layout in GROUP_LAYOUT if layout[0] in fmt.groups and getattr(results, layout[1])]
+
+    if fmt.encoding == 'json':
+        return {name: keypoints[start:end].reshape(count, width).tolist()
+                for name, _, count, width, start, end in groups}
+
+    if not groups:
+        values = np.empty(0, dtype=np.float32)
+    elif len(groups) == 1:
+        values = keypoints[groups[0][4]:groups[0][5]]
+    else:
+        values = np.concatenate([keypoints[start:end] for _, _, _, _, start, end in groups])
+
+    payload = {
+        'encoding': fmt.encoding,
+        'groups': [[name, count, width] for name, _, count, width, _, _ in groups],
+        'seq': None,
+        'ref': None,
+        'compression': None,
+    }
+
+    if fmt.encoding == 'float16':
+        data = values.astype('<f2').tobytes()
+    else:
+        payload['range'] = [QUANT_MIN, QUANT_MAX]
+        quantized = quantize(values)
+        data = quantized.tobytes()
+        if fmt.delta and delta_state is not None:
+            names = tuple(g[0] for g in groups)
+            delta_state.seq += 1
+            if (delta_state.groups == names
+                    and delta_state.since_keyframe < LANDMARK_KEYFRAME_INTERVAL):
+                payload['ref'] = delta_state.seq - 1
+                data = (quantized - delta_state.values).tobytes()  # wraps mod 2**16
+                delta_state.since_keyframe += 1
+            else:
+                delta_state.since_keyframe = 0
+            payload['seq'] = delta_state.seq
+            payload['compression'] = 'zlib'
+            data = zlib.compress(data, 1)
+            delta_state.groups = names
+            delta_state.values = quantized
+
+    payload['data'] = base64.b64encode(data).decode('ascii')
+    return payload
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+HTTP load generator for the bridge service.
+
+Opens N simulated camera clients. Each one POSTs JPEG frames to
+/process_frame (a base64 data URL in JSON, like the Electron preview) or,
+with --binary, to /process_frame/binary. Clients send at a fixed frame
+rate with one request in flight, like a camera loop that waits for the
+previous result. A tick that comes while a request is still running is
+skipped and counted, the way a real client drops a frame.
+
+Every client uses its own session ID. The generator samples /health and
+/sessions once per --interval and records a timeline with, per interval:
+- requests, errors and timeouts
+- client latency p50/p95/p99 and achieved fps
+- pipeline drops and queue depth
+- how many frames the server actually ran for the test sessions, and how
+  full their sequence windows are
+
+The summary and timeline are printed and can be written as JSON.
+
+To measure the server and transport without TensorFlow/MediaPipe, start
+the bridge with the stub model:
+
+    BRIDGE_STUB_MODEL=1 python bridge_service.py
+
+Usage: python load_test.py [--url http://localhost:5001] [--clients 4] [--fps 10]
+                           [--duration 30] [--frames-dir DIR] [--output result.json]
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from benchmark_pipeline import recorded_frames, synthetic_frames
+from config import SERVER_HOST, SERVER_PORT
+
+SESSION_PREFIX = 'loadtest-'
+
+
+class Client(threading.Thread):
+    """One simulated camera: sends a frame every 1/fps seconds, one request at a time"""
+
+    def __init__(self, index, args, frames, start_at, stop_at, results):
+        super().__init__(name=f'load-client-{index}', daemon=True)
+        self.session_id = f'{SESSION_PREFIX}{index}'
+        self.args = args
+        self.frames = frames
+        self.offset = index * 7  # clients don't send identical frame sequences
+        # Stagger the first frame of each client across one frame interval
+        self.start_at = start_at + (index / args.clients) / args.fps
+        self.stop_at = stop_at
+        self.results = results  # shared list of (sent_at, latency, outcome, detected)
+        self.skipped = 0
+        self.connection = None
+
+    def _connect(self):
+        url = urlsplit(self.args.url)
+        self.connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=self.args.timeout)
+
+    def _request(self, frame):
+        if self.args.binary:
+            path = f'/process_frame/binary?session_id={self.session_id}'
+            body, headers = frame, {'Content-Type': 'image/jpeg'}
+        else:
+            path = '/process_frame'
+            data_url = 'data:image/jpeg;base64,' + base64.b64encode(frame).decode('ascii')
+            body = json.dumps({'frame': data_url, 'session_id': self.session_id})
+            headers = {'Content-Type': 'application/json'}
+
+        if self.connection is None:
+            self._connect()
+        try:
+            self.connection.request('POST', path, body, headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+        except Exception:
+            # Reconnect on the next frame rather than reusing a broken socket
+            self.connection.close()
+            self.connection = None
+            raise
+        if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+            self.connection.close()
+            self.connection = None
+        return response.status, payload
+
+    def run(self):
+        interval = 1.0 / self.args.fps
+        next_tick = self.start_at
+        count = 0
+        while True:
+            now = time.time()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+            if next_tick >= self.stop_at:
+                break
+
+            sent_at = time.time()
+            frame = self.frames[(self.offset + count) % len(self.frames)]
+            count += 1
+            try:
+                status, payload = self._request(frame)
+                latency = time.time() - sent_at
+                if status == 200:
+                    result = json.loads(payload)
+                    outcome = 'ok' if result.get('success') else 'error'
+                    detected = bool(result.get('detected'))
+                else:
+                    outcome, detected = f'http_{status}', False
+            except (TimeoutError, OSError) as e:
+                latency = time.time() - sent_at
+                outcome = 'timeout' if isinstance(e, TimeoutError) else 'error'
+                detected = False
+            self.results.append((sent_at, latency, outcome, detected))
+
+            # Ticks missed while the request was running are dropped frames
+            next_tick += interval
+            missed = int((time.time() - next_tick) // interval) + 1 if time.time() > next_tick else 0
+            if missed:
+                self.skipped += missed
+                next_tick += missed * interval
+
+        if self.connection is not None:
+            self.connection.close()
+
+
+def get_json(url, path, timeout=5.0):
+    """GET a bridge JSON endpoint; None if it can't be reached"""
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+    try:
+        connection.request('GET', path)
+        return json.loads(connection.getresponse().read())
+    except (OSError, ValueError):
+        return None
+    finally:
+        connection.close()
+
+
+def wait_ready(url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        health = get_json(url, '/health')
+        if health and health.get('ready'):
+            return health
+        time.sleep(0.5)
+    return None
+
+
+def sample_server(url):
+    """Pipeline and test-session counters at this moment"""
+    health = get_json(url, '/health') or {}
+    listing = get_json(url, '/sessions') or {}
+    test_sessions = [s for s in listing.get('session_list', []) if s['session_id'].startswith(SESSION_PREFIX)]
+    pipeline = health.get('pipeline') or {}
+    return {
+        'time': time.time(),
+        'pipeline_dropped': pipeline.get('dropped', 0),
+        'pipeline_queue_depth': pipeline.get('queue_depth', 0),
+        'sessions': len(test_sessions),
+        'processed': sum(s['frames'] for s in test_sessions),
+        'buffered': [s['buffered'] for s in test_sessions],
+    }
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    values = np.asarray(latencies) * 1000
+    return {f'p{q}_ms': round(float(np.percentile(values, q)), 2) for q in (50, 95, 99)}
+
+
+def build_timeline(results, samples, start):
+    """Per-interval client and server statistics"""
+    timeline = []
+    for previous, sample in zip(samples, samples[1:]):
+        window = [r for r in results if previous['time'] <= r[0] < sample['time']]
+        ok = [r for r in window if r[2] == 'ok']
+        span = sample['time'] - previous['time']
+        entry = {
+            't': round(sample['time'] - start, 1),
+            'requests': len(window),
+            'ok': len(ok),
+            'errors': sum(1 for r in window if r[2] not in ('ok', 'timeout')),
+            'timeouts': sum(1 for r in window if r[2] == 'timeout'),
+            'sent_fps': round(len(window) / span, 1),
+            'server_fps': round((sample['processed'] - previous['processed']) / span, 1),
+            'pipeline_dropped': sample['pipeline_dropped'] - previous['pipeline_dropped'],
+            'queue_depth': sample['pipeline_queue_depth'],
+            'sessions': sample['sessions'],
+            'buffered_min': min(sample['buffered']) if sample['buffered'] else 0,
+            'detected': sum(1 for r in ok if r[3]),
+        }
+        entry.update(percentiles([r[1] for r in ok]))
+        timeline.append(entry)
+    return timeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=f'http://{SERVER_HOST}:{SERVER_PORT}', help='Bridge base URL')
+    parser.add_argument('--clients', type=int, default=4, help='Simulated camera clients')
+    parser.add_argument('--fps', type=float, default=10.0, help='Frames per second per client')
+    parser.add_argument('--duration', type=float, default=30.0, help='Test length in seconds')
+    parser.add_argument('--timeout', type=float, default=5.0, help='Request timeout in seconds')
+    parser.add_argument('--interval', type=float, default=1.0, help='Timeline sampling interval in seconds')
+    parser.add_argument('--binary', action='store_true', help='POST raw JPEG bytes to /process_frame/binary')
+    parser.add_argument('--frames-dir', help='Directory of recorded JPEG frames (default: synthetic)')
+    parser.add_argument('--width', type=int, default=640, help='Synthetic frame width')
+    parser.add_argument('--height', type=int, default=480, help='Synthetic frame height')
+    parser.add_argument('--quality', type=int, default=80, help='Synthetic JPEG quality')
+    parser.add_argument('--wait-ready', type=float, default=120.0, help='Seconds to wait for /health to report ready')
+    parser.add_argument('--output', help='Write the summary and timeline as JSON to this path')
+    args = parser.parse_args()
+
+    if args.frames_dir:
+        frames = recorded_frames(args.frames_dir, 1000)
+    else:
+        frames = synthetic_frames(60, args.width, args.height, args.quality)
+    print(f"{len(frames)} frames, {np.mean([len(f) for f in frames]) / 1024:.1f} KB average JPEG")
+
+    health = wait_ready(args.url, args.wait_ready)
+    if health is None:
+        raise SystemExit(f"Bridge at {args.url} did not report ready within {args.wait_ready:.0f}s")
+    print(f"Bridge ready ({health.get('backend')} backend); "
+          f"{args.clients} clients x {args.fps:g} fps for {args.duration:g}s")
+
+    results = []
+    start = time.time() + 0.5
+    stop = start + args.duration
+    clients = [Client(i, args, frames, start, stop, results) for i in range(args.clients)]
+    for client in clients:
+        client.start()
+
+    samples = []
+    time.sleep(max(0.0, start - time.time()))
+    next_sample = start
+    while next_sample <= stop + args.interval:
+        samples.append(sample_server(args.url))
+        next_sample += args.interval
+        time.sleep(max(0.0, next_sample - time.time()))
+        if next_sample > stop and not any(c.is_alive() for c in clients):
+            samples.append(sample_server(args.url))
+            break
+    for client in clients:
+        client.join(args.timeout + 1)
+
+    timeline = build_timeline(results, samples, start)
+    ok = [r for r in results if r[2] == 'ok']
+    total = len(results)
+    elapsed = max(r[0] + r[1] for r in results) - start if results else args.duration
+    processed = samples[-1]['processed'] - samples[0]['processed'] if len(samples) > 1 else 0
+    summary = {
+        'url': args.url,
+        'endpoint': '/process_frame/binary' if args.binary else '/process_frame',
+        'backend': health.get('backend'),
+        'clients': args.clients,
+        'target_fps_per_client': args.fps,
+        'duration_seconds': args.duration,
+        'requests': total,
+        'skipped_ticks': sum(c.skipped for c in clients),
+        'sent_fps': round(total / elapsed, 1) if elapsed > 0 else 0.0,
+        'error_rate': round(sum(1 for r in results if r[2] not in ('ok', 'timeout')) / total, 4) if total else 0.0,
+        'timeout_rate': round(sum(1 for r in results if r[2] == 'timeout') / total, 4) if total else 0.0,
+        'outcomes': {outcome: sum(1 for r in results if r[2] == outcome) for outcome in sorted({r[2] for r in results})},
+        'server_processed': processed,
+        'server_processed_fraction': round(processed / total, 3) if total else 0.0,
+        'latency': dict(percentiles([r[1] for r in ok]),
+                        mean_ms=round(float(np.mean([r[1] for r in ok])) * 1000, 2) if ok else None),
+    }
+
+    print(f"\n{'t':>6} {'req':>5} {'err':>4} {'t/o':>4} {'sent/s':>7} {'srv/s':>6} {'drop':>5} "
+          f"{'queue':>5} {'buf':>4} {'p50 ms':>8} {'p95 ms':>8}")
+    for e in timeline:
+        p50 = f"{e['p50_ms']:.1f}" if e['p50_ms'] is not None else '-'
+        p95 = f"{e['p95_ms']:.1f}" if e['p95_ms'] is not None else '-'
+        print(f"{e['t']:>6.1f} {e['requests']:>5} {e['errors']:>4} {e['timeouts']:>4} {e['sent_fps']:>7.1f} "
+              f"{e['server_fps']:>6.1f} {e['pipeline_dropped']:>5} {e['queue_depth']:>5} {e['buffered_min']:>4} "
+              f"{p50:>8} {p95:>8}")
+
+    latency = summary['latency']
+    print(f"\n{total} requests ({summary['sent_fps']} /s, {summary['skipped_ticks']} ticks skipped), "
+          f"errors {summary['error_rate']:.1%}, timeouts {summary['timeout_rate']:.1%}")
+    if latency['p50_ms'] is not None:
+        print(f"latency p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms, p99 {latency['p99_ms']} ms")
+    print(f"server ran {processed} frames for the test sessions ({summary['server_processed_fraction']:.0%} of requests)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': summary, 'timeline': timeline}, f, indent=2)
+            f.write('\n')
+        print(f"Report written to {args.output}")
+
+    if total == 0 or not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
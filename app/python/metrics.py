@@ -0,0 +1,183 @@
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import nullcontext
+
+from config import METRICS_ENABLED
+
+# Upper bounds (seconds) of the stage latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Frame processing stages, in pipeline order
+STAGES = (
+    'parse',               # request body/options parsing
+    'base64_decode',       # data URL -> JPEG bytes
+    'motion_gate',         # thumbnail + change detection
+    'imdecode',            # cv2.imdecode
+    'roi_crop',            # region of interest crop + downscale
+    'color_convert',       # BGR <-> RGB for MediaPipe
+    'mediapipe',           # holistic.process
+    'extract_keypoints',
+    'predict',             # LSTM (streaming step, batched or windowed predict)
+    'serialize',           # landmark payload
+    'arduino',             # Arduino trigger
+    'frame',               # whole frame, decode to result
+)
+
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus semantics, cumulative on export)"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'stage', 'start')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Per-stage latency histograms and frame counters for the /metrics endpoint.
+
+    Wrap a stage in `with metrics.stage('mediapipe'):`. When disabled,
+    `stage()` returns a shared no-op context manager and `observe()` /
+    `frame_done()` return immediately, so instrumented code costs a
+    method call per stage.
+    """
+
+    def __init__(self, enabled=True, rate_window=64):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {stage: Histogram() for stage in STAGES}
+        self.frames = 0
+        self.frame_times = deque(maxlen=rate_window)  # completion times for frame_rate()
+        self.samples = None  # stage -> raw durations, while recording (benchmarks)
+
+    def stage(self, name):
+        """Context manager that records the time spent in stage `name`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+            if self.samples is not None:
+                self.samples[name].append(seconds)
+
+    def start_recording(self):
+        """Also keep every raw stage duration (for exact percentiles) until stop_recording()"""
+        with self.lock:
+            self.samples = defaultdict(list)
+
+    def stop_recording(self):
+        """Stop recording and return {stage: [seconds, ...]}"""
+        with self.lock:
+            samples, self.samples = self.samples, None
+        return dict(samples or {})
+
+    def frame_done(self):
+        """Count a fully processed frame"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self.lock:
+            self.frames += 1
+            self.frame_times.append(now)
+
+    def frame_rate(self, idle_after=5.0):
+        """Processed frames per second over the recent window (0 when idle)"""
+        with self.lock:
+            if len(self.frame_times) < 2 or time.monotonic() - self.frame_times[-1] > idle_after:
+                return 0.0
+            span = self.frame_times[-1] - self.frame_times[0]
+            return (len(self.frame_times) - 1) / span if span > 0 else 0.0
+
+    def render(self, gauges=(), counters=()):
+        """Prometheus text exposition of the histograms plus the given (name, help, value) gauges/counters"""
+        lines = []
+        with self.lock:
+            frames = self.frames
+            histograms = [(name, list(h.counts), h.sum, h.count)
+                          for name, h in self.histograms.items() if h.count]
+
+        lines.append('# HELP bridge_stage_seconds Time spent in each frame processing stage')
+        lines.append('# TYPE bridge_stage_seconds histogram')
+        for name, counts, total, count in histograms:
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f'bridge_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'bridge_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'bridge_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'bridge_stage_seconds_count{{stage="{name}"}} {count}')
+
+        counters = [('bridge_frames_processed_total', 'Frames run through the model', frames)] + list(counters)
+        gauges = [('bridge_frame_rate', 'Processed frames per second (recent window)', self.frame_rate()),
+                  ('bridge_metrics_enabled', 'Whether stage instrumentation is on', int(self.enabled))] + list(gauges)
+        for kind, items in (('counter', counters), ('gauge', gauges)):
+            for name, help_text, value in items:
+                if value is None:
+                    continue
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name} {value:g}' if isinstance(value, float) else f'{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def resident_memory_bytes():
+    """Current resident set size of this process, or None if it can't be read"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        # Peak rather than current RSS; bytes on macOS, KiB on Linux
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+# Shared instance the bridge and ModelProcessor record into
+metrics = Metrics(METRICS_ENABLED)
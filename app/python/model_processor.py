@@ -1,49 +1,216 @@
+import functools
+import logging
 import os
+import threading
+import time
+from types import SimpleNamespace
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
 import cv2
-import mediapipe as mp
 
-mp_holistic = mp.solutions.holistic  # Holistic model
-mp_drawing = mp.solutions.drawing_utils  # Drawing utilities
+# TensorFlow and MediaPipe each take seconds to import, so they are only
+# imported when the model/Holistic graph is first loaded (see load_mediapipe).
+mp = None
+mp_holistic = None  # Holistic model
+mp_drawing = None  # Drawing utilities
 
 from config import (
-    MODEL_PATH, ACTIONS, SEQUENCE_LENGTH, KEYPOINT_DIM,
-    MEDIAPIPE_MIN_DETECTION_CONFIDENCE, MEDIAPIPE_MIN_TRACKING_CONFIDENCE
+    MODEL_PATH, TFLITE_MODEL_PATH, ONNX_MODEL_PATH, STREAMING_WEIGHTS_PATH, INFERENCE_BACKEND,
+    ACTIONS, SEQUENCE_LENGTH, KEYPOINT_DIM,
+    MEDIAPIPE_MIN_DETECTION_CONFIDENCE, MEDIAPIPE_MIN_TRACKING_CONFIDENCE,
+    INFERENCE_MODE, STREAMING_RESYNC_INTERVAL, STREAMING_TOLERANCE,
+    BATCHING_ENABLED, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, WARMUP_ITERATIONS,
+    FEATURE_PROFILE, HANDS_INPUT_MIRRORED, MOTION_GATE_ENABLED, ROI_ENABLED, DETECTION_PROCESSES
 )
+from inference_backends import load_backend
+from streaming_inference import StreamingLSTM
+from prediction_batcher import PredictionBatcher
+from session_store import SequenceState
+from detection_pool import DetectionPool
+from keypoints import extract_keypoints, detected_groups
+from feature_profiles import get_profile, profile_model_path, select_features
+from landmark_codec import DEFAULT_FORMAT, encode_landmarks
+from frame_codec import decode_data_url, decode_frame_bytes, frame_thumbnail
+from roi_tracker import FULL_FRAME, remap_keypoints
+from metrics import metrics
+from bridge_logging import frame_log
+
+log = logging.getLogger(__name__)
+
+BACKEND_MODEL_PATHS = {
+    'keras': MODEL_PATH,
+    'tflite': TFLITE_MODEL_PATH,
+    'onnx': ONNX_MODEL_PATH,
+}
+
+
+def load_mediapipe():
+    """Import MediaPipe and set the module-level mp/mp_holistic/mp_drawing handles"""
+    global mp, mp_holistic, mp_drawing
+    if mp is None:
+        import mediapipe
+        mp = mediapipe
+        mp_holistic = mediapipe.solutions.holistic
+        mp_drawing = mediapipe.solutions.drawing_utils
+    return mp_holistic
+
+
+class PoseHandsDetector:
+    """MediaPipe Pose and Hands graphs, without the face mesh Holistic runs.
+
+    `process()` returns Holistic-style results (face_landmarks is None), so
+    keypoint extraction, drawing and landmark payloads work unchanged.
+    Hands labels handedness as if the image were mirrored; unless
+    `mirrored`, the labels are swapped to match Holistic's left/right hand.
+    """
+
+    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5, mirrored=False):
+        self.pose = mp.solutions.pose.Pose(min_detection_confidence=min_detection_confidence,
+                                           min_tracking_confidence=min_tracking_confidence)
+        self.hands = mp.solutions.hands.Hands(max_num_hands=2, min_detection_confidence=min_detection_confidence,
+                                              min_tracking_confidence=min_tracking_confidence)
+        self.mirrored = mirrored
+
+    def process(self, image):
+        pose = self.pose.process(image)
+        hands = self.hands.process(image)
+        left_hand = right_hand = None
+        for landmarks, handedness in zip(hands.multi_hand_landmarks or (), hands.multi_handedness or ()):
+            if (handedness.classification[0].label == 'Left') == self.mirrored:
+                left_hand = landmarks
+            else:
+                right_hand = landmarks
+        return SimpleNamespace(pose_landmarks=pose.pose_landmarks, face_landmarks=None,
+                               left_hand_landmarks=left_hand, right_hand_landmarks=right_hand)
+
+    def close(self):
+        self.pose.close()
+        self.hands.close()
+
+
+def create_detector(detector='holistic', min_detection_confidence=0.5, min_tracking_confidence=0.5, mirrored=False):
+    """A MediaPipe graph for a feature profile's `detector` ('holistic' or 'pose_hands')"""
+    load_mediapipe()
+    if detector == 'pose_hands':
+        return PoseHandsDetector(min_detection_confidence, min_tracking_confidence, mirrored)
+    return mp_holistic.Holistic(
+        min_detection_confidence=min_detection_confidence,
+        min_tracking_confidence=min_tracking_confidence
+    )
 
 
 class ModelProcessor:
-    def __init__(self):
-        self.model = None
+    def __init__(self, with_model=True, profile=FEATURE_PROFILE, detection_processes=DETECTION_PROCESSES):
+        # Model input features and the MediaPipe graphs that produce them
+        self.profile = get_profile(profile)
+        self.feature_dim = self.profile.dim
+        self.backend = None
+        self.model = None  # Keras model, when loaded (needed for streaming mode)
         self.holistic = None
-        self.sequence = []
-        self.load_model()
+        # With detection_processes > 0, MediaPipe runs in a DetectionPool instead of self.holistic
+        self.detection_processes = detection_processes
+        self.detection_pool = None
+        self.streaming = None
+        self.batcher = None
+        # MediaPipe graphs are not thread-safe; per-stream state has its own lock
+        self.detect_lock = threading.Lock()
+        # with_model=False sets up MediaPipe only (keypoint extraction, no inference)
+        if with_model:
+            self.load_model()
         self.init_mediapipe()
+        # Default rolling state, used when callers don't pass their own
+        self.state = self.new_state()
+
+    def fork(self):
+        """A processor with its own MediaPipe graph that shares this one's model.
+
+        The backend, streaming network weights and prediction batcher are
+        shared; detection and the default state are the fork's own (a
+        detection pool is shared too, as it already has a graph per process).
+        """
+        if self.detection_pool is not None:
+            worker = type(self)(with_model=False, profile=self.profile.name, detection_processes=0)
+            worker.holistic = None
+            worker.detection_pool = self.detection_pool
+        else:
+            worker = type(self)(with_model=False, profile=self.profile.name)
+        worker.backend = self.backend
+        worker.model = self.model
+        worker.streaming = self.streaming
+        worker.batcher = self.batcher
+        worker.state = worker.new_state()
+        return worker
+
+    def new_state(self):
+        """Create an empty per-stream SequenceState sharing this processor's model"""
+        return SequenceState(self.streaming, self.feature_dim)
 
     def load_model(self):
-        """Load the trained LSTM model"""
+        """Load the trained LSTM model with the configured inference backend"""
         try:
-            if os.path.exists(MODEL_PATH):
-                self.model = keras.models.load_model(MODEL_PATH)
-                print(f"Model loaded from {MODEL_PATH}")
+            path = profile_model_path(BACKEND_MODEL_PATHS.get(INFERENCE_BACKEND, MODEL_PATH), self.profile)
+            if os.path.exists(path):
+                self.backend = load_backend(INFERENCE_BACKEND, path)
+                self.model = getattr(self.backend, 'model', None)
+                log.info("Model loaded from %s (%s backend, %s features)", path, INFERENCE_BACKEND, self.profile.name)
 
                 # Log model input/output shape
-                if self.model:
-                    print(f"Model expects input shape: {self.model.input_shape}")
-                    print(f"Model output shape: {self.model.output_shape}")
-                    print(f"Expected: (batch_size, {SEQUENCE_LENGTH}, {KEYPOINT_DIM})")
+                log.info("Model expects input shape %s, output shape %s (expected: (batch_size, %d, %d))",
+                         self.backend.input_shape, self.backend.output_shape, SEQUENCE_LENGTH, self.feature_dim)
+                if self.backend.input_shape[-1] not in (None, self.feature_dim):
+                    raise ValueError(f"{path} takes {self.backend.input_shape[-1]} features per frame, but the "
+                                     f"'{self.profile.name}' profile produces {self.feature_dim}")
+
+                if INFERENCE_MODE == 'streaming':
+                    self.init_streaming()
+
+                # Windowed predictions from concurrent streams share batched forward passes
+                if BATCHING_ENABLED and self.streaming is None:
+                    self.batcher = PredictionBatcher(self.backend, SEQUENCE_LENGTH, self.feature_dim,
+                                                     BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS / 1000.0)
+                    log.info("Prediction batching enabled (max batch %d, max wait %s ms)", BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS)
             else:
-                print(f"Warning: Model file not found at {MODEL_PATH}")
+                log.warning("Model file not found at %s", path)
         except Exception as e:
-            print(f"Error loading model: {e}")
+            log.error("Error loading model: %s", e)
+
+    def init_streaming(self):
+        """Build the stateful single-step network used in streaming mode.
+
+        With the Keras backend its weights are copied from the loaded model.
+        The TFLite/ONNX backends don't load TensorFlow, so the weights come
+        from the .npz file convert_model.py writes next to the exports;
+        without it, inference falls back to windowed mode.
+        """
+        try:
+            if self.model is not None:
+                streaming = StreamingLSTM(self.model, SEQUENCE_LENGTH, STREAMING_RESYNC_INTERVAL)
+            else:
+                weights_path = profile_model_path(STREAMING_WEIGHTS_PATH, self.profile)
+                if not os.path.exists(weights_path):
+                    log.warning("Streaming weights not found at %s (run convert_model.py), "
+                                "using windowed inference with the %s backend", weights_path, self.backend.name)
+                    return
+                streaming = StreamingLSTM.from_weights(weights_path, SEQUENCE_LENGTH, STREAMING_RESYNC_INTERVAL)
+            # Checked against the backend that serves the windowed predictions and resyncs' fallback
+            error = streaming.validate(self.model if self.model is not None else self.backend,
+                                       self.feature_dim, STREAMING_TOLERANCE)
+            self.streaming = streaming
+            log.info("Streaming inference enabled (max error vs %s: %.2e, resync every %d frames)",
+                     self.backend.name, error, STREAMING_RESYNC_INTERVAL)
+        except Exception as e:
+            self.streaming = None
+            log.warning("Streaming inference unavailable, using windowed inference: %s", e)
 
     def init_mediapipe(self):
-        """Initialize MediaPipe Holistic"""
+        """Initialize MediaPipe Holistic (in this process, or in detection processes)"""
+        try:
+            load_mediapipe()
+        except ImportError as e:
+            log.warning("MediaPipe unavailable: %s", e)
+
         # If MediaPipe has been disabled (mp_holistic is None) skip initialization
         if mp_holistic is None:
-            print("MediaPipe disabled - skipping MediaPipe Holistic initialization")
+            log.info("MediaPipe disabled - skipping MediaPipe Holistic initialization")
             self.holistic = None
             return
 
@@ -51,20 +218,90 @@ class ModelProcessor:
         # (falls back to 0.5 if config values are not sensible)
         min_det = MEDIAPIPE_MIN_DETECTION_CONFIDENCE if MEDIAPIPE_MIN_DETECTION_CONFIDENCE is not None else 0.5
         min_track = MEDIAPIPE_MIN_TRACKING_CONFIDENCE if MEDIAPIPE_MIN_TRACKING_CONFIDENCE is not None else 0.5
+        factory = functools.partial(create_detector, self.profile.detector, min_det, min_track, HANDS_INPUT_MIRRORED)
+
+        if self.profile.detector == 'pose_hands':
+            # The profile doesn't use the face mesh, so don't run it
+            log.info("Using MediaPipe Pose + Hands ('%s' features, no face mesh)", self.profile.name)
+
+        if self.detection_processes > 0:
+            self.start_detection_pool(factory)
+            return
+
+        self.holistic = factory()
+
+    def start_detection_pool(self, factory):
+        """Run detection in `detection_processes` worker processes, each building its graph with `factory`"""
+        try:
+            self.detection_pool = DetectionPool(self.detection_processes, factory).start()
+        except Exception as e:
+            self.detection_pool = None
+            log.error("Detection processes unavailable: %s", e)
 
-        self.holistic = mp_holistic.Holistic(
-            min_detection_confidence=min_det,
-            min_tracking_confidence=min_track
-        )
+    @property
+    def can_detect(self):
+        """Whether frames can be run through MediaPipe (in this process or a detection pool)"""
+        return self.holistic is not None or self.detection_pool is not None
+
+    def warm_up(self, iterations=WARMUP_ITERATIONS):
+        """Run inference on dummy inputs so the first real frame doesn't pay for
+        graph tracing and buffer allocation. Returns the time spent per component in ms.
+        """
+        timings = {}
+
+        if self.backend is not None:
+            start = time.perf_counter()
+            batch_sizes = [1]
+            if self.batcher is not None and self.batcher.max_batch > 1:
+                batch_sizes.append(self.batcher.max_batch)
+            for size in batch_sizes:
+                dummy = np.zeros((size, SEQUENCE_LENGTH, self.feature_dim), dtype=np.float32)
+                for _ in range(iterations):
+                    self.backend.predict_on_batch(dummy)
+            timings['model'] = round((time.perf_counter() - start) * 1000, 1)
+
+        if self.streaming is not None:
+            start = time.perf_counter()
+            streaming = self.streaming.fork()
+            window = np.zeros((SEQUENCE_LENGTH, self.feature_dim), dtype=np.float32)
+            for _ in range(iterations):
+                streaming.step(window[0])
+            streaming.resync(window)
+            timings['streaming'] = round((time.perf_counter() - start) * 1000, 1)
+
+        if self.detection_pool is not None:
+            try:
+                timings['mediapipe'] = self.detection_pool.warm_up(iterations)
+            except Exception as e:
+                log.warning("MediaPipe warm-up failed: %s", e)
+        elif self.holistic is not None:
+            start = time.perf_counter()
+            blank = np.zeros((480, 640, 3), dtype=np.uint8)
+            try:
+                with self.detect_lock:
+                    for _ in range(iterations):
+                        self.holistic.process(blank)
+                timings['mediapipe'] = round((time.perf_counter() - start) * 1000, 1)
+            except Exception as e:
+                log.warning("MediaPipe warm-up failed: %s", e)
+
+        return timings
 
     def mediapipe_detection(self, image):
-        """Perform MediaPipe detection on image"""
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        """Perform MediaPipe detection on image; returns the (unchanged) BGR image and the results"""
+        return image, self.detect(image)
+
+    def detect(self, image, rgb=False):
+        """MediaPipe results for a BGR (or RGB if `rgb`) image"""
+        if rgb:
+            # Crops are views into the frame; MediaPipe needs contiguous rows
+            image = np.ascontiguousarray(image)
+        else:
+            with metrics.stage('color_convert'):
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         image.flags.writeable = False
-        results = self.holistic.process(image)
-        image.flags.writeable = True
-        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-        return image, results
+        with metrics.stage('mediapipe'):
+            return self.holistic.process(image)
 
     def draw_styled_landmarks(self, image, results):
         """Draw styled landmarks on image"""
@@ -149,129 +386,230 @@ class ModelProcessor:
                 mp_holistic.HAND_CONNECTIONS
             )
 
-    def extract_keypoints(self, results):
+    def extract_keypoints(self, results, out=None):
         """Extract keypoints from MediaPipe results"""
-        pose = np.array([[res.x, res.y, res.z, res.visibility]
-                        for res in results.pose_landmarks.landmark]).flatten() if results.pose_landmarks else np.zeros(33*4)
-        face = np.array([[res.x, res.y, res.z]
-                        for res in results.face_landmarks.landmark]).flatten() if results.face_landmarks else np.zeros(468*3)
-        lh = np.array([[res.x, res.y, res.z]
-                      for res in results.left_hand_landmarks.landmark]).flatten() if results.left_hand_landmarks else np.zeros(21*3)
-        rh = np.array([[res.x, res.y, res.z]
-                      for res in results.right_hand_landmarks.landmark]).flatten() if results.right_hand_landmarks else np.zeros(21*3)
+        keypoints = extract_keypoints(results, out)
 
         # Log what was detected
-        detected = []
-        if results.pose_landmarks: detected.append("pose")
-        if results.face_landmarks: detected.append("face")
-        if results.left_hand_landmarks: detected.append("left_hand")
-        if results.right_hand_landmarks: detected.append("right_hand")
-        if len(detected) > 0:
-            print(f"MediaPipe detected: {', '.join(detected)}")
-        else:
-            print("MediaPipe detected: NOTHING (all zeros)")
+        if frame_log.isEnabledFor(logging.DEBUG):
+            detected = detected_groups(results)
+            frame_log.debug("MediaPipe detected: %s", ', '.join(detected) if detected else "NOTHING (all zeros)")
 
-        return np.concatenate([pose, face, lh, rh])
+        return keypoints
 
-    def _serialize_landmarks(self, results):
-        """Convert MediaPipe landmarks to JSON-serializable format"""
-        landmarks = {}
+    def _serialize_landmarks(self, results, keypoints, landmark_format=DEFAULT_FORMAT, delta_state=None):
+        """Convert MediaPipe landmarks to a JSON-serializable payload in the requested format"""
+        return encode_landmarks(results, keypoints, landmark_format, delta_state)
 
-        if results.pose_landmarks:
-            landmarks['pose'] = [[lm.x, lm.y, lm.z, lm.visibility] for lm in results.pose_landmarks.landmark]
-
-        if results.face_landmarks:
-            landmarks['face'] = [[lm.x, lm.y, lm.z] for lm in results.face_landmarks.landmark]
+    def update_sequence(self, keypoints, state=None):
+        """Append keypoints to the rolling window and return class probabilities.
 
-        if results.left_hand_landmarks:
-            landmarks['left_hand'] = [[lm.x, lm.y, lm.z] for lm in results.left_hand_landmarks.landmark]
+        `state` is the SequenceState of the stream the frame belongs to
+        (defaults to the processor's own); callers sharing a state across
+        threads must hold `state.lock`. Returns None until SEQUENCE_LENGTH
+        frames have been collected.
+        """
+        state = state or self.state
+        sequence = state.sequence
+        sequence.push(keypoints)
 
-        if results.right_hand_landmarks:
-            landmarks['right_hand'] = [[lm.x, lm.y, lm.z] for lm in results.right_hand_landmarks.landmark]
+        with metrics.stage('predict'):
+            return self._predict(keypoints, state)
 
-        return landmarks
+    def _predict(self, keypoints, state):
+        """Advance the model with the frame just pushed to `state.sequence`"""
+        sequence = state.sequence
 
-    def process_frame(self, frame_data, threshold=0.8):
-        """Process a single frame and return prediction"""
-        if not self.model:
-            return None
+        if state.streaming is not None:
+            res = state.streaming.step(keypoints)
+            if not sequence.is_full():
+                return None
+            if state.streaming.needs_resync():
+                res = state.streaming.resync(sequence.window(), streamed=res)
+            return res
 
-        # If MediaPipe is disabled or the Holistic instance wasn't created,
-        # skip processing and return None so the bridge can continue.
-        if self.holistic is None:
-            # Optionally decode the image to ensure no errors upstream, but
-            # for testing we simply skip model prediction.
-            print("MediaPipe not available - skipping frame processing")
+        if not sequence.is_full():
             return None
 
-        try:
-            # Decode base64 image
-            import base64
-            from io import BytesIO
-
-            # Remove data URL prefix if present
-            if ',' in frame_data:
-                frame_data = frame_data.split(',')[1]
+        if self.batcher is not None:
+            return self.batcher.predict(sequence.window())
 
-            img_data = base64.b64decode(frame_data)
-            nparr = np.frombuffer(img_data, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        input_array = sequence.batch()
 
-            if frame is None:
-                return None
+        # Log input shape
+        frame_log.debug("Input shape: %s | Expected: (1, %d, %d)", input_array.shape, SEQUENCE_LENGTH, self.feature_dim)
 
-            # Make detection
-            image, results = self.mediapipe_detection(frame)
+        return self.backend.predict_on_batch(input_array)[0]
 
-            # Extract keypoints
-            keypoints = self.extract_keypoints(results)
+    def process_frame(self, frame_data, threshold=0.8, state=None, landmark_format=DEFAULT_FORMAT):
+        """Process a single base64/data URL frame and return prediction"""
+        try:
+            frame = decode_data_url(frame_data)
+        except Exception as e:
+            log.error("Error processing frame: %s", e)
+            return None
 
-            # Log keypoint shape
-            print(f"Extracted keypoints shape: {keypoints.shape} (expected: ({KEYPOINT_DIM},))")
+        return self.process_image(frame, threshold, state=state, landmark_format=landmark_format)
 
-            # Add to sequence
-            self.sequence.append(keypoints)
-            self.sequence = self.sequence[-SEQUENCE_LENGTH:]
+    def process_bytes(self, body, threshold=0.8, state=None, landmark_format=DEFAULT_FORMAT):
+        """Process a binary frame body (encoded image or raw RGB8 frame, see frame_codec.py).
 
-            # Predict if we have enough frames
-            if len(self.sequence) == SEQUENCE_LENGTH:
-                input_array = np.expand_dims(self.sequence, axis=0)
+        With MOTION_GATE_ENABLED, a frame that hardly differs from the
+        session's last processed frame is neither decoded nor run through
+        MediaPipe; the previous keypoints are pushed to the window again
+        and the result has `motion_skipped` set.
+        """
+        state = state or self.state
+        gated = MOTION_GATE_ENABLED and self.backend is not None and self.can_detect
+        if gated:
+            with metrics.stage('motion_gate'):
+                thumbnail = frame_thumbnail(body)
+                with state.lock:
+                    skip = state.motion.should_skip(thumbnail)
+            if skip:
+                return self.repeat_frame(threshold, state, landmark_format)
+
+        frame, rgb = decode_frame_bytes(body)
+        return self.process_image(frame, threshold, rgb=rgb, state=state, landmark_format=landmark_format,
+                                  thumbnail=thumbnail if gated else None)
+
+    def repeat_frame(self, threshold=0.8, state=None, landmark_format=DEFAULT_FORMAT):
+        """Advance the window with the last processed frame's keypoints again (no detection)"""
+        state = state or self.state
+        with state.lock:
+            ticket = state.order.ticket()
+            try:
+                if not state.order.wait(ticket):
+                    return self._late_result(threshold)
+                keypoints = state.keypoints
+                features = state.features if state.features is not None else keypoints
+                res = self.update_sequence(features, state)
+                with metrics.stage('serialize'):
+                    landmarks = self._serialize_landmarks(state.last_results, keypoints, landmark_format,
+                                                          state.landmark_delta)
+            finally:
+                state.order.done(ticket)
+        return dict(self._prediction_result(res, threshold, landmarks), motion_skipped=True)
+
+    def _late_result(self, threshold):
+        """Result for a frame whose detection finished after a later frame of its stream was applied"""
+        frame_log.debug("Dropping a frame that finished after a later one")
+        return dict(self._prediction_result(None, threshold, {}), late=True)
+
+    def _prediction_result(self, res, threshold, landmarks):
+        """Result dict for the class probabilities `res` (None while the window fills)"""
+        if res is not None:
+            max_prob = np.max(res)
+            predicted_action = ACTIONS[np.argmax(res)]
+
+            # Log detailed probabilities
+            if frame_log.isEnabledFor(logging.DEBUG):
+                probs_str = ", ".join([f"{ACTIONS[i]}: {res[i]:.3f}" for i in range(len(ACTIONS))])
+                frame_log.debug("Output shape: %s | Output: %s | Predicted: %s (%.3f)",
+                                res.shape, probs_str, predicted_action, max_prob)
+
+            if max_prob > threshold:
+                return {
+                    'action': predicted_action,
+                    'confidence': float(max_prob),
+                    'probabilities': {ACTIONS[i]: float(res[i]) for i in range(len(ACTIONS))},
+                    'landmarks': landmarks
+                }
+            else:
+                # Still return landmarks even if below threshold
+                return {
+                    'action': None,
+                    'confidence': float(max_prob),
+                    'probabilities': {ACTIONS[i]: float(res[i]) for i in range(len(ACTIONS))},
+                    'landmarks': landmarks
+                }
+
+        # Return landmarks even without full sequence
+        return {
+            'action': None,
+            'confidence': 0.0,
+            'probabilities': {},
+            'landmarks': landmarks
+        }
+
+    def process_image(self, frame, threshold=0.8, rgb=False, state=None, landmark_format=DEFAULT_FORMAT,
+                      thumbnail=None):
+        """Process an already decoded frame (BGR, or RGB if `rgb`) and return prediction.
+
+        `landmark_format` (see landmark_codec.py) selects the landmark groups
+        and encoding of the returned `landmarks`. `thumbnail` (see
+        motion_gate.py) becomes the stream's motion reference if the frame
+        updates the window, i.e. isn't late.
+        """
+        if self.backend is None:
+            return None
 
-                # Log input shape
-                print(f"Input shape: {input_array.shape} | Expected: (1, {SEQUENCE_LENGTH}, {KEYPOINT_DIM})")
+        # If MediaPipe is disabled or the Holistic instance wasn't created,
+        # skip processing and return None so the bridge can continue.
+        if not self.can_detect:
+            # Optionally decode the image to ensure no errors upstream, but
+            # for testing we simply skip model prediction.
+            log.warning("MediaPipe not available - skipping frame processing")
+            return None
 
-                res = self.model.predict(input_array, verbose=0)[0]
+        if frame is None:
+            return None
 
-                max_prob = np.max(res)
-                predicted_action = ACTIONS[np.argmax(res)]
+        state = state or self.state
 
-                # Log detailed probabilities
-                probs_str = ", ".join([f"{ACTIONS[i]}: {res[i]:.3f}" for i in range(len(ACTIONS))])
-                print(f"Output shape: {res.shape} | Output: {probs_str} | Predicted: {predicted_action} ({max_prob:.3f})")
-
-                if max_prob > threshold:
-                    return {
-                        'action': predicted_action,
-                        'confidence': float(max_prob),
-                        'probabilities': {ACTIONS[i]: float(res[i]) for i in range(len(ACTIONS))},
-                        'landmarks': self._serialize_landmarks(results)
-                    }
-                else:
-                    # Still return landmarks even if below threshold
-                    return {
-                        'action': None,
-                        'confidence': float(max_prob),
-                        'probabilities': {ACTIONS[i]: float(res[i]) for i in range(len(ACTIONS))},
-                        'landmarks': self._serialize_landmarks(results)
-                    }
-
-            # Return landmarks even without full sequence
-            return {
-                'action': None,
-                'confidence': 0.0,
-                'probabilities': {},
-                'landmarks': self._serialize_landmarks(results)
-            }
+        # The frame's place in the stream; it updates the window in this order
+        with state.lock:
+            ticket = state.order.ticket()
+        try:
+            # Crop to the region the stream's person was last seen in
+            region = FULL_FRAME
+            if ROI_ENABLED:
+                with state.lock, metrics.stage('roi_crop'):
+                    frame, region = state.roi.prepare(frame)
+
+            # Make detection (raw RGB frames can go to MediaPipe as-is); in a
+            # detection process the keypoints are extracted there
+            detected = None
+            if self.detection_pool is not None:
+                with metrics.stage('mediapipe'):
+                    detected, results = self.detection_pool.detect(frame, rgb, state)
+            else:
+                with self.detect_lock:
+                    results = self.detect(frame, rgb)
+
+            with state.lock:
+                if not state.order.wait(ticket):
+                    return self._late_result(threshold)
+
+                # Extract keypoints into the stream's reusable buffer (in
+                # full-frame coordinates), and the model input features for
+                # the profile from them
+                with metrics.stage('extract_keypoints'):
+                    if detected is not None:
+                        keypoints = state.keypoints
+                        keypoints[:] = detected
+                    else:
+                        keypoints = self.extract_keypoints(results, state.keypoints)
+                    remap_keypoints(keypoints, results, region)
+                    features = select_features(keypoints, self.profile, state.features)
+                if ROI_ENABLED:
+                    state.roi.update(keypoints, results)
+                state.last_results = results
+
+                # Log keypoint shape
+                frame_log.debug("Extracted keypoints shape: %s (expected: (%d,))", keypoints.shape, KEYPOINT_DIM)
+
+                # Add to sequence and predict if we have enough frames
+                res = self.update_sequence(features, state)
+                with metrics.stage('serialize'):
+                    landmarks = self._serialize_landmarks(results, keypoints, landmark_format, state.landmark_delta)
+                if thumbnail is not None:
+                    state.motion.processed(thumbnail)
+
+            return self._prediction_result(res, threshold, landmarks)
         except Exception as e:
-            print(f"Error processing frame: {e}")
+            log.error("Error processing frame: %s", e)
             return None
+        finally:
+            with state.lock:
+                state.order.done(ticket)
@@ -0,0 +1,89 @@
+import threading
+
+import cv2
+import numpy as np
+
+from config import MOTION_PIXEL_DELTA, MOTION_CHANGED_FRACTION, MOTION_MAX_SKIP
+
+
+class MotionTotals:
+    """Frame and skip counters summed over every session's gate"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frames = 0
+        self.skipped = 0
+        self.forced = 0  # unchanged frames processed anyway because of the skip cap
+
+    def record(self, skipped, forced):
+        with self.lock:
+            self.frames += 1
+            self.skipped += skipped
+            self.forced += forced
+
+    def stats(self):
+        with self.lock:
+            return {
+                'frames': self.frames,
+                'skipped': self.skipped,
+                'forced': self.forced,
+                'hit_rate': round(self.skipped / self.frames, 4) if self.frames else 0.0,
+            }
+
+
+totals = MotionTotals()
+
+
+class MotionGate:
+    """Per-stream change detector run before decoding and MediaPipe.
+
+    Compares a frame's grayscale thumbnail (frame_codec.frame_thumbnail)
+    with the thumbnail of the last frame that was actually processed. If
+    fewer than `changed_fraction` of the pixels moved by more than
+    `pixel_delta` gray levels, the frame may be skipped and the previous
+    keypoints reused. At most `max_skip` frames in a row are skipped, and
+    the reference only moves when a frame is processed, so slow drift
+    still adds up to a change.
+
+    Not thread-safe; callers hold the stream's SequenceState lock.
+    """
+
+    def __init__(self, pixel_delta=MOTION_PIXEL_DELTA, changed_fraction=MOTION_CHANGED_FRACTION,
+                 max_skip=MOTION_MAX_SKIP):
+        self.pixel_delta = pixel_delta
+        self.changed_fraction = changed_fraction
+        self.max_skip = max_skip
+        self.reference = None
+        self.skipped_in_row = 0
+        self.frames = 0
+        self.skipped = 0
+        self.last_change = None  # changed-pixel fraction of the last compared frame
+
+    def reset(self):
+        self.reference = None
+        self.skipped_in_row = 0
+
+    def should_skip(self, thumbnail):
+        """Whether the frame with this thumbnail can reuse the last processed frame's keypoints"""
+        self.frames += 1
+        unchanged = False
+        if thumbnail is not None and self.reference is not None and thumbnail.shape == self.reference.shape:
+            diff = cv2.absdiff(thumbnail, self.reference)
+            self.last_change = float(np.count_nonzero(diff > self.pixel_delta)) / diff.size
+            unchanged = self.last_change < self.changed_fraction
+
+        skip = unchanged and self.skipped_in_row < self.max_skip
+        if skip:
+            self.skipped += 1
+            self.skipped_in_row += 1
+        totals.record(skip, unchanged and not skip)
+        return skip
+
+    def processed(self, thumbnail):
+        """Make `thumbnail` the reference after its frame went through MediaPipe"""
+        self.reference = thumbnail
+        self.skipped_in_row = 0
+
+    @property
+    def hit_rate(self):
+        return round(self.skipped / self.frames, 4) if self.frames else 0.0
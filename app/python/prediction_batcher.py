@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+
+class _Request:
+    __slots__ = ('window', 'submitted', 'done', 'result', 'error')
+
+    def __init__(self, window):
+        self.window = window
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PredictionBatcher:
+    """Collects concurrent LSTM predictions from different streams into batched forward passes.
+
+    Callers block in `predict(window)`. A scheduler thread waits until
+    `max_batch` requests are pending or the oldest one has waited
+    `max_wait` seconds, copies the windows into a preallocated batch array,
+    runs the model once and hands each caller its row of the output.
+    """
+
+    def __init__(self, model, sequence_length, keypoint_dim, max_batch=8, max_wait=0.005):
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.batch_input = np.zeros((self.max_batch, sequence_length, keypoint_dim), dtype=np.float32)
+        self.pending = deque()
+        self.cond = threading.Condition()
+        self.running = True
+
+        self.batches = 0
+        self.requests = 0
+        self.batch_sizes = Counter()
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.predict_total = 0.0
+
+        self.thread = threading.Thread(target=self._run, name='prediction-batcher', daemon=True)
+        self.thread.start()
+
+    def predict(self, window):
+        """Return class probabilities for one (sequence_length, keypoint_dim) window.
+
+        `window` is read by the scheduler thread, so it must not change until
+        this call returns.
+        """
+        request = _Request(window)
+        with self.cond:
+            if not self.running:
+                raise RuntimeError("Prediction batcher is stopped")
+            self.pending.append(request)
+            self.cond.notify_all()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.thread.join(timeout=5)
+
+    def _collect(self):
+        """Wait for a batch of requests (or None when stopping)"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.pending or not self.running)
+            if not self.running:
+                return None
+
+            deadline = self.pending[0].submitted + self.max_wait
+            while len(self.pending) < self.max_batch and self.running:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+
+            size = min(len(self.pending), self.max_batch)
+            return [self.pending.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+
+            size = len(batch)
+            start = time.perf_counter()
+            try:
+                for i, request in enumerate(batch):
+                    self.batch_input[i] = request.window
+                output = np.asarray(self.model.predict_on_batch(self.batch_input[:size]))
+                for i, request in enumerate(batch):
+                    request.result = output[i]
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            end = time.perf_counter()
+
+            with self.cond:
+                self.batches += 1
+                self.requests += size
+                self.batch_sizes[size] += 1
+                self.predict_total += end - start
+                for request in batch:
+                    wait = start - request.submitted
+                    self.wait_total += wait
+                    self.wait_max = max(self.wait_max, wait)
+
+            for request in batch:
+                request.done.set()
+
+        # Fail anything still queued when stopping
+        with self.cond:
+            while self.pending:
+                request = self.pending.popleft()
+                request.error = RuntimeError("Prediction batcher is stopped")
+                request.done.set()
+
+    def stats(self):
+        with self.cond:
+            return {
+                'max_batch': self.max_batch,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self.batches,
+                'requests': self.requests,
+                'mean_batch_size': round(self.requests / self.batches, 3) if self.batches else 0.0,
+                'batch_size_counts': {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                'mean_queue_wait_ms': round(self.wait_total / self.requests * 1000, 3) if self.requests else 0.0,
+                'max_queue_wait_ms': round(self.wait_max * 1000, 3),
+                'mean_predict_ms': round(self.predict_total / self.batches * 1000, 3) if self.batches else 0.0,
+            }
@@ -0,0 +1,62 @@
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+
+class ProcessorPool:
+    """ModelProcessor workers that share one model, each with its own MediaPipe graph.
+
+    MediaPipe graphs are not thread-safe, so a single processor runs one
+    detection at a time no matter how many threads serve requests. The
+    pool gives every worker its own graph (see ModelProcessor.fork) and
+    pins each session to one worker: the session is assigned to the worker
+    with the fewest sessions the first time it is seen, and stays there
+    until forget(). Its frames therefore always meet the same graph's
+    frame-to-frame tracking, while different sessions run in parallel.
+    """
+
+    def __init__(self, primary, size=1):
+        self.workers = [primary] + [primary.fork() for _ in range(max(1, size) - 1)]
+        self.lock = threading.Lock()
+        self.assignments = {}  # session_id -> worker index
+        self.sessions = [0] * len(self.workers)
+        self.frames = [0] * len(self.workers)
+
+    @property
+    def primary(self):
+        return self.workers[0]
+
+    def warm_up(self):
+        """Warm up every worker's MediaPipe graph (and the shared model once); returns the primary's timings"""
+        timings = self.primary.warm_up()
+        for worker in self.workers[1:]:
+            worker.warm_up()
+        return timings
+
+    def for_session(self, session_id):
+        """The worker that processes `session_id`'s frames"""
+        with self.lock:
+            index = self.assignments.get(session_id)
+            if index is None:
+                index = min(range(len(self.workers)), key=self.sessions.__getitem__)
+                self.assignments[session_id] = index
+                self.sessions[index] += 1
+                log.debug("Session %s assigned to processor worker %d", session_id, index)
+            self.frames[index] += 1
+        return self.workers[index]
+
+    def forget(self, session_id):
+        """Release `session_id`'s worker assignment (after it was evicted or removed)"""
+        with self.lock:
+            index = self.assignments.pop(session_id, None)
+            if index is not None:
+                self.sessions[index] -= 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'workers': len(self.workers),
+                'sessions': list(self.sessions),
+                'frames': list(self.frames),
+            }
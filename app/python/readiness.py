@@ -0,0 +1,61 @@
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+STAGES = ('starting', 'loading', 'warming', 'ready')
+
+
+class Readiness:
+    """Staged startup status of the bridge: starting -> loading -> warming -> ready.
+
+    The HTTP server answers while the model loads in the background; this
+    records which stage the loader is in, how long each finished stage took,
+    and the error if loading failed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stage = STAGES[0]
+        self.error = None
+        self.started = time.perf_counter()
+        self.stage_started = self.started
+        self.durations = {}  # stage -> seconds
+        self.details = {}
+
+    def advance(self, stage, **details):
+        """Finish the current stage and enter `stage`"""
+        now = time.perf_counter()
+        with self.lock:
+            self.durations[self.stage] = round(now - self.stage_started, 3)
+            self.stage = stage
+            self.stage_started = now
+            self.details.update(details)
+        log.info("Bridge %s (%.2fs since start)", stage, now - self.started)
+
+    def fail(self, error):
+        with self.lock:
+            self.error = str(error)
+            self.stage = 'failed'
+        log.error("Bridge failed to start: %s", error)
+
+    @property
+    def ready(self):
+        return self.stage == 'ready'
+
+    @property
+    def failed(self):
+        return self.stage == 'failed'
+
+    def snapshot(self):
+        now = time.perf_counter()
+        with self.lock:
+            return dict(self.details, **{
+                'stage': self.stage,
+                'ready': self.stage == 'ready',
+                'error': self.error,
+                'uptime_seconds': round(now - self.started, 3),
+                'stage_seconds': dict(self.durations),
+                'ready_after_seconds': round(self.stage_started - self.started, 3) if self.stage == 'ready' else None,
+            })
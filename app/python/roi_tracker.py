@@ -0,0 +1,153 @@
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from config import ROI_MAX_SIDE, ROI_PADDING, ROI_MIN_SIZE, ROI_REDETECT_INTERVAL
+from keypoints import GROUP_LAYOUT
+
+# Pose landmarks below this visibility (e.g. legs under the desk) don't
+# count towards the person's bounding box
+MIN_VISIBILITY = 0.5
+# A crop covering more than this fraction of the frame isn't worth making
+MAX_CROP_AREA = 0.8
+
+# Normalized full-frame rectangle an image given to MediaPipe was cut from
+Region = namedtuple('Region', ('x', 'y', 'width', 'height'))
+
+FULL_FRAME = Region(0.0, 0.0, 1.0, 1.0)
+
+
+def cap_size(image, max_side):
+    """`image` downscaled so its longer side is at most `max_side` (0 = no limit)"""
+    height, width = image.shape[:2]
+    if max_side <= 0 or max(height, width) <= max_side:
+        return image
+    scale = max_side / max(height, width)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def remap_keypoints(keypoints, results, region):
+    """Map keypoints extracted from a crop at `region` to full-frame normalized coordinates, in place.
+
+    Groups MediaPipe didn't detect stay zero. z is scaled like x, as
+    MediaPipe expresses depth relative to the image width.
+    """
+    if region == FULL_FRAME:
+        return keypoints
+    for name, attr, count, width, start, end in GROUP_LAYOUT:
+        if not getattr(results, attr):
+            continue
+        points = keypoints[start:end].reshape(count, width)
+        points[:, 0] *= region.width
+        points[:, 0] += region.x
+        points[:, 1] *= region.height
+        points[:, 1] += region.y
+        points[:, 2] *= region.width
+    return keypoints
+
+
+def landmark_bounds(keypoints, results):
+    """(x0, y0, x1, y1) normalized box around the detected landmarks, or None without a pose"""
+    if not results.pose_landmarks:
+        return None
+    xs, ys = [], []
+    for name, attr, count, width, start, end in GROUP_LAYOUT:
+        if not getattr(results, attr):
+            continue
+        points = keypoints[start:end].reshape(count, width)
+        if width == 4:
+            points = points[points[:, 3] >= MIN_VISIBILITY]
+        xs.append(points[:, 0])
+        ys.append(points[:, 1])
+    xs = np.concatenate(xs)
+    ys = np.concatenate(ys)
+    if not xs.size:
+        return None
+    return (max(float(xs.min()), 0.0), max(float(ys.min()), 0.0),
+            min(float(xs.max()), 1.0), min(float(ys.max()), 1.0))
+
+
+class RoiTracker:
+    """Per-stream region of interest MediaPipe runs on.
+
+    After a frame, `update()` places a padded box around the person it
+    found; the next frame is cropped to that box (and capped at
+    `max_side` pixels) before detection. The box is kept as long as the
+    person stays well inside it, so MediaPipe's own tracking sees a stable
+    image. The full frame is used again every `redetect_interval` frames,
+    and after any frame without a pose, so a person who moved out of the
+    crop (or a second hand entering the scene) is picked up again.
+
+    Not thread-safe; callers hold the stream's SequenceState lock.
+    """
+
+    def __init__(self, max_side=ROI_MAX_SIDE, padding=ROI_PADDING, min_size=ROI_MIN_SIZE,
+                 redetect_interval=ROI_REDETECT_INTERVAL):
+        self.max_side = max_side
+        self.padding = padding
+        self.min_size = min_size
+        self.redetect_interval = redetect_interval
+        self.region = None  # crop for the next frame; None = full frame
+        self.since_full = 0
+        self.frames = 0
+        self.cropped = 0
+
+    def reset(self):
+        self.region = None
+        self.since_full = 0
+
+    def prepare(self, image):
+        """(image to run MediaPipe on, its Region within `image`) for the next frame"""
+        self.frames += 1
+        region = self.region
+        if region is None or self.since_full >= self.redetect_interval:
+            self.since_full = 0
+            return cap_size(image, self.max_side), FULL_FRAME
+
+        self.since_full += 1
+        self.cropped += 1
+        height, width = image.shape[:2]
+        x0, y0 = int(region.x * width), int(region.y * height)
+        x1 = min(width, max(x0 + 1, round((region.x + region.width) * width)))
+        y1 = min(height, max(y0 + 1, round((region.y + region.height) * height)))
+        # The region actually cut, in whole pixels, so remapping is exact
+        crop = Region(x0 / width, y0 / height, (x1 - x0) / width, (y1 - y0) / height)
+        return cap_size(image[y0:y1, x0:x1], self.max_side), crop
+
+    def update(self, keypoints, results):
+        """Choose the next frame's crop from this frame's (full-frame) keypoints"""
+        bounds = landmark_bounds(keypoints, results)
+        if bounds is None:
+            self.region = None
+            return
+        x0, y0, x1, y1 = bounds
+        pad = self.padding * max(x1 - x0, y1 - y0)
+
+        # Keep the current crop while the person is at least half a padding inside it
+        current = self.region
+        if current is not None:
+            margin = pad / 2
+            inside = (x0 - margin >= current.x and y0 - margin >= current.y and
+                      x1 + margin <= current.x + current.width and y1 + margin <= current.y + current.height)
+            padded_area = (x1 - x0 + 2 * pad) * (y1 - y0 + 2 * pad)
+            if inside and current.width * current.height <= 2 * padded_area:
+                return
+
+        x0, y0, x1, y1 = x0 - pad, y0 - pad, x1 + pad, y1 + pad
+        x0, x1 = self._at_least(x0, x1)
+        y0, y1 = self._at_least(y0, y1)
+        region = Region(x0, y0, x1 - x0, y1 - y0)
+        self.region = region if region.width * region.height <= MAX_CROP_AREA else None
+
+    def _at_least(self, start, end):
+        """[start, end] grown to `min_size` around its center and shifted into [0, 1]"""
+        size = min(max(end - start, self.min_size), 1.0)
+        center = (start + end) / 2
+        start = min(max(center - size / 2, 0.0), 1.0 - size)
+        return start, start + size
+
+    @property
+    def crop_rate(self):
+        return round(self.cropped / self.frames, 4) if self.frames else 0.0
@@ -0,0 +1,47 @@
+import numpy as np
+
+from config import SEQUENCE_LENGTH, KEYPOINT_DIM
+
+
+class SequenceBuffer:
+    """Preallocated float32 circular buffer holding the last `length` keypoint frames.
+
+    Every frame is written twice, at `index` and `index + length`, so the
+    most recent `length` frames are always one contiguous slice in
+    chronological order. `push()` is O(1) and `batch()` hands the model a
+    (1, length, dim) view of that slice without allocating a new array.
+    """
+
+    def __init__(self, length=SEQUENCE_LENGTH, dim=KEYPOINT_DIM):
+        self.length = length
+        self.dim = dim
+        self.data = np.zeros((2 * length, dim), dtype=np.float32)
+        self.index = 0
+        self.count = 0
+
+    def push(self, keypoints):
+        """Append one frame, overwriting the oldest once the buffer is full"""
+        self.data[self.index] = keypoints
+        self.data[self.index + self.length] = keypoints
+        self.index = (self.index + 1) % self.length
+        if self.count < self.length:
+            self.count += 1
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+
+    def is_full(self):
+        return self.count == self.length
+
+    def __len__(self):
+        return self.count
+
+    def window(self):
+        """Return a (count, dim) view of the buffered frames, oldest first"""
+        end = self.index + self.length
+        return self.data[end - self.count:end]
+
+    def batch(self):
+        """Return a (1, count, dim) view ready to pass to the model"""
+        return self.window()[np.newaxis]
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from config import SEQUENCE_LENGTH, KEYPOINT_DIM
+from sequence_buffer import SequenceBuffer
+from landmark_codec import DeltaState
+from motion_gate import MotionGate
+from roi_tracker import RoiTracker
+from decision_engine import DecisionEngine
+from frame_order import FrameOrder
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SESSION_ID = 'default'
+
+
+class SequenceState:
+    """Rolling state for one stream: the keypoint window and its streaming LSTM state"""
+
+    def __init__(self, streaming=None, dim=KEYPOINT_DIM):
+        # Window of model input features (`dim` wide, see feature_profiles.py)
+        self.sequence = SequenceBuffer(SEQUENCE_LENGTH, dim)
+        self.streaming = streaming.fork() if streaming is not None else None
+        # Scratch vectors keypoints are extracted into (full layout) and the
+        # features selected from them for a reduced profile
+        self.keypoints = np.zeros(KEYPOINT_DIM, dtype=np.float32)
+        self.features = np.zeros(dim, dtype=np.float32) if dim != KEYPOINT_DIM else None
+        # Last landmark frame sent to this stream's client (delta encoding)
+        self.landmark_delta = DeltaState()
+        # Change detection before MediaPipe, and the MediaPipe results of the
+        # last processed frame (reused for frames the gate skips)
+        self.motion = MotionGate()
+        self.last_results = None
+        # Region of the next frame MediaPipe runs on
+        self.roi = RoiTracker()
+        # Smoothed predictions and the current episode
+        self.decision = DecisionEngine()
+        # Held while a frame updates this state
+        self.lock = threading.Lock()
+        # Frames update the state in the order they arrived
+        self.order = FrameOrder(self.lock)
+
+    def reset(self):
+        """Clear the stream's state; returns the end event of an episode it closed (or None)"""
+        with self.lock:
+            self.sequence.clear()
+            self.motion.reset()
+            self.last_results = None
+            # The client's next landmark frame is a keyframe again
+            self.landmark_delta = DeltaState()
+            self.roi.reset()
+            event = self.decision.reset()
+            if self.streaming is not None:
+                self.streaming.reset()
+        return event
+
+    @property
+    def nbytes(self):
+        state_bytes = self.streaming.nbytes if self.streaming is not None else 0
+        feature_bytes = self.features.nbytes if self.features is not None else 0
+        return self.sequence.data.nbytes + self.keypoints.nbytes + feature_bytes + state_bytes
+
+
+class SessionStore:
+    """Per-session SequenceState objects with LRU/TTL eviction.
+
+    Sessions idle for longer than `ttl` seconds are dropped, and the least
+    recently used sessions are evicted once the states together would use
+    more than `max_bytes`. `on_evict(session_id)` is called for every
+    session that is evicted or removed.
+    """
+
+    def __init__(self, factory, ttl=300, max_bytes=128 * 1024 * 1024, on_evict=None):
+        self.factory = factory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.sessions = OrderedDict()  # session_id -> [state, created, last_seen, frames]
+        self.lock = threading.Lock()
+        self.evicted = 0
+        # Running total of the states' nbytes (fixed once a state is created)
+        self.bytes = 0
+
+    def get(self, session_id=None):
+        """Return the state for `session_id`, creating it if needed, and mark it used"""
+        session_id = session_id or DEFAULT_SESSION_ID
+        now = time.time()
+        evicted = []
+
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                entry = [self.factory(), now, now, 0]
+                self.sessions[session_id] = entry
+                self.bytes += entry[0].nbytes
+            else:
+                self.sessions.move_to_end(session_id)
+            entry[2] = now
+            entry[3] += 1
+
+            evicted.extend(self._evict_expired(now))
+            evicted.extend(self._evict_over_budget())
+            self.evicted += len(evicted)
+
+        self._notify(evicted)
+        return entry[0]
+
+    def _evict_expired(self, now):
+        evicted = []
+        while self.sessions:
+            session_id, entry = next(iter(self.sessions.items()))
+            if now - entry[2] <= self.ttl:
+                break
+            self.sessions.popitem(last=False)
+            self.bytes -= entry[0].nbytes
+            evicted.append(session_id)
+        return evicted
+
+    def _evict_over_budget(self):
+        evicted = []
+        # Never evict the most recently used session
+        while self.bytes > self.max_bytes and len(self.sessions) > 1:
+            session_id, entry = self.sessions.popitem(last=False)
+            self.bytes -= entry[0].nbytes
+            evicted.append(session_id)
+        return evicted
+
+    def _notify(self, evicted):
+        for session_id in evicted:
+            log.info("Evicted session %s", session_id)
+            if self.on_evict:
+                self.on_evict(session_id)
+
+    def reset(self, session_id=None):
+        """Clear the window of one session (or all sessions).
+
+        Returns {session_id: end event of the episode the reset closed, or None}
+        for every session that was reset.
+        """
+        with self.lock:
+            if session_id is None:
+                entries = list(self.sessions.items())
+            else:
+                entries = [(session_id, self.sessions[session_id])] if session_id in self.sessions else []
+            return {sid: entry[0].reset() for sid, entry in entries}
+
+    def remove(self, session_id):
+        with self.lock:
+            entry = self.sessions.pop(session_id, None)
+            removed = entry is not None
+            if removed:
+                self.bytes -= entry[0].nbytes
+        if removed and self.on_evict:
+            self.on_evict(session_id)
+        return removed
+
+    def list(self):
+        now = time.time()
+        with self.lock:
+            return [{
+                'session_id': session_id,
+                'frames': entry[3],
+                'buffered': len(entry[0].sequence),
+                'age_seconds': round(now - entry[1], 1),
+                'idle_seconds': round(now - entry[2], 1),
+                'bytes': entry[0].nbytes,
+                'motion_skip_rate': entry[0].motion.hit_rate,
+                'roi_crop_rate': entry[0].roi.crop_rate,
+                'episode_active': entry[0].decision.active,
+                'episodes': entry[0].decision.episodes,
+                'late_frames': entry[0].order.late,
+            } for session_id, entry in self.sessions.items()]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'sessions': len(self.sessions),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'evicted': self.evicted,
+            }
@@ -0,0 +1,125 @@
+import json
+import logging
+import socket
+import socketserver
+import struct
+import threading
+
+log = logging.getLogger(__name__)
+
+# Every message on the stream channel is a 9-byte header followed by the payload:
+# uint32 payload length, uint8 message type, uint32 sequence number (big-endian).
+HEADER = struct.Struct('>IBI')
+
+MSG_FRAME = 1      # client -> server: JPEG bytes or an RGB8 raw frame (see frame_codec.py)
+MSG_CONFIG = 2     # client -> server: JSON settings, e.g. {"threshold": 0.7, "session_id": "desk-1"}
+MSG_RESULT = 129   # server -> client: JSON /process_frame response for frame `seq`
+MSG_EVENT = 130    # server -> client: JSON event pushed asynchronously (seq 0)
+
+MAX_PAYLOAD = 16 * 1024 * 1024
+
+
+def _recv_exact(sock, size):
+    """Read exactly `size` bytes, or return None if the peer closed the connection"""
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            return None
+        received += n
+    return buf
+
+
+class StreamHandler(socketserver.BaseRequestHandler):
+    """One persistent client connection: frames in, results and events out"""
+
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.send_lock = threading.Lock()
+        self.config = {}
+        self.server.add_client(self)
+
+    def handle(self):
+        while True:
+            header = _recv_exact(self.request, HEADER.size)
+            if header is None:
+                return
+            length, msg_type, seq = HEADER.unpack(header)
+            if length > MAX_PAYLOAD:
+                log.warning("Stream client sent oversized message (%d bytes), closing", length)
+                return
+            payload = _recv_exact(self.request, length) if length else bytearray()
+            if payload is None:
+                return
+
+            if msg_type == MSG_FRAME:
+                self.server.frame_handler(payload, self.config, self._replier(seq))
+            elif msg_type == MSG_CONFIG:
+                try:
+                    self.config.update(json.loads(payload))
+                except Exception as e:
+                    log.warning("Invalid stream config message: %s", e)
+            else:
+                log.warning("Unknown stream message type %d", msg_type)
+
+    def _replier(self, seq):
+        """Callback that sends the result for frame `seq` (possibly from another thread)"""
+        def reply(result):
+            try:
+                self.send(MSG_RESULT, seq, dict(result, seq=seq))
+            except OSError:
+                pass
+        return reply
+
+    def finish(self):
+        self.server.remove_client(self)
+
+    def send(self, msg_type, seq, obj):
+        data = json.dumps(obj).encode()
+        with self.send_lock:
+            self.request.sendall(HEADER.pack(len(data), msg_type, seq) + data)
+
+
+class StreamServer(socketserver.ThreadingTCPServer):
+    """Persistent length-prefixed TCP channel between Electron and the bridge.
+
+    `frame_handler(payload, config, reply)` is called for every frame and
+    must eventually call `reply(result)` with the JSON-serializable result
+    dict, either directly or later from another thread (frames it decides
+    to drop need no reply). `config` holds the settings the client sent in
+    MSG_CONFIG messages on this connection.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host, port, frame_handler):
+        super().__init__((host, port), StreamHandler)
+        self.frame_handler = frame_handler
+        self.clients = set()
+        self.clients_lock = threading.Lock()
+
+    def add_client(self, client):
+        with self.clients_lock:
+            self.clients.add(client)
+
+    def remove_client(self, client):
+        with self.clients_lock:
+            self.clients.discard(client)
+
+    def broadcast(self, event):
+        """Push an event to every connected client"""
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.send(MSG_EVENT, 0, event)
+            except OSError:
+                pass
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name='stream-server', daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,216 @@
+import copy
+
+import numpy as np
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _softmax(x):
+    e = np.exp(x - np.max(x))
+    return e / np.sum(e)
+
+
+_ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+    'softmax': _softmax,
+}
+
+
+def model_layers(model):
+    """The LSTM/Dense weights of a Keras model as [(kind, weights..., activation)] tuples"""
+    layers = []
+    for layer in model.layers:
+        kind = layer.__class__.__name__
+        config = layer.get_config()
+        weights = [np.asarray(w, dtype=np.float32) for w in layer.get_weights()]
+
+        if kind == 'LSTM':
+            if config.get('activation', 'tanh') != 'tanh' or config.get('recurrent_activation', 'sigmoid') != 'sigmoid':
+                raise ValueError(f"Unsupported LSTM activations in layer {layer.name}")
+            kernel, recurrent_kernel = weights[0], weights[1]
+            bias = weights[2] if len(weights) > 2 else np.zeros(kernel.shape[1], dtype=np.float32)
+            layers.append(('lstm', kernel, recurrent_kernel, bias, 'tanh'))
+        elif kind == 'Dense':
+            activation = config.get('activation', 'linear')
+            if activation not in _ACTIVATIONS:
+                raise ValueError(f"Unsupported Dense activation '{activation}' in layer {layer.name}")
+            bias = weights[1] if len(weights) > 1 else np.zeros(weights[0].shape[1], dtype=np.float32)
+            layers.append(('dense', weights[0], bias, activation))
+        elif kind in ('InputLayer', 'Dropout'):
+            continue
+        else:
+            raise ValueError(f"Unsupported layer type for streaming inference: {kind}")
+    return layers
+
+
+def save_weights(model, path):
+    """Write the streaming network's weights to an .npz file, so it can be built without TensorFlow"""
+    arrays = {}
+    for i, (kind, *weights, activation) in enumerate(model_layers(model)):
+        arrays[f'{i}_kind'] = np.array(kind)
+        arrays[f'{i}_activation'] = np.array(activation)
+        for j, weight in enumerate(weights):
+            arrays[f'{i}_{j}'] = weight
+    np.savez(path, **arrays)
+
+
+def load_weights(path):
+    """Layers written by save_weights()"""
+    layers = []
+    with np.load(path) as arrays:
+        i = 0
+        while f'{i}_kind' in arrays:
+            count = 3 if str(arrays[f'{i}_kind']) == 'lstm' else 2
+            layers.append((str(arrays[f'{i}_kind']),) + tuple(arrays[f'{i}_{j}'] for j in range(count))
+                          + (str(arrays[f'{i}_activation']),))
+            i += 1
+    if not layers:
+        raise ValueError(f"No streaming weights in {path}")
+    return layers
+
+
+class StreamingLSTM:
+    """Stateful single-step version of the action.h5 network.
+
+    The weights are copied out of the Keras model once (or loaded from the
+    .npz file convert_model.py writes, see from_weights()) and the LSTM
+    hidden/cell state is carried from frame to frame, so each new frame costs
+    one timestep instead of SEQUENCE_LENGTH timesteps.
+
+    The windowed model always starts from a zero state at the beginning of
+    the window, while the streamed state keeps some memory of frames that
+    have already left the window. `resync()` replays the current window from
+    a zero state so the output is exact again; the difference observed at
+    that point is recorded as drift.
+    """
+
+    def __init__(self, model, sequence_length, resync_interval, layers=None):
+        self.sequence_length = sequence_length
+        self.resync_interval = resync_interval
+        self.layers = []
+        self.resyncs = 0
+        self.last_drift = 0.0
+        self.max_drift = 0.0
+
+        for kind, *weights, activation in (layers if layers is not None else model_layers(model)):
+            if kind == 'lstm':
+                self.layers.append(('lstm',) + tuple(weights))
+            else:
+                self.layers.append(('dense',) + tuple(weights) + (_ACTIVATIONS[activation],))
+
+        self.reset()
+
+    @classmethod
+    def from_weights(cls, path, sequence_length, resync_interval):
+        """Build from an .npz file written by save_weights() (no TensorFlow needed)"""
+        return cls(None, sequence_length, resync_interval, layers=load_weights(path))
+
+    def fork(self):
+        """Return a copy that shares the weights but has its own zeroed state"""
+        forked = copy.copy(self)
+        forked.resyncs = 0
+        forked.last_drift = 0.0
+        forked.max_drift = 0.0
+        forked.reset()
+        return forked
+
+    @property
+    def nbytes(self):
+        """Size of the per-stream state (the weights are shared between forks)"""
+        return sum(h.nbytes + c.nbytes for h, c in self.state)
+
+    def reset(self):
+        """Clear the hidden/cell state of every LSTM layer"""
+        self.state = []
+        for layer in self.layers:
+            if layer[0] == 'lstm':
+                units = layer[2].shape[0]
+                self.state.append((np.zeros(units, dtype=np.float32), np.zeros(units, dtype=np.float32)))
+        self.context_length = 0
+
+    def _forward(self, inputs):
+        """Advance the state over `inputs` (timesteps, features) and return the output"""
+        x = np.asarray(inputs, dtype=np.float32)
+        timesteps = x.shape[0]
+        lstm_index = 0
+
+        for layer in self.layers:
+            if layer[0] == 'lstm':
+                _, kernel, recurrent_kernel, bias = layer
+                h, c = self.state[lstm_index]
+                units = h.shape[0]
+
+                # Input projection for every timestep in one matmul, then the
+                # recurrence one step at a time.
+                projected = x @ kernel + bias
+                outputs = np.empty((x.shape[0], units), dtype=np.float32)
+                for t in range(x.shape[0]):
+                    z = projected[t] + h @ recurrent_kernel
+                    i = _sigmoid(z[:units])
+                    f = _sigmoid(z[units:2 * units])
+                    g = np.tanh(z[2 * units:3 * units])
+                    o = _sigmoid(z[3 * units:])
+                    c = f * c + i * g
+                    h = o * np.tanh(c)
+                    outputs[t] = h
+
+                self.state[lstm_index] = (h, c)
+                lstm_index += 1
+                x = outputs
+            else:
+                # Dense layers only see the last LSTM output (return_sequences=False)
+                _, kernel, bias, activation = layer
+                if x.ndim == 2:
+                    x = x[-1]
+                x = activation(x @ kernel + bias)
+
+        self.context_length += timesteps
+        return x
+
+    def step(self, keypoints):
+        """Feed one frame of keypoints and return the current class probabilities"""
+        return self._forward(np.reshape(keypoints, (1, -1)))
+
+    def needs_resync(self):
+        """True once the state has seen `resync_interval` frames beyond the window"""
+        return self.context_length - self.sequence_length >= self.resync_interval
+
+    def resync(self, window, streamed=None):
+        """Replay `window` from a zero state so the output matches the windowed model.
+
+        If `streamed` (the output produced before the resync) is given, the
+        max absolute difference is recorded as drift.
+        """
+        self.reset()
+        res = self._forward(window)
+        self.resyncs += 1
+        if streamed is not None:
+            self.last_drift = float(np.max(np.abs(res - streamed)))
+            self.max_drift = max(self.max_drift, self.last_drift)
+        return res
+
+    def validate(self, model, keypoint_dim, tolerance):
+        """Compare against `model` (a Keras model or inference backend) on a random window; return the max abs error"""
+        window = np.random.random((self.sequence_length, keypoint_dim)).astype(np.float32)
+        expected = np.asarray(model.predict_on_batch(np.expand_dims(window, axis=0)))[0]
+        self.reset()
+        actual = self._forward(window)
+        self.reset()
+        error = float(np.max(np.abs(expected - actual)))
+        if error > tolerance:
+            raise ValueError(f"Streaming output differs from Keras by {error:.5f} (tolerance {tolerance})")
+        return error
+
+    def stats(self):
+        return {
+            'context_length': self.context_length,
+            'resync_interval': self.resync_interval,
+            'resyncs': self.resyncs,
+            'last_drift': self.last_drift,
+            'max_drift': self.max_drift,
+        }
@@ -0,0 +1,53 @@
+import logging
+from types import SimpleNamespace
+
+import numpy as np
+
+from config import ACTIONS, STUB_MODEL_PROBABILITIES
+from keypoints import LANDMARK_GROUPS
+from model_processor import ModelProcessor
+
+log = logging.getLogger(__name__)
+
+
+class StubBackend:
+    """Inference backend that returns the same probabilities for every window"""
+
+    name = 'stub'
+
+    def __init__(self, probabilities=STUB_MODEL_PROBABILITIES):
+        self.probabilities = np.asarray(probabilities, dtype=np.float32)
+        self.input_shape = (None, None, None)
+        self.output_shape = (None, len(ACTIONS))
+
+    def predict_on_batch(self, batch):
+        return np.tile(self.probabilities, (len(batch), 1))
+
+
+class StubHolistic:
+    """Stand-in for mp_holistic.Holistic that never detects anything"""
+
+    def __init__(self):
+        self.results = SimpleNamespace(**{attr: None for _, attr, _, _ in LANDMARK_GROUPS})
+
+    def process(self, image):
+        return self.results
+
+
+class StubProcessor(ModelProcessor):
+    """ModelProcessor that never loads TensorFlow or MediaPipe.
+
+    Frames still go through decoding, color conversion, keypoint extraction,
+    the per-session sequence window and serialization, so load tests with
+    STUB_MODEL measure the server and transport overhead on their own.
+    """
+
+    def load_model(self):
+        self.backend = StubBackend()
+        log.warning("Using the stub model: predictions are constant %s", dict(zip(ACTIONS, STUB_MODEL_PROBABILITIES)))
+
+    def init_mediapipe(self):
+        if self.detection_processes > 0:
+            self.start_detection_pool(StubHolistic)
+        else:
+            self.holistic = StubHolistic()
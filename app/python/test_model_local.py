@@ -7,7 +7,9 @@ Press 'q' to quit
 import cv2
 import numpy as np
 from model_processor import ModelProcessor
+from feature_profiles import select_features
 from config import DEFAULT_PROBABILITY_THRESHOLD
+from bridge_logging import setup_logging
 
 def draw_info(frame, result, threshold):
     """Draw information overlay on frame"""
@@ -57,6 +59,7 @@ def draw_info(frame, result, threshold):
 
 
 def main():
+    setup_logging()
     print("="*60)
     print("Local Model Test - action.h5")
     print("="*60)
@@ -65,7 +68,7 @@ def main():
     print("\nInitializing model processor...")
     processor = ModelProcessor()
 
-    if not processor.model:
+    if processor.backend is None:
         print("ERROR: Model failed to load. Check if action.h5 exists.")
         return
 
@@ -104,16 +107,11 @@ def main():
         # Extract keypoints
         keypoints = processor.extract_keypoints(results)
 
-        # Add to sequence
-        processor.sequence.append(keypoints)
-        processor.sequence = processor.sequence[-30:]  # SEQUENCE_LENGTH
+        # Add the profile's features to the sequence and predict if we have enough frames
+        res = processor.update_sequence(select_features(keypoints, processor.profile))
 
         result = None
-        # Predict if we have enough frames
-        if len(processor.sequence) == 30:
-            res = processor.model.predict(np.expand_dims(
-                processor.sequence, axis=0), verbose=0)[0]
-
+        if res is not None:
             max_prob = np.max(res)
             predicted_action = processor.model.output_names[np.argmax(res)] if hasattr(processor.model, 'output_names') else ['sleeping', 'doomscrolling'][np.argmax(res)]
 
@@ -0,0 +1,15 @@
+// Decodes a JSON array of landmark payloads (read from stdin) with
+// app/electron/landmarkCodec.js, in order and sharing one delta state, and
+// writes the decoded frames to stdout as a JSON array. Used by
+// test_landmark_codec.py to check the Python encoder against the client.
+const path = require('path');
+const { createDeltaState, decodeLandmarks } = require(
+  path.join(__dirname, '..', '..', '..', 'electron', 'landmarkCodec.js'));
+
+let input = '';
+process.stdin.on('data', (chunk) => { input += chunk; });
+process.stdin.on('end', () => {
+  const deltaState = createDeltaState();
+  const decoded = JSON.parse(input).map((payload) => decodeLandmarks(payload, deltaState));
+  process.stdout.write(JSON.stringify(decoded));
+});
@@ -0,0 +1,85 @@
+import pytest
+
+from decision_engine import DecisionEngine
+from session_store import SequenceState, SessionStore
+
+
+def _feed(engine, probabilities, start=0.0):
+    """Feed 'doomscrolling' probabilities one per second; returns [(index, event name)]"""
+    events = []
+    for i, probability in enumerate(probabilities):
+        event = engine.update({'doomscrolling': probability, 'nothing': 1 - probability}, now=start + i)
+        if event is not None:
+            events.append((i, event['event']))
+    return events
+
+
+def test_ema_hysteresis_ignores_single_noisy_frames():
+    engine = DecisionEngine(action='doomscrolling', smoothing='ema', alpha=0.5, enter=0.8, exit=0.4)
+    # One spike doesn't start an episode
+    assert _feed(engine, [0.1, 0.95, 0.1, 0.1]) == []
+    engine.reset()
+    # Sustained high probabilities start one; a single dip doesn't end it
+    events = _feed(engine, [0.9, 0.9, 0.9, 0.5, 0.9, 0.1, 0.1])
+    assert events == [(0, 'episode_start'), (6, 'episode_end')]
+    assert engine.episodes == 1
+
+
+def test_scores_between_the_thresholds_keep_the_current_decision():
+    engine = DecisionEngine(action='doomscrolling', smoothing='ema', alpha=1.0, enter=0.8, exit=0.4)
+    assert _feed(engine, [0.6, 0.7, 0.6]) == []
+    assert _feed(engine, [0.9, 0.6, 0.7, 0.5, 0.3]) == [(0, 'episode_start'), (4, 'episode_end')]
+
+
+def test_n_of_m_needs_n_frames_past_a_threshold():
+    engine = DecisionEngine(action='doomscrolling', smoothing='n_of_m', n=3, m=4, enter=0.8, exit=0.4)
+    assert _feed(engine, [0.9, 0.1, 0.9, 0.6]) == []
+    events = _feed(engine, [0.9, 0.9, 0.1, 0.2, 0.1], start=10)
+    # Starts once three of the last four are high, ends once three are low
+    assert events == [(1, 'episode_start'), (4, 'episode_end')]
+
+
+def test_end_event_reports_duration_and_peak():
+    engine = DecisionEngine(action='doomscrolling', smoothing='ema', alpha=1.0, enter=0.8, exit=0.4)
+    _feed(engine, [0.85, 0.95])
+    event = engine.update({'doomscrolling': 0.2}, now=11.0)
+    assert event['event'] == 'episode_end'
+    assert event['duration_seconds'] == 11.0
+    assert event['peak_score'] == 0.95
+
+
+def test_reset_ends_an_open_episode():
+    engine = DecisionEngine(action='doomscrolling', smoothing='ema', alpha=1.0, enter=0.8, exit=0.4)
+    assert engine.reset() is None
+    _feed(engine, [0.9], start=100.0)
+    event = engine.reset(now=103.5)
+    assert event['event'] == 'episode_end'
+    assert event['reason'] == 'reset'
+    assert event['duration_seconds'] == 3.5
+    assert not engine.active
+    assert engine.reset() is None
+
+
+def test_session_reset_returns_the_episode_end():
+    store = SessionStore(SequenceState, max_bytes=10 ** 9)
+    state = store.get('desk')
+    store.get('idle')
+    state.decision = DecisionEngine(action='doomscrolling', smoothing='ema', alpha=1.0, enter=0.8, exit=0.4)
+    state.decision.update({'doomscrolling': 0.9})
+    reset = store.reset()
+    assert reset['idle'] is None
+    assert reset['desk']['event'] == 'episode_end'
+    assert reset['desk']['reason'] == 'reset'
+
+
+def test_missing_probabilities_are_ignored():
+    engine = DecisionEngine(action='doomscrolling')
+    assert engine.update(None) is None
+    assert engine.update({}) is None
+    assert engine.score is None
+
+
+@pytest.mark.parametrize('kwargs', [{'smoothing': 'median'}, {'enter': 0.5, 'exit': 0.6}])
+def test_invalid_settings_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        DecisionEngine(**kwargs)
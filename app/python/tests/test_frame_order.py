@@ -0,0 +1,74 @@
+import threading
+import time
+
+from frame_order import FrameOrder
+
+
+def _apply(order, ticket, applied, delay=0.0):
+    """A frame's thread: detection takes `delay` seconds, then the frame updates the stream"""
+    time.sleep(delay)
+    with order.turn:
+        try:
+            if order.wait(ticket):
+                applied.append(ticket)
+        finally:
+            order.done(ticket)
+
+
+def _tickets(order, count):
+    with order.turn:
+        return [order.ticket() for _ in range(count)]
+
+
+def test_frames_finishing_out_of_order_are_applied_in_ticket_order():
+    order = FrameOrder(threading.Lock(), timeout=5.0)
+    applied = []
+    delays = [0.2, 0.0, 0.1, 0.05]
+    threads = [threading.Thread(target=_apply, args=(order, ticket, applied, delay))
+               for ticket, delay in zip(_tickets(order, len(delays)), delays)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert applied == [0, 1, 2, 3]
+    assert (order.timeouts, order.late) == (0, 0)
+
+
+def test_failed_frame_releases_the_next_one():
+    order = FrameOrder(threading.Lock(), timeout=5.0)
+    first, second = _tickets(order, 2)
+    with order.turn:
+        order.done(first)  # e.g. detection raised
+        assert order.wait(second)
+        order.done(second)
+    assert order.applied == 2
+
+
+def test_frame_stops_waiting_after_timeout_and_earlier_frame_is_late():
+    order = FrameOrder(threading.Lock(), timeout=0.05)
+    first, second = _tickets(order, 2)
+    with order.turn:
+        start = time.monotonic()
+        assert order.wait(second)
+        assert time.monotonic() - start >= 0.05
+        order.done(second)
+        assert order.timeouts == 1
+
+        # The first frame's detection finishes after the second was applied
+        assert not order.wait(first)
+        order.done(first)
+    assert order.late == 1
+    assert order.applied == 2
+
+
+def test_tickets_after_a_timeout_keep_their_order():
+    order = FrameOrder(threading.Lock(), timeout=0.05)
+    first, second, third = _tickets(order, 3)
+    with order.turn:
+        assert order.wait(second)
+        order.done(second)
+        assert order.wait(third)
+        order.done(third)
+        assert not order.wait(first)
+        order.done(first)
+    assert (order.timeouts, order.late, order.applied) == (1, 1, 3)
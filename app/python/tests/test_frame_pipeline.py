@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from frame_pipeline import FramePipeline
+
+
+class Handler:
+    """Pipeline handler that records the jobs it ran and can be held until released"""
+
+    def __init__(self, hold=False):
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+        self.started = threading.Semaphore(0)
+        self.lock = threading.Lock()
+        self.jobs = []
+        self.running = {}  # key -> frames of the key currently in the handler
+        self.max_running = {}
+
+    def __call__(self, job):
+        key, value = job
+        with self.lock:
+            self.running[key] = self.running.get(key, 0) + 1
+            self.max_running[key] = max(self.max_running.get(key, 0), self.running[key])
+        self.started.release()
+        self.release.wait(5)
+        time.sleep(0.01)
+        with self.lock:
+            self.running[key] -= 1
+            self.jobs.append(job)
+        return {'value': value}
+
+
+def _drain(pipeline, submitted, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = pipeline.stats()
+        if stats['processed'] + stats['dropped'] >= submitted and stats['queue_depth'] == 0:
+            return
+        time.sleep(0.005)
+    raise AssertionError(f"Pipeline did not drain: {pipeline.stats()}")
+
+
+@pytest.fixture
+def make_pipeline():
+    pipelines = []
+
+    def make(handler, **kwargs):
+        pipeline = FramePipeline(handler, **kwargs)
+        pipeline.start()
+        pipelines.append(pipeline)
+        return pipeline
+
+    yield make
+    for pipeline in pipelines:
+        pipeline.stop()
+
+
+def test_latest_policy_replaces_queued_frames_of_the_same_stream(make_pipeline):
+    handler = Handler(hold=True)
+    pipeline = make_pipeline(handler, maxsize=8, policy='latest', workers=1)
+    pipeline.submit(('a', 0), key='a')
+    assert handler.started.acquire(timeout=5)  # frame 0 is in the handler
+    for value in range(1, 5):
+        frame_id = pipeline.submit(('a', value), key='a')
+    handler.release.set()
+    _drain(pipeline, 5)
+
+    assert handler.jobs == [('a', 0), ('a', 4)]
+    assert pipeline.stats()['dropped'] == 3
+    assert pipeline.latest('a') == (frame_id, {'value': 4})
+
+
+def test_full_queue_drops_the_oldest_frame(make_pipeline):
+    handler = Handler(hold=True)
+    pipeline = make_pipeline(handler, maxsize=2, policy='oldest', workers=1)
+    pipeline.submit(('a', 0), key='a')
+    assert handler.started.acquire(timeout=5)
+    for value in range(1, 4):
+        pipeline.submit(('a', value), key='a')
+    handler.release.set()
+    _drain(pipeline, 4)
+
+    assert handler.jobs == [('a', 0), ('a', 2), ('a', 3)]
+    assert pipeline.stats()['dropped'] == 1
+
+
+def test_a_stream_never_has_two_frames_in_flight(make_pipeline):
+    handler = Handler(hold=True)
+    pipeline = make_pipeline(handler, maxsize=64, policy='oldest', workers=4)
+    for value in range(10):
+        for key in ('a', 'b'):
+            pipeline.submit((key, value), key=key)
+    # Different streams do run concurrently...
+    assert handler.started.acquire(timeout=5) and handler.started.acquire(timeout=5)
+    assert not handler.started.acquire(timeout=0.1)
+    handler.release.set()
+    _drain(pipeline, 20)
+
+    # ...but one stream's frames never overlap, and run in order
+    assert handler.max_running == {'a': 1, 'b': 1}
+    for key in ('a', 'b'):
+        assert [value for k, value in handler.jobs if k == key] == list(range(10))
+
+
+def test_latest_waits_for_the_frame_it_asks_for(make_pipeline):
+    pipeline = make_pipeline(Handler(), maxsize=8, workers=1)
+    assert pipeline.latest('a') == (0, None)
+    frame_id = pipeline.submit(('a', 1), key='a')
+    assert pipeline.latest('a', frame_id, timeout=5) == (frame_id, {'value': 1})
+
+
+def test_forget_drops_queued_frames_and_result(make_pipeline):
+    handler = Handler(hold=True)
+    pipeline = make_pipeline(handler, maxsize=8, policy='oldest', workers=1)
+    pipeline.submit(('a', 0), key='a')
+    assert handler.started.acquire(timeout=5)
+    pipeline.submit(('b', 0), key='b')
+    pipeline.submit(('b', 1), key='b')
+    pipeline.forget('b')
+    assert pipeline.stats()['dropped'] == 2
+    assert pipeline.depth() == 0
+    handler.release.set()
+    _drain(pipeline, 3)
+    assert handler.jobs == [('a', 0)]
+    assert pipeline.latest('b') == (0, None)
@@ -0,0 +1,181 @@
+import base64
+import json
+import os
+import shutil
+import subprocess
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+from config import KEYPOINT_DIM
+from keypoints import GROUP_LAYOUT, DetectedGroups
+from landmark_codec import DeltaState, QUANT_MAX, QUANT_MIN, encode_landmarks, parse_landmark_format
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+FIXTURE_PATH = os.path.join(FIXTURES, 'landmark_codec.json')
+DECODER_JS = os.path.join(FIXTURES, 'decode_landmarks.js')
+
+# Pose and left hand detected; face and right hand missing
+DETECTED = DetectedGroups(True, False, True, False)
+UINT16_STEP = (QUANT_MAX - QUANT_MIN) / 65535
+
+# name -> parse_landmark_format() options; every case encodes all fixture frames in order
+CASES = {
+    'json': {'encoding': 'json'},
+    'float16': {'encoding': 'float16'},
+    'uint16': {'encoding': 'uint16'},
+    'uint16_delta': {'encoding': 'uint16', 'delta': True},
+}
+
+
+def _keypoints(values):
+    """Full keypoint vector with the fixture's {group: flat values} filled in"""
+    keypoints = np.zeros(KEYPOINT_DIM, dtype=np.float32)
+    for name, _, _, _, start, end in GROUP_LAYOUT:
+        if name in values:
+            keypoints[start:end] = values[name]
+    return keypoints
+
+
+def _encode(frames, case):
+    fmt = parse_landmark_format(encoding=CASES[case]['encoding'], delta=CASES[case].get('delta'))
+    delta_state = DeltaState()
+    return [encode_landmarks(DETECTED, _keypoints(frame), fmt, delta_state) for frame in frames]
+
+
+def _decode(payload, delta_state):
+    """Python port of decodeLandmarks() in app/electron/landmarkCodec.js"""
+    if not payload or not payload.get('encoding'):
+        return payload or {}
+    data = base64.b64decode(payload['data'])
+    if payload['compression'] == 'zlib':
+        data = zlib.decompress(data)
+
+    if payload['encoding'] == 'float16':
+        values = np.frombuffer(data, dtype='<f2').astype(np.float32)
+    else:
+        quantized = np.frombuffer(data, dtype='<u2')
+        if payload['ref'] is not None:
+            if delta_state.get('seq') != payload['ref'] or len(delta_state['values']) != len(quantized):
+                return None
+            quantized = delta_state['values'] + quantized  # wraps mod 2**16
+        if payload['seq'] is not None:
+            delta_state['seq'] = payload['seq']
+            delta_state['values'] = quantized
+        low, high = payload['range']
+        values = (low + quantized * ((high - low) / 65535)).astype(np.float32)
+
+    landmarks = {}
+    offset = 0
+    for name, count, width in payload['groups']:
+        landmarks[name] = values[offset:offset + count * width].reshape(count, width).tolist()
+        offset += count * width
+    return landmarks
+
+
+def _decode_all(payloads):
+    delta_state = {}
+    return [_decode(payload, delta_state) for payload in payloads]
+
+
+def _decode_js(payloads):
+    result = subprocess.run(['node', DECODER_JS], input=json.dumps(payloads), capture_output=True,
+                            text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def _flat(landmarks):
+    return {name: np.asarray(points, dtype=np.float64).ravel() for name, points in landmarks.items()}
+
+
+def _assert_close(decoded, expected, atol):
+    decoded = _flat(decoded)
+    assert sorted(decoded) == sorted(expected)
+    for name, values in expected.items():
+        np.testing.assert_allclose(decoded[name], values, rtol=0, atol=atol, err_msg=name)
+
+
+@pytest.fixture(scope='module')
+def fixture():
+    with open(FIXTURE_PATH) as f:
+        data = json.load(f)
+    data['frames'] = [{name: np.asarray(values, dtype=np.float32) for name, values in frame.items()}
+                      for frame in data['frames']]
+    return data
+
+
+@pytest.mark.parametrize('case, atol', [('json', 0), ('float16', 1e-3), ('uint16', UINT16_STEP / 2 + 1e-7),
+                                        ('uint16_delta', UINT16_STEP / 2 + 1e-7)])
+def test_round_trip(fixture, case, atol):
+    payloads = _encode(fixture['frames'], case)
+    for frame, decoded in zip(fixture['frames'], _decode_all(payloads)):
+        _assert_close(decoded, frame, atol)
+
+
+def test_delta_sends_keyframe_then_deltas(fixture):
+    payloads = _encode(fixture['frames'], 'uint16_delta')
+    assert [p['seq'] for p in payloads] == [1, 2, 3]
+    assert [p['ref'] for p in payloads] == [None, 1, 2]
+    assert all(p['compression'] == 'zlib' for p in payloads)
+
+
+def test_delta_without_reference_frame_is_rejected(fixture):
+    payloads = _encode(fixture['frames'], 'uint16_delta')
+    assert _decode(payloads[1], {}) is None
+
+
+def test_groups_follow_detection_and_format(fixture):
+    payload = _encode(fixture['frames'][:1], 'uint16')[0]
+    assert payload['groups'] == [['pose', 33, 4], ['left_hand', 21, 3]]
+    fmt = parse_landmark_format(groups='hands', encoding='float16')
+    payload = encode_landmarks(DETECTED, _keypoints(fixture['frames'][0]), fmt)
+    assert payload['groups'] == [['left_hand', 21, 3]]
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_matches_js_fixture(fixture, case):
+    # The fixture's payloads decode (with the Python port) to what landmarkCodec.js decoded them to...
+    for decoded, expected in zip(_decode_all(fixture['payloads'][case]), fixture['decoded'][case]):
+        _assert_close(decoded, _flat(expected), 0)
+    # ...and the encoder still produces payloads that decode to the same values
+    for decoded, expected in zip(_decode_all(_encode(fixture['frames'], case)), fixture['decoded'][case]):
+        _assert_close(decoded, _flat(expected), 0)
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+@pytest.mark.parametrize('case', CASES)
+def test_js_decoder(fixture, case):
+    payloads = _encode(fixture['frames'], case)
+    for decoded, expected in zip(_decode_js(payloads), _decode_all(payloads)):
+        _assert_close(decoded, _flat(expected), 0)
+
+
+def _regenerate():
+    """Write fixtures/landmark_codec.json: three frames of moving landmarks, encoded and decoded by landmarkCodec.js"""
+    rng = np.random.default_rng(7)
+    pose = np.column_stack([rng.uniform(0, 1, 33), rng.uniform(0, 1, 33),
+                            rng.uniform(-0.5, 0.5, 33), rng.uniform(0, 1, 33)]).ravel()
+    hand = np.column_stack([rng.uniform(0, 1, 21), rng.uniform(0, 1, 21), rng.uniform(-0.1, 0.1, 21)]).ravel()
+    frames = []
+    for _ in range(3):
+        frames.append({'pose': pose.astype(np.float32), 'left_hand': hand.astype(np.float32)})
+        pose = pose + rng.normal(0, 0.01, pose.shape)
+        hand = hand + rng.normal(0, 0.01, hand.shape)
+
+    payloads = {case: _encode(frames, case) for case in CASES}
+    data = {
+        'frames': [{name: [float(v) for v in values] for name, values in frame.items()} for frame in frames],
+        'payloads': payloads,
+        'decoded': {case: _decode_js(payloads[case]) for case in CASES},
+    }
+    with open(FIXTURE_PATH, 'w') as f:
+        json.dump(data, f)
+        f.write('\n')
+
+
+if __name__ == '__main__':
+    # PYTHONPATH=. python tests/test_landmark_codec.py --regenerate (needs node)
+    if '--regenerate' in sys.argv:
+        _regenerate()
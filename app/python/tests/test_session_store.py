@@ -0,0 +1,91 @@
+import pytest
+
+import session_store
+from session_store import DEFAULT_SESSION_ID, SequenceState, SessionStore
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def state_bytes():
+    return SequenceState().nbytes
+
+
+def _store(max_bytes, ttl=300):
+    evicted = []
+    store = SessionStore(SequenceState, ttl=ttl, max_bytes=max_bytes, on_evict=evicted.append)
+    return store, evicted
+
+
+def test_get_returns_the_same_state_per_session(clock, state_bytes):
+    store, _ = _store(10 * state_bytes)
+    assert store.get('a') is store.get('a')
+    assert store.get(None) is store.get(DEFAULT_SESSION_ID)
+    assert store.get('a') is not store.get('b')
+    assert store.stats()['bytes'] == 3 * state_bytes
+
+
+def test_idle_sessions_expire(clock, state_bytes):
+    store, evicted = _store(10 * state_bytes, ttl=60)
+    store.get('a')
+    clock.now += 30
+    store.get('b')
+    clock.now += 31
+    store.get('c')  # 'a' idle for 61 s, 'b' for 31 s
+    assert evicted == ['a']
+    assert [s['session_id'] for s in store.list()] == ['b', 'c']
+    assert store.stats()['bytes'] == 2 * state_bytes
+
+
+def test_least_recently_used_session_is_evicted_over_budget(clock, state_bytes):
+    store, evicted = _store(int(2.5 * state_bytes))
+    store.get('a')
+    store.get('b')
+    store.get('a')  # 'b' is now the least recently used
+    store.get('c')
+    assert evicted == ['b']
+    assert [s['session_id'] for s in store.list()] == ['a', 'c']
+    assert store.stats() == {'sessions': 2, 'bytes': 2 * state_bytes, 'max_bytes': int(2.5 * state_bytes),
+                             'ttl_seconds': 300, 'evicted': 1}
+
+
+def test_most_recent_session_is_kept_even_over_budget(clock, state_bytes):
+    store, evicted = _store(state_bytes // 2)
+    store.get('a')
+    state = store.get('b')
+    assert evicted == ['a']
+    assert store.get('b') is state
+    assert store.stats()['sessions'] == 1
+
+
+def test_remove_frees_the_budget(clock, state_bytes):
+    store, evicted = _store(int(2.5 * state_bytes))
+    store.get('a')
+    store.get('b')
+    assert store.remove('a')
+    assert not store.remove('a')
+    store.get('c')
+    assert evicted == ['a']
+    assert store.stats()['bytes'] == 2 * state_bytes
+
+
+def test_reset_clears_the_window(clock):
+    store, _ = _store(10 ** 9)
+    state = store.get('a')
+    state.sequence.push(state.keypoints)
+    assert store.reset('a') == {'a': None}
+    assert len(state.sequence) == 0
+    assert store.reset('missing') == {}
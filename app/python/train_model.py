@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Train the action LSTM for one or more feature profiles and compare them.
+
+Every profile gets the training notebook's network (LSTM 64 -> LSTM 32 ->
+Dense 16 -> softmax), sized for that profile's input width, and is fit on
+the same packed dataset (see keypoint_dataset.py). The profile's features
+are selected from the stored full keypoint vectors, exactly as
+ModelProcessor does for live frames. Models are saved as action.h5
+('full') or action.<profile>.h5, which ModelProcessor loads for
+FEATURE_PROFILE.
+
+An existing model file is evaluated rather than retrained, unless
+--retrain is given, so the shipped action.h5 can be compared against new
+profiles. The side-by-side report shows, for each profile:
+- accuracy on a shared held-out split
+- LSTM latency per window and per streaming step
+- keypoint/feature extraction time
+- MediaPipe time per frame, if MediaPipe is installed
+
+Usage: python train_model.py --dataset dataset [--profiles full pose_hands pose_hands_face]
+                             [--epochs 50] [--retrain] [--report profiles.json]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from config import MODEL_PATH, SEQUENCE_LENGTH, STREAMING_RESYNC_INTERVAL
+from feature_profiles import PROFILES, get_profile, profile_model_path
+from keypoint_dataset import KeypointDataset, keras_sequence
+
+
+def build_model(feature_dim, classes):
+    """The training notebook's network for `feature_dim` features per frame"""
+    from tensorflow import keras
+
+    model = keras.Sequential([
+        keras.Input(shape=(SEQUENCE_LENGTH, feature_dim)),
+        keras.layers.LSTM(64, return_sequences=True, activation='tanh'),
+        keras.layers.LSTM(32, return_sequences=False, activation='tanh'),
+        keras.layers.Dense(16, activation='relu'),
+        keras.layers.Dense(classes, activation='softmax'),
+    ])
+    model.compile(optimizer='Adam', loss='categorical_crossentropy', metrics=['categorical_accuracy'])
+    return model
+
+
+def median_ms(fn, repeats):
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return round(float(np.median(times)) * 1000, 3)
+
+
+def model_latency(model, feature_dim, repeats):
+    """Median ms per windowed prediction and per streaming step"""
+    from streaming_inference import StreamingLSTM
+
+    window = np.random.default_rng(0).random((1, SEQUENCE_LENGTH, feature_dim), dtype=np.float32)
+    windowed = median_ms(lambda: model.predict_on_batch(window), repeats)
+    streaming = StreamingLSTM(model, SEQUENCE_LENGTH, STREAMING_RESYNC_INTERVAL)
+    step = median_ms(lambda: streaming.step(window[0, 0]), repeats * 10)
+    return windowed, step
+
+
+def extraction_latency(profile, repeats):
+    """Median ms to extract keypoints and select the profile's features from full Holistic results"""
+    from benchmark_keypoints import make_results
+    from keypoints import extract_keypoints
+    from feature_profiles import select_features
+
+    results = make_results(np.random.default_rng(0))
+    if 'face' not in profile.groups:
+        # The profile's detector doesn't produce a face mesh
+        results.face_landmarks = None
+    keypoints = np.zeros(PROFILES['full'].dim, dtype=np.float32)
+    features = np.zeros(profile.dim, dtype=np.float32)
+
+    def run():
+        extract_keypoints(results, keypoints)
+        select_features(keypoints, profile, features if profile.dim != keypoints.size else None)
+
+    return median_ms(run, repeats * 10)
+
+
+def mediapipe_latency(profile, frame, repeats):
+    """Median ms per frame of the profile's MediaPipe graphs, or None if they can't be created"""
+    try:
+        from model_processor import ModelProcessor
+        # Time the graph in this process, even if BRIDGE_DETECTION_PROCESSES is set
+        processor = ModelProcessor(with_model=False, profile=profile.name, detection_processes=0)
+        if processor.holistic is None:
+            return None
+        try:
+            return median_ms(lambda: processor.mediapipe_detection(frame), repeats)
+        finally:
+            processor.holistic.close()
+    except Exception as e:
+        print(f"  MediaPipe timing skipped for {profile.name}: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', required=True, help='Packed dataset directory (keypoint_dataset.py pack)')
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES), choices=sorted(PROFILES),
+                        help='Feature profiles to train/evaluate')
+    parser.add_argument('--epochs', type=int, default=50, help='Training epochs')
+    parser.add_argument('--batch-size', type=int, default=32, help='Training batch size')
+    parser.add_argument('--test-size', type=float, default=0.05, help='Held-out fraction per class')
+    parser.add_argument('--seed', type=int, default=0, help='Split and shuffle seed')
+    parser.add_argument('--output-dir', default=os.path.dirname(MODEL_PATH), help='Where model files go')
+    parser.add_argument('--retrain', action='store_true', help='Train even if the model file already exists')
+    parser.add_argument('--frame', help='Image to time MediaPipe on (default: a blank 640x480 frame)')
+    parser.add_argument('--repeats', type=int, default=20, help='Timing repeats')
+    parser.add_argument('--report', help='Write the comparison as JSON to this path')
+    args = parser.parse_args()
+
+    from tensorflow import keras
+    import cv2
+
+    dataset = KeypointDataset(args.dataset)
+    train, test = dataset.split(args.test_size, args.seed)
+    print(f"{len(dataset)} sequences: {len(train)} train, {len(test)} test")
+    frame = cv2.imread(args.frame) if args.frame else np.zeros((480, 640, 3), dtype=np.uint8)
+
+    rows = []
+    for name in args.profiles:
+        profile = get_profile(name)
+        features = None if name == 'full' else profile.indices
+        path = profile_model_path(os.path.join(args.output_dir, os.path.basename(MODEL_PATH)), profile)
+        print(f"\n{name}: {profile.dim} features per frame -> {path}")
+
+        if os.path.exists(path) and not args.retrain:
+            print("  evaluating the existing model (--retrain to train a new one)")
+            model = keras.models.load_model(path)
+            trained = False
+        else:
+            model = build_model(profile.dim, len(dataset.actions))
+            model.fit(keras_sequence(dataset, train, args.batch_size, seed=args.seed, features=features),
+                      epochs=args.epochs, verbose=2)
+            model.save(path)
+            trained = True
+
+        accuracy = None
+        if len(test):
+            predictions = model.predict(dataset.gather(test, features=features), verbose=0)
+            accuracy = round(float(np.mean(np.argmax(predictions, axis=1) == dataset.labels[test])), 4)
+
+        windowed_ms, step_ms = model_latency(model, profile.dim, args.repeats)
+        rows.append({
+            'profile': name,
+            'features': profile.dim,
+            'model': path,
+            'trained': trained,
+            'parameters': int(model.count_params()),
+            'test_accuracy': accuracy,
+            'windowed_ms': windowed_ms,
+            'streaming_step_ms': step_ms,
+            'extract_ms': extraction_latency(profile, args.repeats),
+            'mediapipe_ms': mediapipe_latency(profile, frame, args.repeats),
+            'detector': profile.detector,
+        })
+
+    print(f"\n{'profile':<16} {'features':>8} {'params':>8} {'accuracy':>9} {'window ms':>10} "
+          f"{'step ms':>8} {'extract ms':>11} {'mediapipe ms':>13}")
+    for row in rows:
+        accuracy = f"{row['test_accuracy']:.3f}" if row['test_accuracy'] is not None else '-'
+        mediapipe = f"{row['mediapipe_ms']:.1f}" if row['mediapipe_ms'] is not None else '-'
+        print(f"{row['profile']:<16} {row['features']:>8} {row['parameters']:>8} {accuracy:>9} "
+              f"{row['windowed_ms']:>10.2f} {row['streaming_step_ms']:>8.3f} {row['extract_ms']:>11.3f} {mediapipe:>13}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'dataset': args.dataset, 'train': len(train), 'test': len(test), 'profiles': rows}, f, indent=2)
+            f.write('\n')
+        print(f"\nReport written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
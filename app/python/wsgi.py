@@ -0,0 +1,22 @@
+"""
+WSGI entry point for running the bridge under an external server, e.g.
+
+    waitress-serve --threads 8 --listen localhost:5001 wsgi:app
+    gunicorn --workers 1 --threads 8 --bind localhost:5001 wsgi:app
+
+Use one worker process with several threads: sessions, the Arduino port and
+the stream channel belong to the process, and PROCESSOR_WORKERS already
+spreads MediaPipe across cores. `python bridge_service.py` with
+BRIDGE_SERVER=production does the same with waitress built in.
+
+Every open GET /events (Server-Sent Events) connection occupies one of the
+server's threads until the client disconnects. Size --threads for the
+frame clients plus the expected /events clients, and set EVENT_MAX_SUBSCRIBERS
+so subscribers beyond that get 503 rather than taking threads from
+/process_frame.
+"""
+
+import bridge_service
+
+bridge_service.start()
+app = bridge_service.app
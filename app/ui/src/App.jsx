@@ -268,6 +268,9 @@ function App() {
       const result = await window.electronAPI.sendFrame(frameData);
       console.log('Python response:', result);
 
+      // A newer frame's result has already been delivered
+      if (result && result.stale) return;
+
       // Update current prediction for live display
       if (result && result.success) {
         setCurrentPrediction({
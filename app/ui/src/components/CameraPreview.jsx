@@ -144,12 +144,13 @@ function CameraPreview({ isActive, cameraId, onFrameCapture, currentPrediction }
 
     ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
 
-    // Convert to base64 and send to parent
-    const frameData = canvas.toDataURL('image/jpeg', 0.8);
-    if (onFrameCapture) {
-      console.log('Capturing frame, size:', frameData.length);
+    // Encode as JPEG bytes and send to parent (no base64 data URL)
+    canvas.toBlob(async (blob) => {
+      if (!blob || !onFrameCapture) return;
+      const frameData = new Uint8Array(await blob.arrayBuffer());
+      console.log('Capturing frame, size:', frameData.byteLength);
       onFrameCapture(frameData);
-    }
+    }, 'image/jpeg', 0.8);
   };
 
   const stopCamera = () => {